@@ -0,0 +1,53 @@
+"""
+Benchmark of the sharded process-pool Blast search (parallel_search) against the serial batch_search.
+
+Random protein queries, each sharing a region with one subject, are searched against a database of
+random subjects with neighborhood words (w=3, T=11) and two-hit seeding.
+
+Run from the repository root:
+    python -m benchmarks.bench_blast_search
+"""
+import os
+import random
+import time
+
+from src.Blast import BlastDatabase, batch_search, parallel_search
+
+AMINO_ACIDS = "ARNDCQEGHILKMFPSTWYV"
+
+
+def random_protein(length, rng):
+    """Returns a random protein sequence of the given length."""
+    return "".join(rng.choice(AMINO_ACIDS) for _ in range(length))
+
+
+def benchmark(subjects=200, subject_length=300, queries=16, workers=None, seed=0):
+    """
+    Times batch_search and parallel_search on the same queries and checks both give the same rows.
+
+    Returns:
+    - tuple[float, float]: Seconds taken by batch_search and by parallel_search.
+    """
+    rng = random.Random(seed)
+    database = BlastDatabase([(f"s{i}", random_protein(subject_length, rng)) for i in range(subjects)], 3)
+    records = []
+    for i in range(queries):
+        subject = database.sequence(rng.randrange(subjects))
+        records.append((f"q{i}", random_protein(30, rng) + subject[100:200] + random_protein(30, rng)))
+
+    start = time.perf_counter()
+    expected = list(batch_search(records, database, 3, T=11, A=40))
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = list(parallel_search(records, database, 3, workers=workers, T=11, A=40))
+    parallel = time.perf_counter() - start
+
+    assert rows == expected, "parallel_search disagrees with batch_search"
+    return serial, parallel
+
+
+if __name__ == "__main__":
+    workers = os.cpu_count() or 1
+    serial, parallel = benchmark(workers=workers)
+    print(f"workers={workers}  batch_search: {serial:.2f}s  parallel_search: {parallel:.2f}s  speedup: {serial / parallel:.1f}x")
@@ -0,0 +1,66 @@
+"""
+Benchmark of the banded global alignment against the full global_score on near-identical sequences.
+
+Each target is a variant of a random protein with about 5% of its residues substituted, deleted or
+followed by an insertion, the case global_banded is meant for. global_score vectorizes whole rows of the
+matrix while global_banded loops over the rows of narrow bands, so the gain shows on long sequences.
+
+Run from the repository root:
+    python -m benchmarks.bench_global_banded
+"""
+import random
+import time
+
+from src.global_alignment import global_banded, global_score
+
+AMINO_ACIDS = "ARNDCQEGHILKMFPSTWYV"
+
+
+def random_protein(length, rng):
+    """Returns a random protein sequence of the given length."""
+    return "".join(rng.choice(AMINO_ACIDS) for _ in range(length))
+
+
+def variant(sequence, divergence, rng):
+    """Returns a copy of the sequence with a fraction `divergence` of substitutions, deletions and insertions."""
+    residues = []
+    for residue in sequence:
+        draw = rng.random()
+        if draw < divergence / 3:
+            continue
+        if draw < 2 * divergence / 3:
+            residues.append(rng.choice(AMINO_ACIDS))
+            continue
+        residues.append(residue)
+        if draw < divergence:
+            residues.append(rng.choice(AMINO_ACIDS))
+    return "".join(residues)
+
+
+def benchmark(length=10000, divergence=0.05, seed=1):
+    """
+    Times global_score and global_banded on the same pair and checks both give the same score.
+
+    Returns:
+    - tuple[float, float]: Seconds taken by global_score and by global_banded (alignment included).
+    """
+    rng = random.Random(seed)
+    s1 = random_protein(length, rng)
+    s2 = variant(s1, divergence, rng)
+
+    start = time.perf_counter()
+    expected = global_score(s1, s2)
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score, _, _ = global_banded(s1, s2)
+    banded = time.perf_counter() - start
+
+    assert score == expected, "global_banded disagrees with global_score"
+    return full, banded
+
+
+if __name__ == "__main__":
+    for length in (3000, 10000, 20000):
+        full, banded = benchmark(length=length)
+        print(f"length={length:>5}  global_score: {full:.3f}s  global_banded: {banded:.3f}s  speedup: {full / banded:.1f}x")
@@ -0,0 +1,50 @@
+"""
+Benchmark of the striped (Farrar) Smith-Waterman kernel against the original local_score.
+
+One query is aligned against many random targets, the usual screening workload: the striped
+profile is built once and reused for every target.
+
+Run from the repository root:
+    python -m benchmarks.bench_local_score
+"""
+import random
+import time
+
+from src.local_alignment import local_score, local_score_striped, striped_profile
+
+AMINO_ACIDS = "ARNDCQEGHILKMFPSTWYV"
+
+
+def random_protein(length, rng):
+    """Returns a random protein sequence of the given length."""
+    return "".join(rng.choice(AMINO_ACIDS) for _ in range(length))
+
+
+def benchmark(query_length=300, target_length=300, targets=20, lanes=64, seed=0):
+    """
+    Times local_score and local_score_striped on the same query/targets and checks both give the same scores.
+
+    Returns:
+    - tuple[float, float]: Seconds taken by local_score and by local_score_striped (profile included).
+    """
+    rng = random.Random(seed)
+    query = random_protein(query_length, rng)
+    database = [random_protein(target_length, rng) for _ in range(targets)]
+
+    start = time.perf_counter()
+    expected = [local_score(query, target) for target in database]
+    original = time.perf_counter() - start
+
+    start = time.perf_counter()
+    profile = striped_profile(query, lanes)
+    scores = [local_score_striped(profile, target) for target in database]
+    striped = time.perf_counter() - start
+
+    assert scores == expected, "striped kernel disagrees with local_score"
+    return original, striped
+
+
+if __name__ == "__main__":
+    for lanes in (16, 32, 64, 128):
+        original, striped = benchmark(lanes=lanes)
+        print(f"lanes={lanes:>3}  local_score: {original:.3f}s  striped: {striped:.3f}s  speedup: {original / striped:.1f}x")
@@ -0,0 +1,39 @@
+"""
+Benchmark of the vectorized six-frame translation (translate_six_frames) against the codon-list path
+(get_six_orfs + translate_codons_to_protein) on a random multi-megabase DNA sequence.
+
+Run from the repository root:
+    python -m benchmarks.bench_six_frames
+"""
+import random
+import time
+
+from src.get_proteins import get_six_orfs, translate_codons_to_protein, translate_six_frames
+
+
+def benchmark(length=2_000_000, seed=0):
+    """
+    Translates the same sequence with both paths and checks they give the same six frames.
+
+    Returns:
+    - tuple[float, float]: Seconds taken by the codon-list path and by translate_six_frames.
+    """
+    dna = "".join(random.Random(seed).choices("ACGT", k=length))
+
+    start = time.perf_counter()
+    expected = [translate_codons_to_protein(orf) for orf in get_six_orfs(dna)]
+    codon_lists = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frames = translate_six_frames(dna)
+    vectorized = time.perf_counter() - start
+
+    assert frames == expected, "translate_six_frames disagrees with get_six_orfs + translate_codons_to_protein"
+    return codon_lists, vectorized
+
+
+if __name__ == "__main__":
+    length = 2_000_000
+    codon_lists, vectorized = benchmark(length)
+    print(f"length={length}  codon lists: {codon_lists:.2f}s  translate_six_frames: {vectorized:.3f}s  "
+          f"speedup: {codon_lists / vectorized:.0f}x")
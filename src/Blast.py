@@ -1,14 +1,276 @@
-def query_map(query, w):
+import argparse
+import heapq
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+import numpy as np
+
+from src.fasta import parse_fasta, read_fasta
+from src.karlin_altschul import bit_score, karlin_altschul, min_score
+from src.karlin_altschul import evalue as expected_hits
+from src.local_alignment import local_affine_matrices, traceback_affine
+from src.my_blosum import get_matrix
+
+MAX_WORD = 8  # Longest word that fits in the 64-bit integer codes of a BlastDatabase.
+INDEX_MAGIC = b"AASBIDX1"  # First bytes of a BlastDatabase index file (format version 1).
+NEIGHBORHOOD_ALPHABET = "ARNDCQEGHILKMFPSTWYV"  # Residues of the neighborhood words (the 20 amino acids).
+XDROP = 20  # Default X-drop of the ungapped extension: stop once the score falls this far below its best.
+XDROP_BLOCK = 64  # Residues scored at once by the first block of an X-drop extension (then doubled).
+GAP_TRIGGER = 41  # Default ungapped score needed for a gapped extension (about 22 bits with BLOSUM62).
+GAPPED_BAND = 16  # Default number of extra residues around an ungapped HSP searched by the gapped extension.
+MAX_HSPS = 10  # Default number of HSPs reported per query by `batch_search`.
+QUERY_BATCH = 64  # Number of queries sent to the workers together by `parallel_search`.
+# Arrays of an index file, in file order, after the header.
+INDEX_ARRAYS = (("codes", np.int64), ("offsets", np.int64), ("sequence_ids", np.int32),
+                ("positions", np.int32), ("starts", np.int64), ("data", np.uint8))
+
+# High-scoring segment pair found by `find_hsps`. Starts are inclusive and ends exclusive indices.
+# bitscore and evalue are None when no Karlin-Altschul parameters are known for the scoring system.
+HSP = namedtuple("HSP", ["sequence_id", "query_start", "query_end", "db_start", "db_end", "score",
+                         "aligned_query", "aligned_db", "bitscore", "evalue"], defaults=(None, None))
+
+# Columns of the rows of `batch_search`, as in BLAST tabular output (-outfmt 6), with 1-based inclusive coordinates.
+TABULAR_FIELDS = ("qseqid", "sseqid", "pident", "length", "mismatch", "gapopen",
+                  "qstart", "qend", "sstart", "send", "evalue", "bitscore")
+
+
+def word_codes(data, w):
+  """
+  Encodes every word of length `w` of a byte array as one integer (the bytes of the word, big-endian).
+
+  Args:
+    data: numpy.uint8 array of residues.
+    w: The length of the words.
+
+  Returns:
+    numpy.int64 array where element i is the code of data[i:i + w] (empty if data is shorter than w).
+  """
+  count = max(len(data) - w + 1, 0)
+  codes = np.zeros(count, dtype=np.int64)
+  for k in range(w):
+    codes = (codes << 8) | data[k:k + count]
+  return codes
+
+
+class BlastDatabase:
+  """
+  Word index of a set of subject sequences, built once and searched by many queries.
+
+  Every word of length `w` of every sequence is stored in compact arrays: `codes` holds the distinct words,
+  sorted and encoded as integers (see `word_codes`), and the postings of codes[i] are
+  sequence_ids[offsets[i]:offsets[i + 1]] and positions[offsets[i]:offsets[i + 1]], ordered by sequence and
+  position. Looking up a query word is a binary search in `codes`, so the cost of a search depends on the
+  number of hits instead of the total length of the database.
+
+  A BlastDatabase can be passed in place of the database sequence to `hits` and `best_hit`.
+
+  The index can be written to a flat binary file with `save` and opened again with `BlastDatabase.open`,
+  which maps the file in memory instead of reading it: opening is immediate, processes opening the same
+  file share its pages, and a search only reads the postings of the words it looks up.
+
+  `shard` gives a view of the index restricted to a range of sequences, used by `parallel_search`.
+
+  Args:
+    sequences: List of (name, sequence) tuples, as returned by `read_fasta`, or a list of sequences.
+    w: The length of the indexed words (1 to MAX_WORD).
+  """
+
+  def __init__(self, sequences, w):
+    if not 1 <= w <= MAX_WORD:
+      raise ValueError(f"Word length must be between 1 and {MAX_WORD}, got {w}")
+    records = [record if isinstance(record, tuple) else (str(i), record) for i, record in enumerate(sequences)]
+    self.w = w
+    self.path = None
+    self.names = [name for name, _ in records]
+    self.sequence_range = (0, len(records))
+    encoded = [sequence.encode("ascii") for _, sequence in records]
+    self.starts = np.zeros(len(encoded) + 1, dtype=np.int64)
+    self.starts[1:] = np.cumsum([len(sequence) for sequence in encoded])
+    self.data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    # Words of the concatenated sequences, without the ones that cross into the next sequence
+    codes = word_codes(self.data, w)
+    lengths = np.diff(self.starts)
+    sequence_ids = np.repeat(np.arange(len(encoded), dtype=np.int32), lengths)[:len(codes)]
+    positions = np.arange(len(codes), dtype=np.int64) - self.starts[sequence_ids]
+    inside = positions <= lengths[sequence_ids] - w
+    codes, sequence_ids, positions = codes[inside], sequence_ids[inside], positions[inside]
+
+    order = np.argsort(codes, kind="stable")
+    self.codes, counts = np.unique(codes[order], return_counts=True)
+    self.offsets = np.zeros(len(self.codes) + 1, dtype=np.int64)
+    self.offsets[1:] = np.cumsum(counts)
+    self.sequence_ids = sequence_ids[order]
+    self.positions = positions[order].astype(np.int32)
+
+  @classmethod
+  def from_fasta(cls, path, w):
+    """
+    Builds the index of all the sequences of a FASTA file.
+
+    Args:
+      path: Path of the FASTA file.
+      w: The length of the indexed words.
+
+    Returns:
+      The BlastDatabase, with the FASTA headers as sequence names.
+    """
+    return cls(read_fasta(path), w)
+
+  def shard(self, start, stop):
+    """
+    Returns a view of the index where `lookup` (and so the searches) only report the sequences with
+    index in range(start, stop). The arrays are shared, and sequence indices stay those of the full index.
+    """
+    shard = object.__new__(BlastDatabase)
+    shard.__dict__.update(self.__dict__)
+    shard.sequence_range = (start, stop)
+    return shard
+
+  def shard_ranges(self, shards):
+    """
+    Splits the sequences into at most `shards` consecutive ranges with about the same number of residues.
+
+    Returns:
+      A list of (start, stop) sequence index ranges covering all the sequences.
+    """
+    targets = np.linspace(0, self.starts[-1], shards + 1)[1:-1]
+    bounds = np.unique(np.concatenate([[0], np.searchsorted(self.starts[1:], targets, side="right"), [len(self)]]))
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+  def save(self, path):
+    """
+    Writes the index to a flat binary file that `BlastDatabase.open` maps in memory.
+
+    The file holds INDEX_MAGIC, a header of len(INDEX_ARRAYS) + 3 = 9 int64 values (w, number of sequences,
+    the length of each of the 6 arrays of INDEX_ARRAYS and the size of the names), the arrays of
+    INDEX_ARRAYS in that order, each starting at a multiple of 8 bytes, and the sequence names as UTF-8 lines.
+
+    Args:
+      path: Path of the file to write.
+    """
+    arrays = [np.ascontiguousarray(getattr(self, name), dtype=dtype) for name, dtype in INDEX_ARRAYS]
+    names = "\n".join(self.names).encode("utf-8")
+    header = np.array([self.w, len(self.names)] + [len(array) for array in arrays] + [len(names)], dtype=np.int64)
+    with open(path, "wb") as handle:
+      handle.write(INDEX_MAGIC)
+      handle.write(header.tobytes())
+      for array in arrays:
+        handle.write(array.tobytes())
+        handle.write(bytes(-array.nbytes % 8))
+      handle.write(names)
+
+  @classmethod
+  def open(cls, path):
+    """
+    Opens an index file written by `save`, mapping its arrays in memory (read-only).
+
+    Args:
+      path: Path of the index file.
+
+    Returns:
+      The BlastDatabase, whose arrays are views of the mapped file.
+
+    Raises:
+      ValueError: If the file is not a BlastDatabase index.
+    """
+    content = np.memmap(path, dtype=np.uint8, mode="r")
+    header_size = len(INDEX_MAGIC) + 8 * (len(INDEX_ARRAYS) + 3)
+    if content[:len(INDEX_MAGIC)].tobytes() != INDEX_MAGIC or len(content) < header_size:
+      raise ValueError(f"{path} is not a BlastDatabase index file")
+    w, sequences, *lengths, names_size = content[len(INDEX_MAGIC):header_size].view(np.int64).tolist()
+
+    database = object.__new__(cls)
+    database.w = w
+    database.path = os.path.abspath(path)
+    database.sequence_range = (0, sequences)
+    start = header_size
+    for (name, dtype), length in zip(INDEX_ARRAYS, lengths):
+      end = start + length * np.dtype(dtype).itemsize
+      setattr(database, name, content[start:end].view(dtype))
+      start = end + (-end % 8)
+    names = content[start:start + names_size].tobytes().decode("utf-8")
+    database.names = names.split("\n") if sequences else []
+    return database
+
+  def __len__(self):
+    return len(self.names)
+
+  def sequence(self, index):
+    """
+    Returns the sequence number `index` of the database as a string.
+    """
+    return self.data[self.starts[index]:self.starts[index + 1]].tobytes().decode("ascii")
+
+  def lookup(self, word):
+    """
+    Finds all occurrences of one word in the database.
+
+    Args:
+      word: A word of length `w`.
+
+    Returns:
+      A tuple (sequence_ids, positions) of arrays, one element per occurrence.
+    """
+    if len(word) != self.w:
+      raise ValueError(f"The database is indexed with words of length {self.w}, got {word!r}")
+    code = word_codes(np.frombuffer(word.encode("ascii"), dtype=np.uint8), self.w)[0]
+    i = np.searchsorted(self.codes, code)
+    if i == len(self.codes) or self.codes[i] != code:
+      return self.sequence_ids[:0], self.positions[:0]
+    start, stop = self.offsets[i], self.offsets[i + 1]
+    if self.sequence_range != (0, len(self)):
+      # The postings of a word are sorted by sequence index
+      start, stop = start + np.searchsorted(self.sequence_ids[start:stop], self.sequence_range)
+    return self.sequence_ids[start:stop], self.positions[start:stop]
+
+  def hits(self, query_dict):
+    """
+    Finds all occurrences of the words of a query in the database (see `hits`).
+
+    Args:
+      query_dict: A dictionary created by `query_map` with words of length `w`.
+
+    Returns:
+      A list of (query index, sequence index, position in that sequence) tuples.
+    """
+    return list(self.iter_hits(query_dict))
+
+  def iter_hits(self, query_dict):
+    """
+    Generator version of `BlastDatabase.hits`: yields the hits one word at a time instead of building the
+    whole list.
+    """
+    for word, query_indices in query_dict.items():
+      sequence_ids, positions = self.lookup(word)
+      if len(sequence_ids) == 0:
+        continue
+      postings = list(zip(sequence_ids.tolist(), positions.tolist()))
+      for query_index in query_indices:
+        for sequence_id, position in postings:
+          yield query_index, sequence_id, position
+
+
+def query_map(query, w, T=None, matrix=None):
   """
   Creates a dictionary of words and their starting indices in the query.
 
   Args:
     query: The input query sequence.
     w: The length of the words (substrings).
+    T: Neighborhood score threshold. If given, every word scoring at least T against a query word
+       (see `neighborhood_words`) is mapped to the positions of that query word, instead of only
+       the exact query words.
+    matrix: Substitution matrix used with T, its name or None for BLOSUM62.
 
   Returns:
     A dictionary where keys are substrings of length `w` from the `query` 
     and values are lists of their starting indices in the `query`.
+    With T, the keys are the neighborhood words and the lists are sorted.
   """
   map_dict = {}
   for i in range(len(query) - w + 1):
@@ -16,22 +278,78 @@ def query_map(query, w):
     if subseq not in map_dict:
       map_dict[subseq] = [] 
     map_dict[subseq].append(i) 
-  return map_dict
+  if T is None:
+    return map_dict
+
+  neighbor_dict = {}
+  for subseq, indices in map_dict.items():
+    for word in neighborhood_words(subseq, T, matrix):
+      neighbor_dict.setdefault(word, []).extend(indices)
+  for indices in neighbor_dict.values():
+    indices.sort()
+  return neighbor_dict
 
-def hits(query_dict, db_sequence):
+def neighborhood_words(word, T, matrix=None):
+  """
+  Enumerates the words that score at least T against `word` (BLAST neighborhood).
+
+  The words are built one position at a time, trying the letters of NEIGHBORHOOD_ALPHABET from the best
+  to the worst score against that position. A prefix is abandoned as soon as its score plus the best
+  possible score of the remaining positions falls below T, so only the neighborhood itself (and not all
+  the 20^w words) is explored.
+
+  Args:
+    word: A query word.
+    T: The score threshold.
+    matrix: Substitution matrix, its name or None for BLOSUM62.
+
+  Returns:
+    A list of the neighborhood words, which includes `word` itself if it scores at least T.
+  """
+  matrix = get_matrix(matrix)
+  letters = np.array(list(NEIGHBORHOOD_ALPHABET))
+  rows = matrix.matrix[np.ix_(matrix.encode(word), matrix.encode(NEIGHBORHOOD_ALPHABET))]
+  order = np.argsort(-rows, axis=1, kind="stable")
+  scores = np.take_along_axis(rows, order, axis=1).tolist()
+  choices = letters[order].tolist()
+  best_rest = np.append(np.cumsum(rows.max(axis=1)[::-1])[::-1], 0).tolist()
+
+  words = []
+  stack = [("", 0)]
+  while stack:
+    prefix, score = stack.pop()
+    k = len(prefix)
+    if k == len(word):
+      words.append(prefix)
+      continue
+    for letter, letter_score in zip(choices[k], scores[k]):
+      if score + letter_score + best_rest[k + 1] < T:
+        break  # The next letters score even less
+      stack.append((prefix + letter, score + letter_score))
+  return sorted(words)
+
+def hits(query_dict, db_sequence, w=None):
   """
   Finds all occurrences of query words in the db_sequence.
 
   Args:
     query_dict: A dictionary created by `query_map`.
-    db_sequence: The database sequence to search against.
+    db_sequence: The database sequence to search against, or a BlastDatabase indexed with the same word length.
+    w: The length of the words, by default the length of the words of `query_dict`.
 
   Returns:
     A list of tuples, where each tuple represents a hit and contains:
       - Starting index of the hit in the query.
       - Starting index of the hit in the db_sequence.
+    With a BlastDatabase, each tuple is (query index, sequence index, position in that sequence).
   """
+  if isinstance(db_sequence, BlastDatabase):
+    return db_sequence.hits(query_dict)
   hit_list = []
+  if w is None:
+    w = len(next(iter(query_dict), ""))  # All the words of a query map have the same length
+  if w == 0:
+    return hit_list
   for i in range(len(db_sequence) - w + 1):
     subseq = db_sequence[i:i + w]
     if subseq in query_dict:
@@ -62,7 +380,7 @@ def extend_hit(query, db_sequence, hit, w):
   matfw = 0  # Number of forward matches 
   k = 0
   bestk = 0  # Best extension length in the forward direction
-  while 2*matfw >= k and stq+w+k < len(query) and sts+w+k < len(query):
+  while 2*matfw >= k and stq+w+k < len(query) and sts+w+k < len(db_sequence):
     if query[stq+w+k] == db_sequence[sts+w+k]:
       matfw+=1
       bestk = k+1
@@ -73,7 +391,7 @@ def extend_hit(query, db_sequence, hit, w):
   matbw = 0  # Number of backward matches
   bestk = 0  # Best extension length in the backward direction
   while 2*matbw >= k and stq > k and sts > k:
-    if db_sequence[stq-k-1] == db_sequence[sts-k-1]:
+    if query[stq-k-1] == db_sequence[sts-k-1]:
       matbw+=1
       bestk = k+1
     k+=1
@@ -81,40 +399,682 @@ def extend_hit(query, db_sequence, hit, w):
   return (stq-bestk, sts-bestk, size, w+matfw+matbw)
 
 
-def best_hit(query, db_sequence, w):
+def best_hit(query, db_sequence, w, A=None, stats=None, X=None, matrix=None):
   """
   Finds the best hit (longest match with the highest number of matching characters) 
   between the query and db_sequence.
 
   Args:
     query: The input query sequence.
-    db_sequence: The database sequence to search against.
+    db_sequence: The database sequence to search against, or a BlastDatabase indexed with words of length `w`.
     w: The length of the words (substrings).
+    A: Two-hit window. By default every hit is extended. With A, hits are grouped by diagonal
+       (db index - query index) and a hit is only extended when an earlier, non-overlapping hit lies on
+       the same diagonal at most A positions before it; hits inside an earlier extension are skipped.
+    stats: Optional dictionary that receives the counters of the search (see `extend_hits`).
+    X: X-drop. By default hits are extended with `extend_hit` and ranked by number of matches; with X they
+       are extended with `xdrop_extend` and ranked by substitution score.
+    matrix: Substitution matrix used with X, its name or None for BLOSUM62.
 
   Returns:
     A tuple containing:
       - Starting index of the best hit in the query.
       - Starting index of the best hit in the db_sequence.
       - Total size of the best hit.
-      - Number of matching characters beyond the initial window.
+      - Number of matching characters beyond the initial window (the score with X).
+    With a BlastDatabase, the tuple starts with the index of the database sequence of the best hit.
   """
-  hit_list = hits(query_map(query, w), db_sequence) 
-  bestScore = -1.0
+  hit_list, sequence_of = _hit_list(query, db_sequence, query_map(query, w), by_query=A is not None)
+  extend = extend_hit if X is None else partial(xdrop_extend, X=X, matrix=matrix)
+
+  bestScore = float("-inf")
   bestExtension = ()
-  for hit in hit_list:
-    ext = extend_hit(query, db_sequence, hit, w)
-    score = ext[3] 
-    if score > bestScore or (score == bestScore and ext[2] < bestExtension[2]):
+  bestSequence = None
+  for sequence_id, ext in extend_hits(query, hit_list, sequence_of, w, A, stats, extend):
+    score = ext[3]
+    if score > bestScore or (score == bestScore and ext[2] < bestExtension[2]) or (
+        # Two-hit ties go to the first diagonal, whatever the order the diagonals are visited in
+        A is not None and score == bestScore and ext[2] == bestExtension[2]
+        and (sequence_id, ext[1] - ext[0]) < (bestSequence, bestExtension[1] - bestExtension[0])):
       bestScore = score
       bestExtension = ext
+      bestSequence = sequence_id
+  if isinstance(db_sequence, BlastDatabase) and bestExtension:
+    return (bestSequence,) + bestExtension
   return bestExtension
 
-# Example usage:
-query = "AATATAT"
-db_sequence = "AATATGTTATATAATAATATTT"
-w = 3
+def _hit_list(query, db_sequence, query_dict, by_query=False):
+  """
+  Returns the hits of a query map as an iterator of (sequence id, query index, db index) tuples, with the
+  function that gives the database sequence of a sequence id (always `db_sequence` when it is a single sequence).
+  With `by_query`, the hits come in increasing query index (see `_query_order_hits`).
+  """
+  if by_query:
+    hit_list = _query_order_hits(query_dict, db_sequence)
+  elif isinstance(db_sequence, BlastDatabase):
+    hit_list = ((sequence_id, query_index, position)
+                for query_index, sequence_id, position in db_sequence.iter_hits(query_dict))
+  else:
+    hit_list = ((0, query_index, db_index) for query_index, db_index in hits(query_dict, db_sequence))
+  if isinstance(db_sequence, BlastDatabase):
+    sequences = {}
+    def sequence_of(sequence_id):
+      if sequence_id not in sequences:
+        sequences[sequence_id] = db_sequence.sequence(sequence_id)
+      return sequences[sequence_id]
+  else:
+    sequence_of = lambda sequence_id: db_sequence
+  return hit_list, sequence_of
+
+def _query_order_hits(query_dict, db_sequence):
+  """
+  Yields the hits of a query map as (sequence id, query index, db index) tuples in increasing query index:
+  the words are taken position by position and the postings of each word are streamed as it comes, so every
+  diagonal receives its hits in order without the hits being collected and sorted.
+  """
+  words_at = {}  # Query index -> words starting there
+  for word, query_indices in query_dict.items():
+    for query_index in query_indices:
+      words_at.setdefault(query_index, []).append(word)
+  if isinstance(db_sequence, BlastDatabase):
+    def postings(word):
+      sequence_ids, positions = db_sequence.lookup(word)
+      return zip(sequence_ids.tolist(), positions.tolist())
+  else:
+    w = len(next(iter(query_dict), ""))
+    occurrences = {}  # Positions of the query words in the db sequence
+    for i in range(len(db_sequence) - w + 1 if w else 0):
+      if db_sequence[i:i + w] in query_dict:
+        occurrences.setdefault(db_sequence[i:i + w], []).append(i)
+    postings = lambda word: ((0, position) for position in occurrences.get(word, ()))
+  for query_index in sorted(words_at):
+    for word in words_at[query_index]:
+      for sequence_id, position in postings(word):
+        yield sequence_id, query_index, position
+
+def extend_hits(query, hit_list, sequence_of, w, A=None, stats=None, extend=extend_hit):
+  """
+  Extends the hits chosen by the one-hit (every hit) or two-hit seeding rule.
+
+  The hits are consumed as they come, so `hit_list` can be a generator and is never held in memory. In
+  two-hit mode they must come in increasing query index (`_hit_list` with `by_query`), so that every
+  diagonal receives its hits in order; only the last hit and the end of the last extension of each diagonal
+  are kept. A hit overlapping the previous hit of its diagonal is ignored, a hit inside the last extension
+  of its diagonal is skipped, and any other hit is extended only if the previous hit of its diagonal starts
+  at most A positions before it. On repetitive sequences most hits fall on a few diagonals, so most
+  extensions are avoided.
+
+  Args:
+    query: The input query sequence.
+    hit_list: Iterable of (sequence id, query index, db index) tuples, by increasing query index with A.
+    sequence_of: Function returning the database sequence of a sequence id.
+    w: The length of the words.
+    A: Two-hit window, or None to extend every hit.
+    stats: Optional dictionary where the counters "hits", "extensions", "covered" (hits inside a previous
+           extension), "overlapping" and "unpaired" (no earlier hit within A) are added.
+    extend: Extension function with the arguments and result of `extend_hit` (such as `xdrop_extend`).
+
+  Yields:
+    (sequence id, extension) tuples, with the extension returned by `extend`.
+  """
+  counters = dict.fromkeys(("hits", "extensions", "covered", "overlapping", "unpaired"), 0)
+  if A is None:
+    for sequence_id, query_index, db_index in hit_list:
+      counters["hits"] += 1
+      counters["extensions"] += 1
+      yield sequence_id, extend(query, sequence_of(sequence_id), (query_index, db_index), w)
+  else:
+    last_hit = {}  # Query index of the last hit of each diagonal
+    covered = {}   # Query index where the last extension of each diagonal ends
+    for sequence_id, query_index, db_index in hit_list:
+      counters["hits"] += 1
+      diagonal = (sequence_id, db_index - query_index)
+      if query_index < covered.get(diagonal, 0):
+        counters["covered"] += 1
+        continue
+      previous = last_hit.get(diagonal)
+      if previous is not None and query_index - previous < w:
+        counters["overlapping"] += 1
+        continue
+      last_hit[diagonal] = query_index
+      if previous is None or query_index - previous > A:
+        counters["unpaired"] += 1
+        continue
+      counters["extensions"] += 1
+      ext = extend(query, sequence_of(sequence_id), (query_index, db_index), w)
+      covered[diagonal] = ext[0] + ext[2]
+      yield sequence_id, ext
+  if stats is not None:
+    for key, value in counters.items():
+      stats[key] = stats.get(key, 0) + value
+
+def xdrop_extend(query, db_sequence, hit, w, X=XDROP, matrix=None):
+  """
+  Extends a hit in both directions without gaps, scoring with a substitution matrix (X-drop).
+
+  Each direction is extended while the running score stays within X of the best score seen so far, and is
+  then cut back to the position of that best score. Both directions are scored with NumPy in growing
+  blocks (see `_xdrop`), bounded by the overlap of the two sequences on the diagonal, so an extension reads
+  about as many residues as it covers rather than the rest of the subject.
+
+  Args:
+    query: The input query sequence.
+    db_sequence: The database sequence to search against.
+    hit: A tuple (query index, db index) of the word hit.
+    w: The length of the word.
+    X: The X-drop (by default XDROP).
+    matrix: Substitution matrix, its name or None for BLOSUM62.
+
+  Returns:
+    A tuple like `extend_hit`:
+      - Starting index of the extension in the query.
+      - Starting index of the extension in the db_sequence.
+      - Total size of the extension.
+      - Substitution score of the extension.
+  """
+  matrix = get_matrix(matrix)
+  stq, sts = hit
+  seed = int(matrix.matrix[matrix.encode(query[stq:stq + w]), matrix.encode(db_sequence[sts:sts + w])].sum())
+  right_limit = min(len(query) - stq - w, len(db_sequence) - sts - w)
+  right, right_score = _xdrop(matrix, query, db_sequence, stq + w, sts + w, right_limit, X)
+  left, left_score = _xdrop(matrix, query, db_sequence, stq, sts, min(stq, sts), X, backward=True)
+  return (stq - left, sts - left, w + left + right, seed + left_score + right_score)
+
+def _xdrop(matrix, query, db_sequence, query_index, db_index, limit, X, backward=False):
+  """
+  Returns (length, score) of the best ungapped extension of at most `limit` residues from query_index and
+  db_index (to the right, or to the left of them when `backward`), stopping where the score drops more than
+  X below the best one.
+
+  The diagonal is scored in blocks of XDROP_BLOCK, 2 * XDROP_BLOCK, ... residues, so only the residues up to
+  the end of the block where the score drops are read.
+  """
+  total, best, length = 0, 0, 0  # Score at the end of the previous block, best score and its length
+  done, block = 0, XDROP_BLOCK
+  while done < limit:
+    size = min(block, limit - done)
+    if backward:
+      s1 = query[query_index - done - size:query_index - done][::-1]
+      s2 = db_sequence[db_index - done - size:db_index - done][::-1]
+    else:
+      s1 = query[query_index + done:query_index + done + size]
+      s2 = db_sequence[db_index + done:db_index + done + size]
+    running = total + np.cumsum(matrix.matrix[matrix.encode(s1), matrix.encode(s2)])
+    dropped = np.flatnonzero(running < np.maximum.accumulate(np.maximum(running, best)) - X)
+    stop = dropped[0] if len(dropped) else size
+    if stop:
+      k = int(np.argmax(running[:stop]))
+      if running[k] > best:
+        best, length = int(running[k]), done + k + 1
+    if len(dropped):
+      break
+    total, done, block = int(running[-1]), done + size, 2 * block
+  return length, best
+
+def gapped_extend(query, db_sequence, hsp, band=GAPPED_BAND, gap_open=-11, gap_extend=-1, matrix=None):
+  """
+  Realigns an ungapped HSP with gaps: local alignment with affine gaps (`local_alignment.local_affine_matrices`)
+  restricted to the HSP region plus `band` residues on each side in both sequences.
+
+  Args:
+    query: The input query sequence.
+    db_sequence: The database sequence.
+    hsp: Ungapped extension (query start, db start, size, score), as returned by `xdrop_extend`.
+    band: Number of extra residues on each side of the HSP (by default GAPPED_BAND).
+    gap_open: The penalty for opening a gap, default is -11.
+    gap_extend: The penalty for each position of a gap, default is -1.
+    matrix: Substitution matrix, its name or None for BLOSUM62.
+
+  Returns:
+    A tuple (score, query start, db start, aligned query, aligned db sequence), with the starts as indices
+    in the full sequences.
+  """
+  q0, d0, window_query, window_db = _gapped_window(query, db_sequence, hsp, band)
+  matrices = local_affine_matrices(window_query, window_db, gap_open, gap_extend, matrix)
+  M, X, Y = matrices
+  H = np.maximum(np.maximum(M, X), np.maximum(Y, 0))
+  i, j = map(int, np.unravel_index(int(np.argmax(H)), H.shape))
+  aligned_query, aligned_db = traceback_affine(matrices, window_query, window_db, gap_open, gap_extend, matrix)
+  query_start = q0 + i - (len(aligned_query) - aligned_query.count("-"))
+  db_start = d0 + j - (len(aligned_db) - aligned_db.count("-"))
+  return int(H[i, j]), query_start, db_start, aligned_query, aligned_db
+
+def gapped_bound(query, db_sequence, hsp, band=GAPPED_BAND, matrix=None):
+  """
+  Upper bound of the score of `gapped_extend` for an ungapped HSP, without the dynamic programming.
+
+  A local alignment pairs each residue of the query window with at most one residue of the db window, and
+  gaps never add to the score, so it scores at most the sum of the best positive score of each query residue
+  against the db window. The same holds with the roles swapped; the smaller sum is returned.
+
+  Args:
+    query: The input query sequence.
+    db_sequence: The database sequence.
+    hsp: Ungapped extension (query start, db start, size, ...), as returned by `xdrop_extend`.
+    band: Number of extra residues on each side of the HSP (by default GAPPED_BAND).
+    matrix: Substitution matrix, its name or None for BLOSUM62.
+
+  Returns:
+    An integer that no gapped extension of the HSP with non-positive gap penalties can exceed.
+  """
+  matrix = get_matrix(matrix)
+  window_query, window_db = _gapped_window(query, db_sequence, hsp, band)[2:]
+  if not window_query or not window_db:
+    return 0
+  residues_query, query_rows = np.unique(matrix.encode(window_query), return_inverse=True)
+  residues_db, db_columns = np.unique(matrix.encode(window_db), return_inverse=True)
+  scores = np.maximum(matrix.matrix[np.ix_(residues_query, residues_db)], 0)
+  return int(min(scores.max(axis=1)[query_rows].sum(), scores.max(axis=0)[db_columns].sum()))
+
+def _gapped_window(query, db_sequence, hsp, band):
+  """
+  Returns (query start, db start, query window, db window) of the region searched by `gapped_extend`.
+  """
+  stq, sts, size = hsp[:3]
+  q0, d0 = max(stq - band, 0), max(sts - band, 0)
+  return q0, d0, query[q0:stq + size + band], db_sequence[d0:sts + size + band]
+
+def find_hsps(query, db_sequence, w, T=None, A=None, X=XDROP, cutoff=GAP_TRIGGER, gapped=True,
+              gap_open=-11, gap_extend=-1, band=GAPPED_BAND, matrix=None, stats=None, max_hsps=None, evalue=None):
+  """
+  Finds the high-scoring segment pairs (HSPs) of a query: word hits (exact, or neighborhood words with T),
+  optionally filtered by the two-hit rule (A), extended without gaps by X-drop, and, for the ungapped
+  HSPs scoring at least `cutoff`, realigned with gaps by `gapped_extend`. The dynamic programming is
+  only spent on those promising HSPs.
+
+  Each HSP gets its bit score and E-value from the Karlin-Altschul parameters of the scoring system
+  (`karlin_altschul.karlin_altschul`), with the query length and the total length of the database as
+  search space. With an `evalue` threshold, the HSPs are discarded as soon as their score is known to be
+  too low: ungapped extensions below the matching raw score are not kept, the gapped extension is skipped
+  when its upper bound (`gapped_bound`) is below it, and gapped HSPs below it are dropped before they reach
+  the results.
+
+  Args:
+    query: The input query sequence.
+    db_sequence: The database sequence, or a BlastDatabase indexed with words of length `w`.
+    w: The length of the words.
+    T: Neighborhood threshold (see `query_map`), or None for exact words.
+    A: Two-hit window (see `extend_hits`), or None to extend every hit.
+    X: X-drop of the ungapped extension.
+    cutoff: Minimum ungapped score of the reported HSPs (by default GAP_TRIGGER).
+    gapped: Whether to realign the HSPs with gaps.
+    gap_open: The penalty for opening a gap, default is -11.
+    gap_extend: The penalty for each position of a gap, default is -1.
+    band: Extra residues around each HSP searched by the gapped extension.
+    matrix: Substitution matrix, its name or None for BLOSUM62.
+    stats: Optional dictionary that receives the counters of `extend_hits`, plus "gapped" (number of
+           gapped extensions) and "pruned" (gapped HSPs above the E-value threshold, whether
+           skipped by their bound or dropped after the extension).
+    max_hsps: Number of best HSPs to keep, or None for all. Only that many HSPs are held in memory,
+              in a bounded heap that also removes the duplicates.
+    evalue: Maximum E-value of the reported HSPs, or None to keep them all.
+
+  Raises:
+    ValueError: If `evalue` is given and no Karlin-Altschul parameters are known for the scoring system.
+
+  Returns:
+    A list of distinct HSP tuples, sorted by decreasing score (then by sequence id and position).
+  """
+  found = iter_hsps(query, db_sequence, w, T, A, X, cutoff, gapped, gap_open, gap_extend, band, matrix, stats,
+                    evalue)
+  if max_hsps is None:
+    return sorted(set(found), key=_hsp_order)
+  return _best_hsps(found, max_hsps)
+
+def _hsp_order(hsp):
+  """
+  Sort key of the HSPs: decreasing score, then sequence id and positions, so the order is deterministic.
+  Distinct HSPs have distinct keys.
+  """
+  return (-hsp.score, hsp.sequence_id, hsp.query_start, hsp.db_start, hsp.query_end, hsp.db_end,
+          hsp.aligned_query, hsp.aligned_db)
+
+class _Worst:
+  """
+  Heap entry that reverses the order of `_hsp_order`, so the top of a `heapq` heap is its worst HSP.
+  """
+  __slots__ = ("key", "hsp")
+
+  def __init__(self, hsp):
+    self.key = _hsp_order(hsp)
+    self.hsp = hsp
+
+  def __lt__(self, other):
+    return other.key < self.key
+
+def _best_hsps(hsps, k):
+  """
+  Keeps the `k` best distinct HSPs of an iterable in a heap of at most `k` entries, worst on top.
+
+  Duplicates are removed inside the heap: an HSP equal to one in the heap is skipped, and one equal to an
+  evicted HSP is not better than the worst HSP kept, so it is rejected like the first copy.
+
+  Returns:
+    A list of at most `k` HSPs, sorted by `_hsp_order`.
+  """
+  if k <= 0:
+    return []
+  heap, kept = [], set()
+  for hsp in hsps:
+    if hsp in kept:
+      continue
+    entry = _Worst(hsp)
+    if len(heap) < k:
+      heapq.heappush(heap, entry)
+    elif entry.key < heap[0].key:
+      kept.discard(heapq.heapreplace(heap, entry).hsp)
+    else:
+      continue
+    kept.add(hsp)
+  return [entry.hsp for entry in sorted(heap, reverse=True)]
+
+def iter_hsps(query, db_sequence, w, T=None, A=None, X=XDROP, cutoff=GAP_TRIGGER, gapped=True,
+              gap_open=-11, gap_extend=-1, band=GAPPED_BAND, matrix=None, stats=None, evalue=None):
+  """
+  Generator version of `find_hsps` (same arguments): yields the HSPs as soon as they are found, in no
+  particular order.
+
+  Nothing is kept per HSP: an ungapped extension equal to the last one of its diagonal is skipped, as BLAST
+  does with its per-diagonal array, so the memory grows with the number of diagonals reached and not with the
+  number of HSPs. A gapped HSP reached from several ungapped extensions is yielded each time; `find_hsps`
+  removes those duplicates.
+  """
+  matrix = get_matrix(matrix)
+  try:
+    parameters = karlin_altschul(matrix, gap_open, gap_extend, gapped)
+  except ValueError:
+    if evalue is not None:
+      raise
+    parameters = None
+  query_length = len(query)
+  database_length = int(db_sequence.starts[-1]) if isinstance(db_sequence, BlastDatabase) else len(db_sequence)
+  threshold = None
+  if evalue is not None:
+    threshold = min_score(evalue, query_length, database_length, parameters)
+    if not gapped:
+      cutoff = max(cutoff, threshold)
+  hit_list, sequence_of = _hit_list(query, db_sequence, query_map(query, w, T, matrix), by_query=A is not None)
+  extend = partial(xdrop_extend, X=X, matrix=matrix)
+
+  last_extension = {}  # (Query start, size) of the last ungapped extension of each diagonal
+  for sequence_id, (stq, sts, size, score) in extend_hits(query, hit_list, sequence_of, w, A, stats, extend):
+    diagonal = (sequence_id, sts - stq)
+    if score < cutoff or last_extension.get(diagonal) == (stq, size):
+      continue
+    last_extension[diagonal] = (stq, size)
+    subject = sequence_of(sequence_id)
+    if gapped:
+      if threshold is not None and gapped_bound(query, subject, (stq, sts, size), band, matrix) < threshold:
+        if stats is not None:
+          stats["pruned"] = stats.get("pruned", 0) + 1
+        continue
+      score, query_start, db_start, aligned_query, aligned_db = gapped_extend(
+        query, subject, (stq, sts, size, score), band, gap_open, gap_extend, matrix)
+      if stats is not None:
+        stats["gapped"] = stats.get("gapped", 0) + 1
+      if threshold is not None and score < threshold:
+        if stats is not None:
+          stats["pruned"] = stats.get("pruned", 0) + 1
+        continue
+    else:
+      query_start, db_start = stq, sts
+      aligned_query, aligned_db = query[stq:stq + size], subject[sts:sts + size]
+    query_end = query_start + len(aligned_query) - aligned_query.count("-")
+    db_end = db_start + len(aligned_db) - aligned_db.count("-")
+    significance = (None, None)
+    if parameters is not None:
+      significance = (bit_score(score, parameters), expected_hits(score, query_length, database_length, parameters))
+    yield HSP(sequence_id, query_start, query_end, db_start, db_end, score, aligned_query, aligned_db, *significance)
+
+def batch_search(queries, database, w, max_hsps=MAX_HSPS, **options):
+  """
+  Searches many queries against a database, yielding the results as they are found.
+
+  The queries are read one at a time from any iterable (such as `fasta.parse_fasta` on an open file), the
+  hits of each query are streamed through the extension (see `iter_hsps`) and only the `max_hsps` best HSPs
+  of the query are kept in a bounded heap, so memory does not grow with the number of queries or hits.
+
+  Args:
+    queries: Iterable of (name, sequence) tuples or of sequences (named by their position).
+    database: BlastDatabase indexed with words of length `w`, or a single subject sequence.
+    w: The length of the words.
+    max_hsps: Number of HSPs reported per query (by default MAX_HSPS).
+    **options: Other arguments of `find_hsps` (T, A, X, cutoff, gapped, gap_open, gap_extend, band, matrix,
+               stats, evalue).
+
+  Yields:
+    One tuple per HSP with the columns of TABULAR_FIELDS, query by query, best HSP first.
+  """
+  if isinstance(database, str):
+    database = BlastDatabase([database], w)
+  for i, record in enumerate(queries):
+    name, query = record if isinstance(record, tuple) else (str(i), record)
+    for hsp in find_hsps(query, database, w, max_hsps=max_hsps, **options):
+      yield tabular_row(name, database.names[hsp.sequence_id], hsp)
+
+def parallel_search(queries, database, w, max_hsps=MAX_HSPS, workers=None, shards=None, **options):
+  """
+  `batch_search` over a pool of worker processes, with the same rows in the same order.
+
+  The database is split into shards of consecutive sequences (`BlastDatabase.shard_ranges`), and every
+  batch of QUERY_BATCH queries is searched against each shard by a worker. The workers map the index file
+  (`BlastDatabase.open`) instead of receiving a copy; an index that was not opened from a file is first
+  saved to a temporary one. The best `max_hsps` HSPs of each shard are merged with the same ordering as
+  `find_hsps` (score, then sequence and positions), so the result does not depend on the number of
+  workers or shards.
+
+  Args:
+    queries: Iterable of (name, sequence) tuples or of sequences (named by their position).
+    database: BlastDatabase indexed with words of length `w`.
+    w: The length of the words.
+    max_hsps: Number of HSPs reported per query (by default MAX_HSPS).
+    workers: Number of worker processes (by default os.cpu_count()); 1 searches in this process.
+    shards: Number of database shards (by default `workers`).
+    **options: Other arguments of `find_hsps`. A `stats` dictionary receives the counters of all the shards.
+
+  Yields:
+    One tuple per HSP with the columns of TABULAR_FIELDS, query by query, best HSP first.
+  """
+  if workers is None:
+    workers = os.cpu_count() or 1
+  if workers == 1:
+    yield from batch_search(queries, database, w, max_hsps, **options)
+    return
+  stats = options.pop("stats", None)
+  ranges = database.shard_ranges(shards or workers)
+
+  with tempfile.TemporaryDirectory() as folder:
+    path = database.path
+    if path is None:
+      path = os.path.join(folder, "database.idx")
+      database.save(path)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_database, initargs=(path,)) as pool:
+      records = (record if isinstance(record, tuple) else (str(i), record) for i, record in enumerate(queries))
+      while True:
+        batch = list(islice(records, QUERY_BATCH))
+        if not batch:
+          break
+        sequences = [query for _, query in batch]
+        futures = [pool.submit(_search_shard, sequences, shard, w, max_hsps, options) for shard in ranges]
+        results = [future.result() for future in futures]
+        for i, (name, _) in enumerate(batch):
+          merged = heapq.nsmallest(max_hsps, (hsp for shard_hsps, _ in results for hsp in shard_hsps[i]),
+                                   key=_hsp_order)
+          for hsp in merged:
+            yield tabular_row(name, database.names[hsp.sequence_id], hsp)
+        if stats is not None:
+          for _, shard_stats in results:
+            for key, value in shard_stats.items():
+              stats[key] = stats.get(key, 0) + value
+
+_worker_database = None  # Index mapped by the pool worker, opened once by `_open_worker_database`.
+
+def _open_worker_database(path):
+  """
+  Pool initializer: maps the index file once per worker.
+  """
+  global _worker_database
+  _worker_database = BlastDatabase.open(path)
+
+def _search_shard(queries, shard, w, max_hsps, options):
+  """
+  Searches a batch of queries against one shard in a pool worker.
+
+  Returns:
+    A tuple (HSP lists, one per query, stats of the shard).
+  """
+  database = _worker_database.shard(*shard)
+  stats = {}
+  return [find_hsps(query, database, w, stats=stats, max_hsps=max_hsps, **options) for query in queries], stats
+
+def tabular_row(query_name, subject_name, hsp):
+  """
+  Describes an HSP with the columns of TABULAR_FIELDS.
+
+  Args:
+    query_name: Name of the query.
+    subject_name: Name of the database sequence.
+    hsp: The HSP.
+
+  Returns:
+    A tuple (qseqid, sseqid, pident, length, mismatch, gapopen, qstart, qend, sstart, send, evalue, bitscore).
+  """
+  aligned = list(zip(hsp.aligned_query, hsp.aligned_db))
+  identical = sum(x == y for x, y in aligned)
+  mismatches = sum(x != y and "-" not in (x, y) for x, y in aligned)
+  gap_opens = sum(("-" in pair) and (i == 0 or aligned[i - 1][pair.index("-")] != "-")
+                  for i, pair in enumerate(aligned))
+  pident = round(100 * identical / len(aligned), 2) if aligned else 0.0
+  return (query_name, subject_name, pident, len(aligned), mismatches, gap_opens,
+          hsp.query_start + 1, hsp.query_end, hsp.db_start + 1, hsp.db_end, hsp.evalue, hsp.bitscore)
+
+def format_tabular(row):
+  """
+  Formats a row of `batch_search` as one tab-separated line (without the newline), with "NA" for unknown
+  E-values and bit scores.
+  """
+  formats = {"pident": "{:.2f}", "evalue": "{:.2g}", "bitscore": "{:.1f}"}
+  return "\t".join("NA" if value is None else formats.get(field, "{}").format(value)
+                   for field, value in zip(TABULAR_FIELDS, row))
+
+class BlastSearcher:
+  """
+  Search settings and database, set once and reused for many queries.
+
+  A BlastSearcher holds everything a search depends on (word length, substitution matrix, index and
+  thresholds), so searches with different settings can run side by side in one process or in workers
+  without sharing module state.
+
+  Args:
+    database: BlastDatabase, path of an index file written by `BlastDatabase.save` or of a FASTA file,
+              or a list of (name, sequence) tuples or sequences.
+    w: The length of the words, by default the one of a BlastDatabase or index file, otherwise 3.
+    T, A, X, cutoff, gapped, gap_open, gap_extend, band, matrix, evalue: Search settings, see `find_hsps`.
+    max_hsps: Number of HSPs reported per query (by default MAX_HSPS).
+
+  Raises:
+    ValueError: If `w` differs from the word length of the given index.
+  """
+
+  def __init__(self, database, w=None, T=None, A=None, X=XDROP, cutoff=GAP_TRIGGER, gapped=True,
+               gap_open=-11, gap_extend=-1, band=GAPPED_BAND, matrix=None, evalue=None, max_hsps=MAX_HSPS):
+    if isinstance(database, str):
+      with open(database, "rb") as handle:
+        is_index = handle.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+      database = BlastDatabase.open(database) if is_index else BlastDatabase.from_fasta(database, w or 3)
+    elif not isinstance(database, BlastDatabase):
+      database = BlastDatabase(database, w or 3)
+    if w is not None and w != database.w:
+      raise ValueError(f"The database is indexed with words of length {database.w}, got w={w}")
+    self.database = database
+    self.w = database.w
+    self.matrix = get_matrix(matrix)
+    self.max_hsps = max_hsps
+    self.options = dict(T=T, A=A, X=X, cutoff=cutoff, gapped=gapped, gap_open=gap_open,
+                        gap_extend=gap_extend, band=band, matrix=self.matrix, evalue=evalue)
+
+  def __repr__(self):
+    return f"BlastSearcher({len(self.database)} sequences, w={self.w}, matrix={self.matrix.name!r})"
+
+  def search(self, query, stats=None):
+    """
+    Finds the best HSPs of one query (see `find_hsps`).
+
+    Args:
+      query: The query sequence.
+      stats: Optional dictionary that receives the counters of the search.
+
+    Returns:
+      A list of at most `max_hsps` HSP tuples, best first.
+    """
+    return find_hsps(query, self.database, self.w, stats=stats, max_hsps=self.max_hsps, **self.options)
+
+  def search_many(self, queries, workers=1, shards=None, stats=None):
+    """
+    Searches many queries, yielding tabular rows (see `batch_search`, and `parallel_search` when
+    `workers` is not 1).
+
+    Args:
+      queries: Iterable of (name, sequence) tuples or of sequences.
+      workers: Number of worker processes (by default 1, None for os.cpu_count()).
+      shards: Number of database shards of the parallel search.
+      stats: Optional dictionary that receives the counters of the search.
+
+    Yields:
+      One tuple per HSP with the columns of TABULAR_FIELDS.
+    """
+    if workers == 1:
+      return batch_search(queries, self.database, self.w, self.max_hsps, stats=stats, **self.options)
+    return parallel_search(queries, self.database, self.w, self.max_hsps, workers, shards, stats=stats,
+                           **self.options)
+
+  def best_hit(self, query):
+    """
+    `best_hit` of the query against the database, with the X-drop setting of the searcher.
+    """
+    return best_hit(query, self.database, self.w, self.options["A"], X=self.options["X"], matrix=self.matrix)
+
+def main(argv=None):
+  """
+  Command line entry point (`python -m src.Blast`).
+
+  Without arguments, runs the example of the basic word-matching functions. With a query FASTA file and
+  a database (FASTA or index file), prints the tabular rows of the search; with --save, only writes the
+  index of the database FASTA file.
+  """
+  parser = argparse.ArgumentParser(prog="python -m src.Blast", description="Basic version of BLAST.")
+  parser.add_argument("queries", nargs="?", help="FASTA file of query sequences")
+  parser.add_argument("database", nargs="?", help="FASTA file or index file of subject sequences")
+  parser.add_argument("-w", type=int, default=None, help="word length (default 3, or the one of the index)")
+  parser.add_argument("-T", type=int, default=None, help="neighborhood word threshold")
+  parser.add_argument("-A", type=int, default=None, help="two-hit window")
+  parser.add_argument("--matrix", default=None, help="substitution matrix name (default BLOSUM62)")
+  parser.add_argument("--evalue", type=float, default=None, help="maximum E-value")
+  parser.add_argument("--max-hsps", type=int, default=MAX_HSPS, help="HSPs reported per query")
+  parser.add_argument("--workers", type=int, default=1, help="worker processes")
+  parser.add_argument("--save", metavar="INDEX", help="write the index of the database FASTA file and exit")
+  args = parser.parse_args(argv)
+
+  if args.queries is None:
+    query = "AATATAT"
+    db_sequence = "AATATGTTATATAATAATATTT"
+    w = 3
+    print("Query Map:", query_map(query, w))
+    print("Hits:", hits(query_map(query, w), db_sequence))
+    best = best_hit(query, db_sequence, w)
+    print("Best Hit:", best)
+    return
+
+  if args.save:
+    BlastDatabase.from_fasta(args.database or args.queries, args.w or 3).save(args.save)
+    return
+  if args.database is None:
+    parser.error("a database is required")
+  searcher = BlastSearcher(args.database, args.w, T=args.T, A=args.A, matrix=args.matrix,
+                           evalue=args.evalue, max_hsps=args.max_hsps)
+  with open(args.queries) as handle:
+    for row in searcher.search_many(parse_fasta(handle), workers=args.workers):
+      print(format_tabular(row))
 
-print("Query Map:", query_map(query, w))
-print("Hits:", hits(query_map(query, w), db_sequence))
-best = best_hit(query, db_sequence, w)
-print("Best Hit:", best)
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,106 @@
+def read_fasta(path):
+    """
+    Reads the records of a FASTA file.
+
+    Arguments:
+    - path (str): Path of the FASTA file.
+
+    Returns:
+    - records (list): List of (name, sequence) tuples, in file order. The name is the header line
+      without the leading ">", and the sequence lines are joined without whitespace.
+
+    Raises:
+    - ValueError: If sequence data appears before the first header.
+    """
+    with open(path) as handle:
+        return list(parse_fasta(handle))
+
+
+def parse_fasta(lines):
+    """
+    Parses FASTA records from an iterable of lines (an open file or a list of strings).
+
+    Arguments:
+    - lines (iterable): Lines of FASTA text.
+
+    Yields:
+    - record (tuple): (name, sequence) for each record.
+
+    Raises:
+    - ValueError: If sequence data appears before the first header.
+    """
+    name, chunks = None, []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            if name is not None:
+                yield name, "".join(chunks)
+            name, chunks = line[1:].strip(), []
+        elif name is None:
+            raise ValueError("FASTA sequence data before the first '>' header")
+        else:
+            chunks.append(line)
+    if name is not None:
+        yield name, "".join(chunks)
+
+
+def parse_fasta_chunks(lines, chunk_size=1 << 20):
+    """
+    Parses FASTA records piece by piece, so that no whole sequence is held in memory.
+
+    Every record is cut into consecutive chunks of `chunk_size` residues (the last one may be shorter).
+    An open file is read with `readline(chunk_size)`, so even a sequence written on a single line is
+    read in bounded pieces; those pieces are joined back into lines by their trailing newline. The items
+    of any other iterable are complete lines, with or without the newline, as in `parse_fasta`.
+
+    Arguments:
+    - lines (file or iterable): An open FASTA file or an iterable of lines of FASTA text.
+    - chunk_size (int, optional): Number of residues per chunk (by default is 1 MiB).
+
+    Yields:
+    - chunk (tuple): (name, offset, sequence) with the record name, the position of the chunk in the record
+      and the residues of the chunk. Records with an empty sequence yield nothing.
+
+    Raises:
+    - ValueError: If sequence data appears before the first header, or chunk_size is not positive.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    pieces = hasattr(lines, "readline")  # Whether the items may be parts of lines
+    if pieces:
+        handle = lines
+        lines = iter(lambda: handle.readline(chunk_size), "")
+    name, header, chunks, size, offset = None, None, [], 0, 0
+    line_start = True
+    for line in lines:
+        starts_line, line_start = line_start, not pieces or line.endswith("\n")
+        if header is not None:  # Rest of a header longer than chunk_size
+            header.append(line)
+            line = ""
+        elif starts_line and line.startswith(">"):
+            if size:
+                yield name, offset, "".join(chunks)
+            header, chunks, size, offset = [line[1:]], [], 0, 0
+            line = ""
+        if header is not None:
+            if line_start:
+                name, header = "".join(header).strip(), None
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        if name is None:
+            raise ValueError("FASTA sequence data before the first '>' header")
+        chunks.append(line)
+        size += len(line)
+        while size >= chunk_size:
+            sequence = "".join(chunks)
+            yield name, offset, sequence[:chunk_size]
+            offset += chunk_size
+            chunks, size = [sequence[chunk_size:]], size - chunk_size
+    if header is not None:
+        name = "".join(header).strip()
+    if size:
+        yield name, offset, "".join(chunks)
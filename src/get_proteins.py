@@ -1,11 +1,28 @@
 # Constants for DNA processing
-from typing import List
-from src.table_amino import table
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.fasta import parse_fasta, parse_fasta_chunks
+from src.packed_dna import BASES, IUPAC_BASES, PackedDNA, encode_bases, iupac_masks
+from src.table_amino import GENETIC_CODES, codon_table, table
 
 CODON_LENGTH = 3  # Codon length for extraction.
 START_CODON = 'M'  # Start codon.
 STOP_CODON = '_'  # Stop codon.
 DNA_COMPLEMENTS = {"A": "T", "T": "A", "C": "G", "G": "C"}  # Base complement mapping.
+UNKNOWN_AMINO = 'X'  # Amino acid of codons with an ambiguous base or missing from the table.
+AMBIGUOUS_CODON = 64  # Codon index of codons with an ambiguous base, the last entry of a codon lookup.
+STANDARD_TABLE_ID = 1  # NCBI id of the standard genetic code, the one of `table`.
+STREAM_CHUNK_SIZE = 1 << 20  # Bases read at a time by `stream_proteins`.
+PROTEIN_BATCH_SIZE = 1 << 20  # Bases per worker task of `get_all_proteins_batch`; longer records are split.
+
+# A protein found by `stream_proteins`: record name, strand ('+' or '-'), start and end positions in the
+# record (stop codon included, on the forward strand for both strands) and the protein.
+ORF = namedtuple('ORF', ['record', 'strand', 'start', 'end', 'protein'])
 
 
 def get_complementary_character(base: str) -> str:
@@ -68,10 +85,11 @@ def translate_codons_to_protein(codon_list, codon_to_amino_table=None):
     The function then combines all the amino acids into a single string
     representing the resulting protein sequence.
 
-    :param codon_to_amino_table:
+    :param codon_to_amino_table: Dict from codon to amino acid (by default `table`,
+        see `table_amino.codon_table` for the other genetic codes).
     :param codon_list: A list of codons, where each codon is represented as
-        a string of three nucleotides. All codons must be valid and
-        recognized by the `CODON_TO_AMINO_TABLE`.
+        a string of three nucleotides. Codons that are not in the table
+        (lowercase, ambiguous bases) are translated by `translate_codon`.
     :type codon_list: list[str]
 
     :return: A string representing the translated protein sequence. Each
@@ -81,7 +99,29 @@ def translate_codons_to_protein(codon_list, codon_to_amino_table=None):
     """
     if codon_to_amino_table is None:
         codon_to_amino_table = table
-    return ''.join(codon_to_amino_table[codon] for codon in codon_list)
+    return ''.join(codon_to_amino_table[codon] if codon in codon_to_amino_table
+                   else translate_codon(codon, codon_to_amino_table) for codon in codon_list)
+
+
+def translate_codon(codon: str, codon_to_amino_table: Optional[Dict[str, str]] = None) -> str:
+    """
+    Translates one codon that may be lowercase, RNA or contain IUPAC ambiguity codes (e.g. 'N').
+
+    An ambiguous codon translates to the amino acid of all the codons it stands for when they agree
+    (GCN is always alanine), and to UNKNOWN_AMINO otherwise, as do invalid codons.
+
+    :param codon: A string of three nucleotides.
+    :param codon_to_amino_table: Dict from codon to amino acid (by default `table`).
+    :return: The single-letter amino acid.
+    """
+    if codon_to_amino_table is None:
+        codon_to_amino_table = table
+    bases = [IUPAC_BASES.get(base, '') for base in codon.upper()]
+    if len(bases) != CODON_LENGTH or not all(bases):
+        return UNKNOWN_AMINO
+    amino_acids = {codon_to_amino_table.get(first + second + third, UNKNOWN_AMINO)
+                   for first in bases[0] for second in bases[1] for third in bases[2]}
+    return amino_acids.pop() if len(amino_acids) == 1 else UNKNOWN_AMINO
 
 
 def process_stop_codon(proteins, current_protein, active):
@@ -94,27 +134,42 @@ def process_stop_codon(proteins, current_protein, active):
     return '', False
 
 
+def orf_bounds(amino_acid_sequence: Union[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locates the proteins of a translated frame with array searches instead of a scan per amino acid.
+
+    A protein starts at the first start codon ('M') after the previous stop codon (or the beginning) and
+    ends with the next stop codon ('_'); start codons inside a protein do not start another one, and a
+    protein without a stop codon is discarded, as in `extract_proteins`. All the stops are found at once,
+    then a binary search in the positions of the starts gives the first start of each stop-delimited
+    segment, so the work is linear in the length of the frame whatever the length of the proteins.
+
+    :param amino_acid_sequence: A translated frame, as a string or an array of ASCII codes.
+    :return: Two int arrays (starts, ends): protein i is `amino_acid_sequence[starts[i]:ends[i]]`,
+        stop codon included.
+    """
+    if isinstance(amino_acid_sequence, str):
+        amino_acid_sequence = np.frombuffer(amino_acid_sequence.encode('ascii', 'replace'), dtype=np.uint8)
+    stops = np.flatnonzero(amino_acid_sequence == ord(STOP_CODON))
+    starts = np.flatnonzero(amino_acid_sequence == ord(START_CODON))
+    segment_starts = np.concatenate([[0], stops + 1])[:-1]
+    first = np.searchsorted(starts, segment_starts)
+    found = first < len(starts)
+    found[found] = starts[first[found]] < stops[found]
+    return starts[first[found]], stops[found] + 1
+
+
 def extract_proteins(amino_acid_sequence: str) -> List[str]:
     """
     Extracts proteins from a sequence of amino acids using start ('M') and stop ('_') codons.
     Handles multiple proteins in the sequence, starting new ones when encountering 'M'
-    and ending at '_'.
+    and ending at '_'. The proteins are located by `orf_bounds` and cut out as slices.
 
     :param sequence: A string of amino acids (translated from codons).
     :return: A list of protein strings extracted from the sequence.
     """
-    inside_protein = False
-    proteins = []
-    current_protein = ''
-    for amino_acid in amino_acid_sequence:
-        if amino_acid == START_CODON:
-            inside_protein = True
-            current_protein += START_CODON
-        elif amino_acid == STOP_CODON:
-            current_protein, inside_protein = process_stop_codon(proteins, current_protein, inside_protein)
-        elif inside_protein:
-            current_protein += amino_acid
-    return proteins
+    starts, ends = orf_bounds(amino_acid_sequence)
+    return [amino_acid_sequence[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
 
 def get_six_orfs(dna: str) -> List[List[str]]:
     """
@@ -137,7 +192,206 @@ def get_six_orfs(dna: str) -> List[List[str]]:
     return get_three_orfs(dna) + get_three_orfs(rev_comp)
 
 
-def get_all_proteins(dna: str) -> List[str]:
+def codon_lookup(codon_to_amino_table: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """
+    Converts a codon table into a lookup array indexed by codon index (16 * a + 4 * b + c, with the base
+    codes A=0, C=1, G=2, T=3 of `src.packed_dna`).
+
+    :param codon_to_amino_table: Dict from codon to amino acid (by default `table`).
+    :return: A uint8 array of 65 ASCII amino acids: one per codon index, then UNKNOWN_AMINO at
+        AMBIGUOUS_CODON. Codons missing from the table also translate to UNKNOWN_AMINO.
+    """
+    if codon_to_amino_table is None:
+        codon_to_amino_table = table
+    lookup = np.full(AMBIGUOUS_CODON + 1, ord(UNKNOWN_AMINO), dtype=np.uint8)
+    for index in range(AMBIGUOUS_CODON):
+        codon = BASES[index >> 4] + BASES[(index >> 2) & 3] + BASES[index & 3]
+        if codon in codon_to_amino_table:
+            lookup[index] = ord(codon_to_amino_table[codon])
+    return lookup
+
+
+STANDARD_CODON_LOOKUP = codon_lookup(table)  # Lookup array of the standard code of `table`.
+# Lookup arrays of the NCBI genetic codes, by table id.
+GENETIC_CODE_LOOKUPS = {table_id: codon_lookup(codon_table(table_id)) for table_id in GENETIC_CODES}
+
+_IUPAC_COMPLEMENT = np.array([int(f'{mask:04b}'[::-1], 2) for mask in range(16)], dtype=np.uint16)  # Bit reversal
+_MASK_CODES = [np.array([code for code in range(4) if mask >> code & 1]) for mask in range(16)]
+
+
+def ambiguous_codon_lookup(lookup: np.ndarray) -> np.ndarray:
+    """
+    Extends a codon lookup to codons of IUPAC codes, indexed by (m1 << 8) | (m2 << 4) | m3 with the masks
+    of `packed_dna.iupac_masks`.
+
+    :param lookup: A codon lookup array of `codon_lookup`.
+    :return: A uint8 array of 4096 ASCII amino acids: the amino acid of all the codons a codon of IUPAC codes
+        stands for when they agree, UNKNOWN_AMINO otherwise.
+    """
+    amino_acids = lookup[:AMBIGUOUS_CODON].reshape(4, 4, 4)
+    result = np.full(1 << 12, ord(UNKNOWN_AMINO), dtype=np.uint8)
+    for first in range(1, 16):
+        for second in range(1, 16):
+            for third in range(1, 16):
+                values = amino_acids[np.ix_(_MASK_CODES[first], _MASK_CODES[second], _MASK_CODES[third])]
+                if (values == values.flat[0]).all():
+                    result[(first << 8) | (second << 4) | third] = values.flat[0]
+    return result
+
+
+class _Translation:
+    """
+    Lookup arrays of one genetic code: `lookup` for the codons of A, C, G and T, and the lookup of
+    `ambiguous_codon_lookup`, only built when a codon with an ambiguous base is met.
+    """
+
+    def __init__(self, lookup: np.ndarray):
+        self.lookup = lookup
+        self._ambiguous_lookup = None
+
+    @property
+    def ambiguous_lookup(self) -> np.ndarray:
+        if self._ambiguous_lookup is None:
+            self._ambiguous_lookup = ambiguous_codon_lookup(self.lookup)
+        return self._ambiguous_lookup
+
+
+_translations = {}  # _Translation of each genetic code used, keyed by table id.
+
+
+def _translation(codon_to_amino_table: Optional[Dict[str, str]] = None,
+                 table_id: int = STANDARD_TABLE_ID) -> _Translation:
+    """
+    Resolves the `codon_to_amino_table` and `table_id` arguments: an explicit table wins over the id.
+
+    :raises ValueError: If there is no genetic code with this id.
+    """
+    if codon_to_amino_table is not None:
+        return _Translation(codon_lookup(codon_to_amino_table))
+    if table_id not in _translations:
+        if table_id not in GENETIC_CODE_LOOKUPS:
+            raise ValueError(f"Unknown genetic code {table_id!r}; known ids: {sorted(GENETIC_CODES)}")
+        _translations[table_id] = _Translation(GENETIC_CODE_LOOKUPS[table_id])
+    return _translations[table_id]
+
+
+def _encode(dna: Union[str, PackedDNA]) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Base codes, ambiguity flags and, when some base is ambiguous, IUPAC masks of a DNA sequence (the
+    ambiguous bases of a PackedDNA are read as N).
+    """
+    if isinstance(dna, PackedDNA):
+        codes, ambiguous = dna.codes(), dna.ambiguous()
+        masks = np.where(ambiguous, 15, 1 << codes).astype(np.uint8) if ambiguous.any() else None
+    else:
+        codes, ambiguous = encode_bases(dna)
+        masks = iupac_masks(dna) if ambiguous.any() else None
+    return codes, ambiguous, masks
+
+
+def _translate_codons(codes: np.ndarray, ambiguous: np.ndarray, masks: Optional[np.ndarray],
+                      translation: _Translation) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Translates the codon starting at every position of a sequence, and its reverse complement.
+
+    :return: Two uint8 arrays of ASCII amino acids, one entry per position with a complete codon: forward
+        frame f is `forward[f::3]`, and reverse[i] is the amino acid of the reverse complement of the codon
+        at position i.
+    """
+    indices = _codon_indices(codes, ambiguous)
+    forward = translation.lookup[indices]
+    reverse = translation.lookup[_reverse_codon_indices(codes, indices)]
+    positions = np.flatnonzero(indices == AMBIGUOUS_CODON)
+    if len(positions):
+        first, second, third = (masks[positions + i].astype(np.uint16) for i in range(CODON_LENGTH))
+        ambiguous_lookup = translation.ambiguous_lookup
+        forward[positions] = ambiguous_lookup[(first << 8) | (second << 4) | third]
+        reverse[positions] = ambiguous_lookup[(_IUPAC_COMPLEMENT[third] << 8) | (_IUPAC_COMPLEMENT[second] << 4)
+                                              | _IUPAC_COMPLEMENT[first]]
+    return forward, reverse
+
+
+def _codon_indices(codes: np.ndarray, ambiguous: np.ndarray) -> np.ndarray:
+    """
+    Codon index of the codon starting at every position of a strand (AMBIGUOUS_CODON if it has an
+    ambiguous base); frame f is then `indices[f::3]`.
+    """
+    indices = (codes[:-2] << 4) | (codes[1:-1] << 2) | codes[2:]
+    if ambiguous.any():
+        indices[ambiguous[:-2] | ambiguous[1:-1] | ambiguous[2:]] = AMBIGUOUS_CODON
+    return indices
+
+
+def _reverse_codon_indices(codes: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """
+    Codon index of the reverse complement of the codon starting at every position, from the forward
+    `indices` of `_codon_indices` for the ambiguous codons.
+    """
+    reverse_indices = ((3 - codes[2:]) << 4) | ((3 - codes[1:-1]) << 2) | (3 - codes[:-2])
+    reverse_indices[indices == AMBIGUOUS_CODON] = AMBIGUOUS_CODON
+    return reverse_indices
+
+
+def translate_six_frames(dna: Union[str, PackedDNA], codon_to_amino_table: Optional[Dict[str, str]] = None,
+                         table_id: int = STANDARD_TABLE_ID) -> List[str]:
+    """
+    Translates the six reading frames of a DNA sequence with array operations, in the order of
+    `get_six_orfs`: frames 0, 1 and 2 of the sequence, then of its reverse complement.
+
+    The bases are converted to integer codes once, the codon index of every position of each strand is
+    computed with shifts over the whole array, and each frame is translated with one lookup into the
+    64-entry amino acid array of the genetic code, with no per-codon string or dict work. Codons with an
+    ambiguous base (e.g. 'N') are looked up in the 4096-entry array of `ambiguous_codon_lookup`, so they
+    translate like `translate_codon`.
+
+    :param dna: The DNA sequence, as a string (upper or lower case) or a PackedDNA.
+    :param codon_to_amino_table: Dict from codon to amino acid (by default the code of `table_id`).
+    :param table_id: NCBI genetic code (see `table_amino.GENETIC_CODES`), by default the standard code.
+    :return: A list of the six translated frames.
+    :raises ValueError: If the sequence has characters that are not bases, or the genetic code is unknown.
+    """
+    frames = _translated_frames(dna, _translation(codon_to_amino_table, table_id))
+    return [frame.tobytes().decode('ascii') for frame in frames]
+
+
+def _translated_frames(dna: Union[str, PackedDNA], translation: _Translation):
+    """
+    Yields the six translated frames of `translate_six_frames` as uint8 arrays of ASCII amino acids.
+    """
+    forward, reverse = _translate_codons(*_encode(dna), translation)
+    for frame in range(CODON_LENGTH):
+        yield forward[frame::CODON_LENGTH]
+    reverse = reverse[::-1]  # Reading order of the reverse complement
+    for frame in range(CODON_LENGTH):
+        yield reverse[frame::CODON_LENGTH]
+
+
+def orf_coordinates(dna: Union[str, PackedDNA], codon_to_amino_table: Optional[Dict[str, str]] = None,
+                    table_id: int = STANDARD_TABLE_ID) -> List[Tuple[int, int, int]]:
+    """
+    Locates the proteins of the six reading frames of a DNA sequence without building any string.
+
+    :param dna: The DNA sequence, as a string or a PackedDNA.
+    :param codon_to_amino_table: Dict from codon to amino acid (by default the code of `table_id`).
+    :param table_id: NCBI genetic code, by default the standard code.
+    :return: A list of (frame, start, end) tuples, by frame and then by position. Frames are numbered
+        0 to 5 as in `get_six_orfs` (3 to 5 on the reverse complement). start and end are positions in
+        `dna`, stop codon included: the protein is the translation of `dna[start:end]` for frames 0 to 2
+        and of the reverse complement of `dna[start:end]` for frames 3 to 5.
+    """
+    length = len(dna)
+    coordinates = []
+    for frame, amino_acids in enumerate(_translated_frames(dna, _translation(codon_to_amino_table, table_id))):
+        offset = frame % CODON_LENGTH
+        starts, ends = orf_bounds(amino_acids)
+        starts, ends = offset + CODON_LENGTH * starts, offset + CODON_LENGTH * ends
+        if frame >= CODON_LENGTH:
+            starts, ends = (length - ends)[::-1], (length - starts)[::-1]
+        coordinates.extend((frame, start, end) for start, end in zip(starts.tolist(), ends.tolist()))
+    return coordinates
+
+
+def get_all_proteins(dna: str, table_id: int = STANDARD_TABLE_ID) -> List[str]:
     """
     Extracts and returns a sorted list of unique proteins encoded in all six reading frames of a DNA sequence.
     The proteins are translated from open reading frames (ORFs). The results are sorted first by descending
@@ -145,16 +399,293 @@ def get_all_proteins(dna: str) -> List[str]:
 
     :param dna: A DNA sequence provided as a string composed of characters A, T, G, and C.
     :type dna: str
+    :param table_id: NCBI genetic code used for translation (see `table_amino.GENETIC_CODES`), by default
+        the standard code; e.g. 2 for vertebrate mitochondria or 11 for bacteria.
+    :type table_id: int
 
     :return: A sorted list of unique protein strings, ordered by descending length, then lexicographically.
     :rtype: list[str]
     """
 
-    orfs = [translate_codons_to_protein(orf) for orf in get_six_orfs(dna)]
+    orfs = translate_six_frames(dna, table_id=table_id)
     protein_orfs = [extract_proteins(orf) for orf in orfs]
     unique_proteins = {protein for proteins in protein_orfs for protein in proteins}
     return sorted(unique_proteins, key=lambda protein: (-len(protein), protein))
 
+class _ForwardFrame:
+    """
+    State of one forward reading frame of `stream_proteins`: the protein still open at the end of the
+    chunks read so far (its start codon was seen but not its stop codon).
+    """
+
+    def __init__(self):
+        self.start = None  # Position of the start codon of the open protein.
+        self.pieces = []  # Translation of the open protein so far, as ASCII bytes.
+
+    def scan(self, amino_acids: np.ndarray, first: int) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields the (start, end, protein) of the proteins that end in a chunk, amino_acids[k] being the
+        translation of the codon at position first + 3 * k.
+        """
+        stops = np.flatnonzero(amino_acids == ord(STOP_CODON))
+        begin = 0
+        if self.start is not None:
+            if not len(stops):
+                self.pieces.append(amino_acids.tobytes())
+                return
+            begin = int(stops[0]) + 1
+            self.pieces.append(amino_acids[:begin].tobytes())
+            yield self.start, first + CODON_LENGTH * begin, b''.join(self.pieces).decode('ascii')
+            self.start, self.pieces = None, []
+        starts, ends = orf_bounds(amino_acids[begin:])
+        for start, end in zip((starts + begin).tolist(), (ends + begin).tolist()):
+            protein = amino_acids[start:end].tobytes().decode('ascii')
+            yield first + CODON_LENGTH * start, first + CODON_LENGTH * end, protein
+        tail = max(int(stops[-1]) + 1, begin) if len(stops) else begin
+        open_starts = np.flatnonzero(amino_acids[tail:] == ord(START_CODON))
+        if len(open_starts):
+            start = tail + int(open_starts[0])
+            self.start, self.pieces = first + CODON_LENGTH * start, [amino_acids[start:].tobytes()]
+
+
+class _ReverseFrame:
+    """
+    State of one reverse complement reading frame of `stream_proteins`, read in the forward direction.
+
+    A reverse protein ends (stop codon) at its lowest position and starts at the last start codon before
+    the next stop codon, or before the end of the record, so each protein is only known when that next
+    stop is read. The frame keeps the translation since the last stop codon and the rightmost start codon.
+    """
+
+    def __init__(self):
+        self.stop = None  # Position of the last stop codon read.
+        self.pieces = []  # Translation since that stop codon (in forward order), as ASCII bytes.
+        self.last_start = None  # Position of the rightmost start codon after that stop codon.
+
+    def _protein(self, end: int) -> Tuple[int, int, str]:
+        codons = (end - self.stop) // CODON_LENGTH
+        return self.stop, end, b''.join(self.pieces)[:codons][::-1].decode('ascii')
+
+    def scan(self, amino_acids: np.ndarray, first: int) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields the (start, end, protein) of the proteins closed by a stop codon of a chunk, with the
+        positions of `_ForwardFrame.scan`.
+        """
+        stops = np.flatnonzero(amino_acids == ord(STOP_CODON))
+        starts = np.flatnonzero(amino_acids == ord(START_CODON))
+        if not len(stops):
+            if self.stop is not None:
+                self.pieces.append(amino_acids.tobytes())
+                if len(starts):
+                    self.last_start = first + CODON_LENGTH * int(starts[-1])
+            return
+        if self.stop is not None:
+            before = np.searchsorted(starts, stops[0])
+            if before:
+                self.last_start = first + CODON_LENGTH * int(starts[before - 1])
+            if self.last_start is not None:
+                self.pieces.append(amino_acids[:stops[0]].tobytes())
+                yield self._protein(self.last_start + CODON_LENGTH)
+        last = np.searchsorted(starts, stops[1:]) - 1  # Rightmost start codon before each later stop codon
+        found = last >= 0
+        found[found] = starts[last[found]] > stops[:-1][found]
+        for stop, start in zip(stops[:-1][found].tolist(), starts[last[found]].tolist()):
+            protein = amino_acids[stop:start + 1][::-1].tobytes().decode('ascii')
+            yield first + CODON_LENGTH * stop, first + CODON_LENGTH * (start + 1), protein
+        stop = int(stops[-1])
+        after = starts[starts > stop]
+        self.stop, self.pieces = first + CODON_LENGTH * stop, [amino_acids[stop:].tobytes()]
+        self.last_start = first + CODON_LENGTH * int(after[-1]) if len(after) else None
+
+    def finish(self) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields the protein that starts at the rightmost start codon after the last stop codon, the first
+        one of the reverse complement.
+        """
+        if self.stop is not None and self.last_start is not None:
+            yield self._protein(self.last_start + CODON_LENGTH)
+
+
+def stream_proteins(fasta, chunk_size: int = STREAM_CHUNK_SIZE, codon_to_amino_table: Optional[Dict[str, str]] = None,
+                    table_id: int = STANDARD_TABLE_ID) -> Iterator[ORF]:
+    """
+    Finds the proteins of the six reading frames of every record of a FASTA file, reading it in chunks.
+
+    Each chunk is translated like in `translate_six_frames`, with the last two bases carried over to the
+    next chunk so that the codons across the boundary are read once, in their frame. Each of the six frames
+    keeps its open protein across chunks, so memory depends on the chunk size and the length of the
+    proteins, not on the length of the sequences. The proteins are those of `orf_coordinates` and
+    `get_all_proteins`, yielded as soon as they are complete rather than sorted; the reverse
+    complement frame of an ORF can be recovered from its end and the record length.
+
+    :param fasta: Path of a FASTA file, an open FASTA file or an iterable of lines of FASTA text.
+    :param chunk_size: Number of bases read at a time.
+    :param codon_to_amino_table: Dict from codon to amino acid (by default the code of `table_id`).
+    :param table_id: NCBI genetic code, by default the standard code.
+    :return: An iterator of ORF tuples.
+    """
+    if isinstance(fasta, str):
+        with open(fasta) as handle:
+            yield from stream_proteins(handle, chunk_size, codon_to_amino_table, table_id)
+        return
+    translation = _translation(codon_to_amino_table, table_id)
+    name, reverse = None, []
+    for record, offset, chunk in parse_fasta_chunks(fasta, chunk_size):
+        if offset == 0:
+            for frame in reverse:
+                yield from (ORF(name, '-', *orf) for orf in frame.finish())
+            name = record
+            forward = [_ForwardFrame() for _ in range(CODON_LENGTH)]
+            reverse = [_ReverseFrame() for _ in range(CODON_LENGTH)]
+            carry = ''
+        position, chunk = offset - len(carry), carry + chunk
+        forward_amino_acids, reverse_amino_acids = _translate_codons(*_encode(chunk), translation)
+        for phase in range(CODON_LENGTH):
+            local = (phase - position) % CODON_LENGTH
+            first = position + local
+            for orf in forward[phase].scan(forward_amino_acids[local::CODON_LENGTH], first):
+                yield ORF(name, '+', *orf)
+            for orf in reverse[phase].scan(reverse_amino_acids[local::CODON_LENGTH], first):
+                yield ORF(name, '-', *orf)
+        carry = chunk[-(CODON_LENGTH - 1):]
+    for frame in reverse:
+        yield from (ORF(name, '-', *orf) for orf in frame.finish())
+
+
+def get_all_proteins_batch(fasta, workers: Optional[int] = None, batch_size: int = PROTEIN_BATCH_SIZE,
+                           codon_to_amino_table: Optional[Dict[str, str]] = None,
+                           table_id: int = STANDARD_TABLE_ID) -> Iterator[Tuple[str, List[str]]]:
+    """
+    `get_all_proteins` for every record of a FASTA file, over a pool of worker processes.
+
+    Records are read lazily and sent to the workers in tasks of about `batch_size` bases; records longer
+    than that are split into pieces at codon boundaries. A worker translates each piece in the six frames
+    and returns the proteins that lie inside it, plus, per frame, the translation before its first and
+    after its last stop codon. The proteins that cross pieces are completed from these ends, so the result
+    for a record does not depend on how it was split.
+
+    :param fasta: Path of a FASTA file, or an iterable of (name, sequence) tuples such as `parse_fasta`.
+    :param workers: Number of worker processes (by default os.cpu_count()); 1 works in this process.
+    :param batch_size: Number of bases per worker task, and longest record translated in one piece.
+    :param codon_to_amino_table: Dict from codon to amino acid (by default the code of `table_id`).
+    :param table_id: NCBI genetic code, by default the standard code.
+    :return: An iterator of (name, proteins) in the order of the records, with the unique proteins of each
+        record sorted like `get_all_proteins` (by descending length, then lexicographically).
+    """
+    if isinstance(fasta, str):
+        with open(fasta) as handle:
+            yield from get_all_proteins_batch(parse_fasta(handle), workers, batch_size, codon_to_amino_table,
+                                              table_id)
+        return
+    _translation(codon_to_amino_table, table_id)  # Unknown genetic codes fail here rather than in a worker
+    if workers is None:
+        workers = os.cpu_count() or 1
+    piece_size = max(batch_size - batch_size % CODON_LENGTH, CODON_LENGTH)
+    tasks = _protein_tasks(fasta, piece_size)
+    pieces = []
+    for piece in _run_protein_tasks(tasks, workers, (codon_to_amino_table, table_id)):
+        pieces.append(piece)
+        name, last = piece[0], piece[1]
+        if last:
+            proteins = _merge_pieces(pieces)
+            pieces = []
+            yield name, sorted(proteins, key=lambda protein: (-len(protein), protein))
+
+
+def _protein_tasks(records, piece_size: int) -> Iterator[List[Tuple[str, bool, str]]]:
+    """
+    Groups the pieces of the records into tasks of about `piece_size` bases. A piece is (name, last, dna),
+    where `last` marks the last piece of a record, and dna overlaps the next piece by two bases so that the
+    codons starting in the piece are complete.
+    """
+    task, size = [], 0
+    for name, dna in records:
+        start = 0
+        while True:
+            end = start + piece_size
+            task.append((name, end >= len(dna), dna[start:end + CODON_LENGTH - 1]))
+            size += min(end, len(dna)) - start
+            if size >= piece_size:
+                yield task
+                task, size = [], 0
+            if end >= len(dna):
+                break
+            start = end
+    if task:
+        yield task
+
+
+def _run_protein_tasks(tasks, workers: int, genetic_code: Tuple[Optional[Dict[str, str]], int]):
+    """
+    Runs `_piece_proteins` on every task, in this process or in a pool with at most two tasks per worker
+    in flight, and yields the piece results in order.
+    """
+    if workers == 1:
+        for task in tasks:
+            yield from _piece_proteins(task, genetic_code)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_piece_proteins, task, genetic_code))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _piece_proteins(task: List[Tuple[str, bool, str]], genetic_code: Tuple[Optional[Dict[str, str]], int]) -> list:
+    """
+    Translates the pieces of a task in a pool worker, with the genetic code given as
+    (codon_to_amino_table, table_id).
+
+    Each piece gives (name, last, proteins, ends): the set of proteins between two stop codons of the
+    piece, and for each of the six frames, in reading order (backwards for the reverse complement), the
+    translation up to its first stop codon (None without stop codon) and after its last one, from the
+    first start codon on (the whole translation without stop codon).
+    """
+    translation = _translation(*genetic_code)
+    results = []
+    for name, last, dna in task:
+        forward, reverse = _translate_codons(*_encode(dna), translation)
+        proteins, ends = set(), []
+        frames = [forward[frame::CODON_LENGTH] for frame in range(CODON_LENGTH)]
+        frames += [reverse[frame::CODON_LENGTH][::-1] for frame in range(CODON_LENGTH)]
+        for amino_acids in frames:
+            text = amino_acids.tobytes().decode('ascii')
+            first_stop, last_stop = text.find(STOP_CODON), text.rfind(STOP_CODON)
+            if first_stop < 0:
+                ends.append((None, text))
+                continue
+            proteins.update(extract_proteins(text[first_stop + 1:last_stop + 1]))
+            open_start = text.find(START_CODON, last_stop + 1)
+            ends.append((text[:first_stop + 1], text[open_start:] if open_start >= 0 else ''))
+        results.append((name, last, proteins, ends))
+    return results
+
+
+def _merge_pieces(pieces: list) -> set:
+    """
+    Joins the results of `_piece_proteins` for the pieces of one record: the proteins inside the pieces,
+    and for each frame the proteins across pieces, read from the ends of the pieces in reading order.
+    """
+    proteins = set().union(*(piece[2] for piece in pieces))
+    for frame in range(2 * CODON_LENGTH):
+        ordered = pieces if frame < CODON_LENGTH else pieces[::-1]
+        carry = ''
+        for piece in ordered:
+            head, tail = piece[3][frame]
+            if head is None:
+                if START_CODON not in carry:
+                    start = tail.find(START_CODON)
+                    carry, tail = '', tail[start:] if start >= 0 else ''
+                carry += tail
+            else:
+                proteins.update(extract_proteins(carry + head))
+                carry = tail
+    return proteins
+
+
 # Main testing block
 if __name__ == '__main__':
     # Sample DNA sequence for testing
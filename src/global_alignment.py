@@ -1,8 +1,14 @@
-from src.my_blosum import Blosum62
+import numpy as np
+from src.my_blosum import Blosum62, get_matrix
+from src.query_profile import QueryProfile
 from pprint import pprint
 
 blosum = Blosum62()
 
+ENGINES = ("python", "rows", "wavefront")  # Available engines for filling the scoring matrix.
+HIRSCHBERG_CUTOFF = 4096  # Sub-problems with at most this many cells are solved with the full matrix.
+MIN_BAND = 8  # Smallest band margin used by global_banded when no band is given.
+
 def subst(x, y):
     """
     Substitution function that returns the substitution score for characters x and y
@@ -10,34 +16,156 @@ def subst(x, y):
     """
     return blosum.subst(x, y)
 
-def global_score(s1, s2, g=-8):
+def encode(sequence, matrix=None):
+    """
+    Encodes a sequence as an array of indices into the dense substitution table (`blosum.matrix` by default).
+
+    Arguments:
+    - sequence (str): Sequence to encode.
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - codes (numpy.ndarray): One integer index per residue.
+
+    Raises:
+    - KeyError: If a residue is not part of the matrix alphabet (same as `subst`).
+    """
+    return get_matrix(matrix).encode(sequence)
+
+def score_table(s1, s2, matrix=None):
+    """
+    Encodes a pair of sequences for table lookups of their substitution scores.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence, or the precomputed profile of the first sequence.
+    - s2 (str): Second sequence.
+    - matrix (optional): Substitution matrix, its name or None for BLOSUM62. A QueryProfile always
+      uses the matrix it was built with.
+
+    Returns:
+    - table (numpy.ndarray): Score table, the dense substitution matrix or the rows of the profile.
+    - codes1 (numpy.ndarray): Row of the table for each residue of s1.
+    - codes2 (numpy.ndarray): Column of the table for each residue of s2.
+      table[codes1[i], codes2[j]] is the score of s1[i] against s2[j].
+    """
+    if isinstance(s1, QueryProfile):
+        return s1.scores, np.arange(len(s1)), s1.encode(s2)
+    matrix = get_matrix(matrix)
+    return matrix.matrix, matrix.encode(s1), matrix.encode(s2)
+
+def score_rows(s1, s2, matrix=None):
+    """
+    Yields, for each residue of s1, the list of its substitution scores against every residue of s2.
+    With a QueryProfile the rows come from the profile; with a string every cell uses `subst`.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence, or the precomputed profile of the first sequence.
+    - s2 (str): Second sequence.
+    - matrix (optional): Substitution matrix, its name or None for BLOSUM62.
+    """
+    if isinstance(s1, QueryProfile):
+        codes2 = s1.encode(s2)
+        for row in s1.scores:
+            yield row[codes2].tolist()
+    else:
+        cell = subst if matrix is None else get_matrix(matrix).subst
+        for x in s1:
+            yield [cell(x, y) for y in s2]
+
+def substitution_array(s1, s2, matrix=None):
+    """
+    Builds the array of substitution scores for every pair of residues of s1 and s2.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence, or the precomputed profile of the first sequence.
+    - s2 (str): Second sequence.
+    - matrix (optional): Substitution matrix, its name or None for BLOSUM62.
+
+    Returns:
+    - scores (numpy.ndarray): Array of shape (len(s1), len(s2)) where scores[i][j] == subst(s1[i], s2[j]).
+    """
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    return table[codes1[:, None], codes2[None, :]]
+
+def global_score(s1, s2, g=-8, engine=None, matrix=None):
     """
     Implements the global alignment algorithm (Needleman-Wunsch) to find the best matching
     subsequence between s1 and s2.
     
     Arguments:
-    - s1 (str): First sequence to align.
+    - s1 (str or QueryProfile): First sequence to align, or its precomputed profile.
     - s2 (str): Second sequence to align.
     - g (int, optional): Gap penalty (by default is -8).
+    - engine (str, optional): Engine used to fill the full scoring matrix (see `global_matrix`).
+      By default only two rows are kept in memory (see `global_last_row`).
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
     
     Returns:
     - score (int): The final global alignment score.
     """
-    scoring_matrix = global_matrix(s1, s2, g)
+    if engine is None:
+        return int(global_last_row(s1, s2, g, matrix)[-1])
+    scoring_matrix = global_matrix(s1, s2, g, engine, matrix)
     return scoring_matrix[len(s1)][len(s2)]
 
-def global_matrix(s1, s2, g=-8):
+def global_last_row(s1, s2, g=-8, matrix=None):
+    """
+    Computes the last row of the Needleman-Wunsch scoring matrix keeping only two rows in memory,
+    so the memory used is O(len(s2)) instead of O(len(s1) * len(s2)).
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence to align, or its precomputed profile.
+    - s2 (str): Second sequence to align.
+    - g (int, optional): Gap penalty (by default is -8).
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - row (numpy.ndarray): The row scoring_matrix[len(s1)], i.e. the global scores of s1
+      against every prefix of s2.
+    """
+    m, n = len(s1), len(s2)
+    dtype = np.result_type(np.int64, g)
+    if n == 0:
+        return np.array([m * g], dtype=dtype)
+
+    steps = np.arange(1, n + 1) * g
+    previous = np.arange(n + 1, dtype=dtype) * g
+    current = np.empty_like(previous)
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    for i, code in enumerate(codes1, start=1):
+        current[0] = i * g
+        best = np.maximum(previous[:-1] + table[code, codes2], previous[1:] + g)
+        running = np.maximum.accumulate(best - steps)
+        current[1:] = np.maximum(running, current[0]) + steps
+        previous, current = current, previous
+
+    return previous
+
+def global_matrix(s1, s2, g=-8, engine="python", matrix=None):
     """
     Implements the global alignment algorithm (Needleman-Wunsch) to compute the scoring matrix.
     
     Arguments:
-    - s1 (str): First sequence to align.
+    - s1 (str or QueryProfile): First sequence to align, or its precomputed profile.
     - s2 (str): Second sequence to align.
     - g (int, optional): Gap penalty (by default is -8).
+    - engine (str, optional): How the matrix is filled (by default is "python"):
+        - "python": cell by cell with the `subst` function (or the rows of the QueryProfile).
+        - "rows": NumPy, one vectorized update per row of the matrix.
+        - "wavefront": NumPy, one vectorized update per anti-diagonal of the matrix.
+      All engines return exactly the same matrix.
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
     
     Returns:
     - matrix (list of lists): The final scoring matrix.
     """
+    if engine == "rows":
+        return _global_matrix_rows(s1, s2, g, matrix).tolist()
+    if engine == "wavefront":
+        return _global_matrix_wavefront(s1, s2, g, matrix).tolist()
+    if engine != "python":
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+
     m, n = len(s1), len(s2)
     scoring_matrix = [[0] * (n + 1) for _ in range(m + 1)]
 
@@ -48,24 +176,83 @@ def global_matrix(s1, s2, g=-8):
         scoring_matrix[0][j] = j * g
 
     # Fill the scoring matrix
-    for i in range(1, m + 1):
+    for i, row_scores in enumerate(score_rows(s1, s2, matrix), start=1):
         for j in range(1, n + 1):
-            match = scoring_matrix[i - 1][j - 1] + subst(s1[i - 1], s2[j - 1])
+            match = scoring_matrix[i - 1][j - 1] + row_scores[j - 1]
             delete = scoring_matrix[i - 1][j] + g
             insert = scoring_matrix[i][j - 1] + g
             scoring_matrix[i][j] = max(match, delete, insert)
 
     return scoring_matrix
 
-def align_sequences(scoring_matrix, s1, s2, g=-8):
+def _empty_matrix(m, n, g):
+    """
+    Allocates the (m+1) x (n+1) NumPy scoring matrix with the first row and column
+    initialized with gap penalties.
+    """
+    scoring_matrix = np.empty((m + 1, n + 1), dtype=np.result_type(np.int64, g))
+    scoring_matrix[0, :] = np.arange(n + 1) * g
+    scoring_matrix[:, 0] = np.arange(m + 1) * g
+    return scoring_matrix
+
+def _global_matrix_rows(s1, s2, g, matrix=None):
+    """
+    Fills the Needleman-Wunsch matrix one row at a time.
+
+    The match and delete moves only depend on the previous row, so they are computed for the
+    whole row at once. The insert move chains along the row:
+        H[i][j] = max(best[j], H[i][j-1] + g) = j*g + max(H[i][0], max(best[k] - k*g for k <= j))
+    which is a running maximum (np.maximum.accumulate) over the row.
+    """
+    m, n = len(s1), len(s2)
+    scoring_matrix = _empty_matrix(m, n, g)
+    if m == 0 or n == 0:
+        return scoring_matrix
+
+    scores = substitution_array(s1, s2, matrix)
+    steps = np.arange(1, n + 1) * g
+
+    for i in range(1, m + 1):
+        previous = scoring_matrix[i - 1]
+        best = np.maximum(previous[:-1] + scores[i - 1], previous[1:] + g)
+        running = np.maximum.accumulate(best - steps)
+        scoring_matrix[i, 1:] = np.maximum(running, scoring_matrix[i, 0]) + steps
+
+    return scoring_matrix
+
+def _global_matrix_wavefront(s1, s2, g, matrix=None):
+    """
+    Fills the Needleman-Wunsch matrix one anti-diagonal (i + j == d) at a time.
+    Every cell of an anti-diagonal only depends on the two previous anti-diagonals,
+    so the whole diagonal is updated at once.
+    """
+    m, n = len(s1), len(s2)
+    scoring_matrix = _empty_matrix(m, n, g)
+    if m == 0 or n == 0:
+        return scoring_matrix
+
+    scores = substitution_array(s1, s2, matrix)
+
+    for d in range(2, m + n + 1):
+        i = np.arange(max(1, d - n), min(m, d - 1) + 1)
+        j = d - i
+        match = scoring_matrix[i - 1, j - 1] + scores[i - 1, j - 1]
+        delete = scoring_matrix[i - 1, j] + g
+        insert = scoring_matrix[i, j - 1] + g
+        scoring_matrix[i, j] = np.maximum(np.maximum(match, delete), insert)
+
+    return scoring_matrix
+
+def align_sequences(scoring_matrix, s1, s2, g=-8, matrix=None):
     """
     Reconstructs the optimal alignment from the scoring matrix.
 
     Arguments:
     - scoring_matrix (list of lists): The scoring matrix computed by the Needleman-Wunsch algorithm.
-    - s1 (str): First sequence.
+    - s1 (str or QueryProfile): First sequence, or its precomputed profile.
     - s2 (str): Second sequence.
     - g (int): Gap penalty.
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
 
     Returns:
     - aligned_s1 (str): Aligned version of s1.
@@ -73,9 +260,10 @@ def align_sequences(scoring_matrix, s1, s2, g=-8):
     """
     i, j = len(s1), len(s2)
     aligned_s1, aligned_s2 = [], []
+    table, codes1, codes2 = score_table(s1, s2, matrix)
 
     while i > 0 or j > 0:
-        if i > 0 and j > 0 and scoring_matrix[i][j] == scoring_matrix[i-1][j-1] + subst(s1[i-1], s2[j-1]):
+        if i > 0 and j > 0 and scoring_matrix[i][j] == scoring_matrix[i-1][j-1] + table[codes1[i-1], codes2[j-1]]:
             aligned_s1.append(s1[i-1])
             aligned_s2.append(s2[j-1])
             i -= 1
@@ -91,6 +279,358 @@ def align_sequences(scoring_matrix, s1, s2, g=-8):
 
     return "".join(reversed(aligned_s1)), "".join(reversed(aligned_s2))
 
+def hirschberg(s1, s2, g=-8, matrix=None):
+    """
+    Computes an optimal global alignment with Hirschberg's divide-and-conquer algorithm.
+
+    s1 is split in half; the forward scores of the first half and the backward scores of the
+    second half against s2 (both from `global_last_row`) give the column where the optimal path
+    crosses the middle row, and both halves are aligned recursively. Only O(len(s1) + len(s2))
+    memory is used, instead of the full scoring matrix needed by `align_sequences`.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence, or its precomputed profile.
+    - s2 (str): Second sequence.
+    - g (int, optional): Gap penalty (by default is -8).
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - aligned_s1 (str): Aligned version of s1.
+    - aligned_s2 (str): Aligned version of s2.
+    """
+    aligned_s1, aligned_s2 = [], []
+    _hirschberg(s1, s2, g, get_matrix(matrix), aligned_s1, aligned_s2)
+    return "".join(aligned_s1), "".join(aligned_s2)
+
+def _hirschberg(s1, s2, g, matrix, aligned_s1, aligned_s2):
+    """
+    Appends the optimal global alignment of s1 and s2 to the aligned_s1 and aligned_s2 lists.
+    """
+    m, n = len(s1), len(s2)
+    if m == 0 or n == 0 or m == 1 or m * n <= HIRSCHBERG_CUTOFF:
+        small_s1, small_s2 = align_sequences(global_matrix(s1, s2, g, "rows", matrix), s1, s2, g, matrix)
+        aligned_s1.append(small_s1)
+        aligned_s2.append(small_s2)
+        return
+
+    mid = m // 2
+    forward = global_last_row(s1[:mid], s2, g, matrix)
+    backward = global_last_row(s1[mid:][::-1], s2[::-1], g, matrix)[::-1]
+    split = int(np.argmax(forward + backward))
+
+    _hirschberg(s1[:mid], s2[:split], g, matrix, aligned_s1, aligned_s2)
+    _hirschberg(s1[mid:], s2[split:], g, matrix, aligned_s1, aligned_s2)
+
+def _minus_infinity(dtype):
+    """
+    Returns the value used as minus infinity for unreachable cells in arrays of the given dtype.
+    Integer arrays use a large negative number that cannot overflow when penalties are added to it.
+    """
+    if np.issubdtype(dtype, np.floating):
+        return -np.inf
+    return np.iinfo(dtype).min // 4
+
+def _global_affine_rows(s1, s2, gap_open, gap_extend, matrix=None):
+    """
+    Yields the rows (M[i], X[i], Y[i]) of the three Gotoh matrices for global alignment, one row at a time:
+    - M[i][j]: best score of an alignment of s1[:i] and s2[:j] ending with s1[i-1] aligned to s2[j-1].
+    - X[i][j]: best score of an alignment ending with s1[i-1] aligned to a gap.
+    - Y[i][j]: best score of an alignment ending with s2[j-1] aligned to a gap.
+
+    With H = max(M, X, Y) and a gap of length L scoring gap_open + L * gap_extend:
+        M[i][j] = H[i-1][j-1] + subst(s1[i-1], s2[j-1])
+        X[i][j] = max(H[i-1][j] + gap_open + gap_extend, X[i-1][j] + gap_extend)
+        Y[i][j] = max(H[i][j-1] + gap_open + gap_extend, Y[i][j-1] + gap_extend)
+    M and X only depend on the previous row. Y chains along the row, and unrolling it gives
+        Y[i][j] = gap_open + gap_extend + (j-1)*step + max(V[k] - k*step for k < j)
+    with V = max(M, X) and step = gap_extend + max(gap_open, 0), which is a running maximum.
+    """
+    m, n = len(s1), len(s2)
+    dtype = np.result_type(np.int64, gap_open, gap_extend)
+    minus_inf = _minus_infinity(dtype)
+    opening = gap_open + gap_extend
+    step = gap_extend + max(gap_open, 0)
+    positions = np.arange(n)
+
+    M = np.full(n + 1, minus_inf, dtype=dtype)
+    X = np.full(n + 1, minus_inf, dtype=dtype)
+    Y = np.full(n + 1, minus_inf, dtype=dtype)
+    M[0] = 0
+    Y[1:] = opening + positions * step
+    yield M, X, Y
+
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    for i in range(1, m + 1):
+        H = np.maximum(np.maximum(M, X), Y)
+        M, X_previous, Y = np.empty_like(M), X, np.empty_like(Y)
+        X = np.empty_like(X_previous)
+        M[0], X[0], Y[0] = minus_inf, opening + (i - 1) * step, minus_inf
+        M[1:] = H[:-1] + table[codes1[i - 1], codes2]
+        X[1:] = np.maximum(H[1:] + opening, X_previous[1:] + gap_extend)
+        V = np.maximum(M[:-1], X[:-1])
+        Y[1:] = np.maximum.accumulate(V - positions * step) + opening + positions * step
+        yield M, X, Y
+
+def global_affine_matrices(s1, s2, gap_open=-11, gap_extend=-1, matrix=None):
+    """
+    Computes the three scoring matrices of global alignment with affine gap penalties (Gotoh),
+    where a gap of length L scores gap_open + L * gap_extend.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence to align, or its precomputed profile.
+    - s2 (str): Second sequence to align.
+    - gap_open (int, optional): Penalty for opening a gap (by default is -11).
+    - gap_extend (int, optional): Penalty for each position of a gap (by default is -1).
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - matrices (tuple of numpy.ndarray): The (M, X, Y) matrices of shape (len(s1)+1, len(s2)+1), for
+      alignments ending in a match, a gap in s2 and a gap in s1 respectively.
+    """
+    rows = list(_global_affine_rows(s1, s2, gap_open, gap_extend, matrix))
+    return tuple(np.array([row[k] for row in rows]) for k in range(3))
+
+def global_affine_score(s1, s2, gap_open=-11, gap_extend=-1, matrix=None):
+    """
+    Computes the global alignment score with affine gap penalties, keeping only one row
+    of each Gotoh matrix in memory.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence to align, or its precomputed profile.
+    - s2 (str): Second sequence to align.
+    - gap_open (int, optional): Penalty for opening a gap (by default is -11).
+    - gap_extend (int, optional): Penalty for each position of a gap (by default is -1).
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - score (int): The final global alignment score.
+    """
+    for M, X, Y in _global_affine_rows(s1, s2, gap_open, gap_extend, matrix):
+        pass
+    return max(M[-1], X[-1], Y[-1]).item()
+
+def align_sequences_affine(matrices, s1, s2, gap_open=-11, gap_extend=-1, matrix=None):
+    """
+    Reconstructs the optimal alignment from the Gotoh matrices computed by `global_affine_matrices`.
+
+    Arguments:
+    - matrices (tuple): The (M, X, Y) matrices.
+    - s1 (str or QueryProfile): First sequence, or its precomputed profile.
+    - s2 (str): Second sequence.
+    - gap_open (int): Penalty for opening a gap.
+    - gap_extend (int): Penalty for each position of a gap.
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - aligned_s1 (str): Aligned version of s1.
+    - aligned_s2 (str): Aligned version of s2.
+    """
+    M, X, Y = matrices
+    opening = gap_open + gap_extend
+    step = gap_extend + max(gap_open, 0)
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    i, j = len(s1), len(s2)
+    aligned_s1, aligned_s2 = [], []
+
+    # States: 0 = match (M), 1 = gap in s2 (X), 2 = gap in s1 (Y)
+    state = int(np.argmax([M[i, j], X[i, j], Y[i, j]]))
+    while i > 0 or j > 0:
+        if state == 0:
+            score = M[i, j] - table[codes1[i - 1], codes2[j - 1]]
+            aligned_s1.append(s1[i - 1])
+            aligned_s2.append(s2[j - 1])
+            i -= 1
+            j -= 1
+            candidates = (M[i, j], X[i, j], Y[i, j])
+        elif state == 1:
+            score = X[i, j]
+            aligned_s1.append(s1[i - 1])
+            aligned_s2.append("-")
+            i -= 1
+            candidates = (M[i, j] + opening, X[i, j] + step, Y[i, j] + opening)
+        else:
+            score = Y[i, j]
+            aligned_s1.append("-")
+            aligned_s2.append(s2[j - 1])
+            j -= 1
+            candidates = (M[i, j] + opening, X[i, j] + opening, Y[i, j] + step)
+        state = candidates.index(score)
+
+    return "".join(reversed(aligned_s1)), "".join(reversed(aligned_s2))
+
+def global_banded(s1, s2, g=-8, band=None, matrix=None):
+    """
+    Computes the global alignment score and an optimal alignment filling only a band of the scoring matrix
+    around the diagonals, which is enough for near-identical sequences.
+
+    The cells (i, j) with lower <= j - i <= upper are computed first, where
+    lower = min(0, len(s2) - len(s1)) - band and upper = max(0, len(s2) - len(s1)) + band, that is O(n * band)
+    cells instead of O(n * m). The banded score is then used as the bound of one branch and bound pass
+    (`_pruned_banded_matrix`), which only fills the cells whose score plus an upper bound of the rest of the
+    alignment can still reach it. When some of those cells lie outside the band, the alignment is read from
+    that pass instead, so the score and the alignment are always those of the full matrix, without the band
+    being recomputed.
+
+    Arguments:
+    - s1 (str or QueryProfile): First sequence to align, or its precomputed profile.
+    - s2 (str): Second sequence to align.
+    - g (int, optional): Gap penalty (by default is -8).
+    - band (int, optional): Number of extra diagonals on each side of the band. By default it is derived
+      from the length difference, max(MIN_BAND, abs(len(s1) - len(s2))).
+    - matrix (optional): Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - score (int): The global alignment score.
+    - aligned_s1 (str): Aligned version of s1.
+    - aligned_s2 (str): Aligned version of s2.
+    """
+    m, n = len(s1), len(s2)
+    if band is None:
+        band = max(MIN_BAND, abs(m - n))
+    band = max(band, 1)
+
+    lower = min(0, n - m) - band
+    upper = max(0, n - m) + band
+    banded = _global_banded_matrix(s1, s2, g, lower, upper, matrix)
+    score = banded[m, n - m - lower].item()
+    if lower > -m or upper < n:
+        pruned, first, last = _pruned_banded_matrix(s1, s2, g, score, matrix)
+        if first < lower or last > upper:
+            banded, lower, upper = pruned, first, last
+            score = banded[m, n - m - lower].item()
+    aligned_s1, aligned_s2 = _align_banded(banded, s1, s2, g, lower, upper, matrix)
+    return score, aligned_s1, aligned_s2
+
+def _pruned_banded_matrix(s1, s2, g, score, matrix=None):
+    """
+    Fills the Needleman-Wunsch matrix row by row keeping only the cells that can lie on a global alignment
+    scoring at least `score` (branch and bound), and returns them as a banded matrix.
+
+    Scores are split into non-negative costs: with r[i] the best substitution score of s1[i] against s2 and
+    c[j] that of s2[j] against s1 (both at least 2 * g), every alignment scores (sum(r) + sum(c)) / 2 minus
+    its costs, (r[i] + c[j]) / 2 - subst for a substitution and r[i] / 2 - g or c[j] / 2 - g for a gap.
+    The rest of an alignment from cell (i, j) therefore scores at most U(i, j): half the sums of r[i:] and
+    c[j:], minus the cheapest gap cost for each of the |(m - i) - (n - j)| gaps it needs. A cell is kept when
+    its score plus U reaches `score`. Since `score` is reached by some alignment, every cell of an optimal
+    alignment is kept with its exact score, so the score and the traceback are those of the full matrix. Along a row, score plus U never grows by a gap, so a
+    row is only extended to the right while its cells are kept.
+
+    Returns:
+    - banded (numpy.ndarray): The kept cells, stored as in `_global_banded_matrix`.
+    - lower (int), upper (int): The smallest and largest diagonal (j - i) of the kept cells.
+    """
+    m, n = len(s1), len(s2)
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    dtype = np.result_type(np.int64, g)
+    minus_inf = _minus_infinity(dtype)
+    row_best = np.maximum(table[:, np.unique(codes2)].max(axis=1)[codes1], 2 * g)
+    column_best = np.maximum(table[np.unique(codes1)].max(axis=0)[codes2], 2 * g)
+    rows_left = np.append(np.cumsum(row_best[::-1])[::-1], 0)  # Sum of r[i:]
+    columns_left = np.append(np.cumsum(column_best[::-1])[::-1], 0)
+    gap_cost = min(row_best.min(), column_best.min()) - 2 * g  # Cheapest gap cost, doubled like U below
+
+    def kept(i, j, values):
+        # Whether value + U(i, j) >= score, on doubled values to stay in integers
+        return 2 * values + columns_left[j] - gap_cost * np.abs(j - (n - m + i)) >= 2 * score - rows_left[i]
+
+    j = np.arange(n + 1)
+    keep = np.flatnonzero(kept(0, j, j * g))
+    start, row = keep[0], np.arange(keep[0], keep[-1] + 1).astype(dtype) * g
+    rows = [(start, row)]
+    for i in range(1, m + 1):
+        stop = min(n, start + len(row))
+        j = np.arange(start, stop + 1)
+        current = row[:len(j)] + g
+        if len(current) < len(j):
+            current = np.append(current, minus_inf)
+        current[1:] = np.maximum(current[1:], row[:len(j) - 1] + table[codes1[i - 1], codes2[start:stop]])
+        steps = np.arange(len(j)) * g
+        current = np.maximum.accumulate(current - steps) + steps
+        passed = kept(i, j, current)
+        size = MIN_BAND
+        while passed[-1] and start + len(current) <= n:  # Horizontal gaps past the previous row
+            tail = np.arange(start + len(current), min(n, start + len(current) + size - 1) + 1)
+            extension = current[-1] + (tail - tail[0] + 1) * g
+            current = np.concatenate([current, extension])
+            passed = np.concatenate([passed, kept(i, tail, extension)])
+            size *= 2
+        keep = np.flatnonzero(passed)
+        start, row = start + keep[0], current[keep[0]:keep[-1] + 1]
+        rows.append((start, row))
+
+    lower = min(start - i for i, (start, row) in enumerate(rows))
+    upper = max(start + len(row) - 1 - i for i, (start, row) in enumerate(rows))
+    banded = np.full((m + 1, upper - lower + 2), minus_inf, dtype=dtype)
+    for i, (start, row) in enumerate(rows):
+        banded[i, start - i - lower:start - i - lower + len(row)] = row
+    return banded, lower, upper
+
+def _global_banded_matrix(s1, s2, g, lower, upper, matrix=None):
+    """
+    Fills the band lower <= j - i <= upper of the Needleman-Wunsch matrix, one row at a time as in
+    `_global_matrix_rows`. Cell (i, j) is stored at banded[i, j - i - lower]; the extra last column and
+    the cells outside the matrix hold minus infinity.
+    """
+    m, n = len(s1), len(s2)
+    width = upper - lower + 1
+    dtype = np.result_type(np.int64, g)
+    minus_inf = _minus_infinity(dtype)
+    banded = np.full((m + 1, width + 1), minus_inf, dtype=dtype)
+
+    first_row = np.arange(max(0, lower), min(n, upper) + 1)
+    banded[0, first_row - lower] = first_row * g
+
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    for i in range(1, m + 1):
+        if lower <= -i:
+            banded[i, -i - lower] = i * g
+        j_start, j_end = max(1, i + lower), min(n, i + upper)
+        if j_start > j_end:
+            continue
+
+        columns = np.arange(j_start - i - lower, j_end - i - lower + 1)
+        previous = banded[i - 1]
+        best = np.maximum(previous[columns] + table[codes1[i - 1], codes2[j_start - 1:j_end]],
+                          previous[columns + 1] + g)
+        steps = np.arange(1, len(columns) + 1) * g
+        running = np.maximum.accumulate(best - steps)
+        banded[i, columns] = np.maximum(running, banded[i, columns[0] - 1]) + steps
+    return banded
+
+def _align_banded(banded, s1, s2, g, lower, upper, matrix=None):
+    """
+    Reconstructs the alignment from a banded matrix with the same rules as `align_sequences`.
+
+    Returns:
+    - aligned_s1 (str), aligned_s2 (str): The alignment.
+    """
+    m, n = len(s1), len(s2)
+    width = upper - lower + 1
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+
+    def cell(i, j):
+        column = j - i - lower
+        return banded[i, column] if 0 <= column < width else banded[0, width]
+
+    i, j = m, n
+    aligned_s1, aligned_s2 = [], []
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and cell(i, j) == cell(i - 1, j - 1) + table[codes1[i - 1], codes2[j - 1]]:
+            aligned_s1.append(s1[i - 1])
+            aligned_s2.append(s2[j - 1])
+            i -= 1
+            j -= 1
+        elif i > 0 and cell(i, j) == cell(i - 1, j) + g:
+            aligned_s1.append(s1[i - 1])
+            aligned_s2.append("-")
+            i -= 1
+        else:
+            aligned_s1.append("-")
+            aligned_s2.append(s2[j - 1])
+            j -= 1
+
+    return "".join(reversed(aligned_s1)), "".join(reversed(aligned_s2))
+
 def print_matrix_with_sequences(scoring_matrix, s1, s2):
     """
     Prints the scoring matrix with the sequences aligned along the top and left edges.
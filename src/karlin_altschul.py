@@ -0,0 +1,150 @@
+import math
+
+import numpy as np
+
+from src.my_blosum import get_matrix
+
+# Background amino acid frequencies of Robinson & Robinson (1991), used by NCBI BLAST.
+ROBINSON_FREQUENCIES = {
+    "A": 0.07805, "R": 0.05129, "N": 0.04487, "D": 0.05364, "C": 0.01925, "Q": 0.04264, "E": 0.06295,
+    "G": 0.07377, "H": 0.02199, "I": 0.05142, "L": 0.09019, "K": 0.05744, "M": 0.02243, "F": 0.03856,
+    "P": 0.05203, "S": 0.07120, "T": 0.05841, "W": 0.01330, "Y": 0.03216, "V": 0.06441,
+}
+
+# (lambda, K, H) of gapped alignments, estimated by simulation (there is no closed form) and published
+# with NCBI BLAST, keyed by (matrix, gap_open, gap_extend) in the convention of the alignment functions:
+# a gap of length L scores gap_open + L * gap_extend.
+GAPPED_PARAMETERS = {
+    ("BLOSUM62", -11, -2): (0.297, 0.082, 0.27),
+    ("BLOSUM62", -10, -2): (0.291, 0.075, 0.23),
+    ("BLOSUM62", -9, -2): (0.279, 0.058, 0.19),
+    ("BLOSUM62", -8, -2): (0.264, 0.045, 0.15),
+    ("BLOSUM62", -7, -2): (0.239, 0.027, 0.10),
+    ("BLOSUM62", -6, -2): (0.201, 0.012, 0.061),
+    ("BLOSUM62", -13, -1): (0.292, 0.071, 0.23),
+    ("BLOSUM62", -12, -1): (0.283, 0.059, 0.19),
+    ("BLOSUM62", -11, -1): (0.267, 0.041, 0.14),
+    ("BLOSUM62", -10, -1): (0.243, 0.024, 0.10),
+    ("BLOSUM62", -9, -1): (0.206, 0.010, 0.052),
+}
+
+SIGMA_TERMS = 100  # Maximum number of terms of the series of K.
+
+_cache = {}  # Computed ungapped parameters, keyed by matrix.
+
+
+def karlin_altschul(matrix=None, gap_open=-11, gap_extend=-1, gapped=True):
+    """
+    Returns the Karlin-Altschul parameters of a scoring system.
+
+    Ungapped parameters are computed from the matrix and ROBINSON_FREQUENCIES (see `ungapped_parameters`)
+    and cached per matrix. Gapped parameters have no closed form and come from GAPPED_PARAMETERS.
+
+    Arguments:
+    - matrix (optional): Substitution matrix, its name or None for BLOSUM62.
+    - gap_open (int, optional): Penalty for opening a gap (by default is -11).
+    - gap_extend (int, optional): Penalty for each position of a gap (by default is -1).
+    - gapped (bool, optional): Whether the scores come from gapped alignments (by default is True).
+
+    Returns:
+    - parameters (tuple): (lambda, K, H), with lambda and H in nats.
+
+    Raises:
+    - ValueError: If gapped parameters are not known for this matrix and these gap penalties.
+    """
+    matrix = get_matrix(matrix)
+    if gapped:
+        key = (matrix.name, gap_open, gap_extend)
+        if key not in GAPPED_PARAMETERS:
+            raise ValueError(f"No gapped Karlin-Altschul parameters for {matrix.name} with gap_open={gap_open}, "
+                             f"gap_extend={gap_extend}; known settings: {sorted(GAPPED_PARAMETERS)}")
+        return GAPPED_PARAMETERS[key]
+    if matrix not in _cache:
+        _cache[matrix] = ungapped_parameters(matrix)
+    return _cache[matrix]
+
+
+def ungapped_parameters(matrix=None, frequencies=None):
+    """
+    Computes lambda, K and H of ungapped local alignments (Karlin & Altschul, 1990).
+
+    With p(s) the probability of score s when both residues are drawn from the background frequencies,
+    lambda is the positive root of sum(p(s) * exp(lambda * s)) = 1, H = lambda * sum(s * p(s) * exp(lambda * s)),
+    and K = exp(-2 * sigma) * lambda / (H * (1 - exp(-lambda))), where sigma sums, over the random walks of
+    k = 1, 2, ... steps, (E[exp(lambda * S_k); S_k < 0] + P(S_k >= 0)) / k.
+
+    Arguments:
+    - matrix (optional): Substitution matrix, its name or None for BLOSUM62.
+    - frequencies (dict, optional): Background frequency of each residue (by default ROBINSON_FREQUENCIES).
+
+    Returns:
+    - parameters (tuple): (lambda, K, H).
+
+    Raises:
+    - ValueError: If the expected score is not negative (no local alignment statistics exist).
+    """
+    matrix = get_matrix(matrix)
+    frequencies = ROBINSON_FREQUENCIES if frequencies is None else frequencies
+    letters = "".join(frequencies)
+    p = np.array([frequencies[aa] for aa in letters], dtype=float)
+    p /= p.sum()
+    codes = matrix.encode(letters)
+    scores = matrix.matrix[np.ix_(codes, codes)]
+    low, high = int(scores.min()), int(scores.max())
+    probabilities = np.zeros(high - low + 1)
+    np.add.at(probabilities, (scores - low).ravel(), np.outer(p, p).ravel())
+    values = np.arange(low, high + 1)
+    if probabilities @ values >= 0 or high <= 0:
+        raise ValueError("The expected score must be negative and some score positive")
+
+    def moment(lambda_):
+        return probabilities @ np.exp(lambda_ * values) - 1
+
+    lower, upper = 0.0, 0.5
+    while moment(upper) < 0:
+        upper *= 2
+    for _ in range(60):  # Bisection
+        middle = (lower + upper) / 2
+        lower, upper = (lower, middle) if moment(middle) > 0 else (middle, upper)
+    lambda_ = (lower + upper) / 2
+    H = lambda_ * (probabilities * values) @ np.exp(lambda_ * values)
+
+    sigma = 0.0
+    distribution, first = np.array([1.0]), 0
+    for k in range(1, SIGMA_TERMS + 1):
+        distribution, first = np.convolve(distribution, probabilities), first + low
+        sums = np.arange(first, first + len(distribution))
+        negative = sums < 0
+        term = (distribution[negative] @ np.exp(lambda_ * sums[negative]) + distribution[~negative].sum()) / k
+        sigma += term
+        if term < 1e-12:
+            break
+    K = math.exp(-2 * sigma) * lambda_ / (H * -math.expm1(-lambda_))
+    return float(lambda_), float(K), float(H)
+
+
+def bit_score(score, parameters):
+    """
+    Converts a raw score to a bit score: (lambda * score - ln K) / ln 2.
+    """
+    lambda_, K, _ = parameters
+    return (lambda_ * score - math.log(K)) / math.log(2)
+
+
+def evalue(score, query_length, database_length, parameters):
+    """
+    Expected number of alignments scoring at least `score` by chance: K * m * n * exp(-lambda * score),
+    with m the query length and n the total length of the database (no edge-effect correction).
+    """
+    lambda_, K, _ = parameters
+    return K * query_length * database_length * math.exp(-lambda_ * score)
+
+
+def min_score(max_evalue, query_length, database_length, parameters):
+    """
+    Smallest raw score whose E-value is at most `max_evalue`, used to discard candidates during a search.
+    """
+    lambda_, K, _ = parameters
+    if query_length == 0 or database_length == 0:
+        return 0
+    return math.ceil((math.log(K * query_length * database_length) - math.log(max_evalue)) / lambda_ - 1e-9)
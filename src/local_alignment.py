@@ -1,4 +1,7 @@
+import numpy as np
 from .my_blosum import Blosum62
+from .global_alignment import encode, score_rows, score_table, _minus_infinity
+from .query_profile import QueryProfile
 from pprint import pprint
 
 blosum = Blosum62()
@@ -16,25 +19,30 @@ def subst(x, y):
     """
     return blosum.subst(x, y)
 
-def local_score(s1, s2, g=-8):
+def local_score(s1, s2, g=-8, matrix=None):
     """
     Computes the maximum alignment score for local alignment (Smith-Waterman) between two sequences.
 
     Args:
-    - s1 (str): The first sequence to align.
+    - s1 (str or QueryProfile): The first sequence to align. With a QueryProfile, the score is computed
+      by the striped kernel (`local_score_striped`) on the profile built once for that query.
     - s2 (str): The second sequence to align.
     - g (int): The gap penalty, default is -8.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
 
     Returns:
     - int: The highest alignment score found in the scoring matrix.
     """
+    if isinstance(s1, QueryProfile):
+        return local_score_striped(s1, s2, g)
+
     n, m = len(s1), len(s2)
     dp = [[0] * (m + 1) for _ in range(n + 1)]
     max_score = 0
 
-    for i in range(1, n + 1):
+    for i, row_scores in enumerate(score_rows(s1, s2, matrix), start=1):
         for j in range(1, m + 1):
-            match = dp[i - 1][j - 1] + subst(s1[i - 1], s2[j - 1])      # Substitution
+            match = dp[i - 1][j - 1] + row_scores[j - 1]                # Substitution
             delete = dp[i - 1][j] + g                                   # Gap in s2
             insert = dp[i][j - 1] + g                                   # Gap in s1
             dp[i][j] = max(0, match, delete, insert)                    # Reset to 0 if score is negative
@@ -42,14 +50,15 @@ def local_score(s1, s2, g=-8):
 
     return max_score                                                     
 
-def local_matrix(s1, s2, g=-8):
+def local_matrix(s1, s2, g=-8, matrix=None):
     """
     Computes the full scoring matrix for local alignment (Smith-Waterman) between two sequences.
 
     Args:
-    - s1 (str): The first sequence to align.
+    - s1 (str or QueryProfile): The first sequence to align, or its precomputed profile.
     - s2 (str): The second sequence to align.
     - g (int): The gap penalty, default is -8.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
 
     Returns:
     - list[list[int]]: The scoring matrix where each cell represents the optimal alignment score for subsequences ending at that cell.
@@ -57,24 +66,25 @@ def local_matrix(s1, s2, g=-8):
     n, m = len(s1), len(s2)
     dp = [[0] * (m + 1) for _ in range(n + 1)]
 
-    for i in range(1, n + 1):
+    for i, row_scores in enumerate(score_rows(s1, s2, matrix), start=1):
         for j in range(1, m + 1):
-            match = dp[i - 1][j - 1] + subst(s1[i - 1], s2[j - 1])
+            match = dp[i - 1][j - 1] + row_scores[j - 1]
             delete = dp[i - 1][j] + g
             insert = dp[i][j - 1] + g
             dp[i][j] = max(0, match, delete, insert)  #Reset to 0 for local alignment
 
     return dp
 
-def traceback(dp, s1, s2, g=-8):
+def traceback(dp, s1, s2, g=-8, matrix=None):
     """
     Extracts the optimal local alignment from a scoring matrix by performing traceback from the highest scoring cell.
 
     Args:
     - dp (list[list[int]]): The scoring matrix computed by the Smith-Waterman algorithm.
-    - s1 (str): The first sequence.
+    - s1 (str or QueryProfile): The first sequence, or its precomputed profile.
     - s2 (str): The second sequence.
     - g (int): The gap penalty, default is -8.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
 
     Returns:
     - tuple[str, str]: The aligned subsequences of `s1` and `s2` that correspond to the optimal local alignment.
@@ -82,6 +92,7 @@ def traceback(dp, s1, s2, g=-8):
     n, m = len(s1), len(s2)
     max_score = 0
     max_pos = (0, 0)
+    table, codes1, codes2 = score_table(s1, s2, matrix)
 
     # Find the position of the maximum score
     for i in range(1, n + 1):
@@ -95,7 +106,7 @@ def traceback(dp, s1, s2, g=-8):
 
     # Traceback from the maximum score
     while i > 0 and j > 0 and dp[i][j] > 0:
-        if dp[i][j] == dp[i - 1][j - 1] + subst(s1[i - 1], s2[j - 1]):
+        if dp[i][j] == dp[i - 1][j - 1] + table[codes1[i - 1], codes2[j - 1]]:
             aligned_s1 = s1[i - 1] + aligned_s1
             aligned_s2 = s2[j - 1] + aligned_s2
             i -= 1
@@ -111,6 +122,221 @@ def traceback(dp, s1, s2, g=-8):
 
     return aligned_s1, aligned_s2
 
+def striped_profile(query, lanes=64, matrix=None):
+    """
+    Builds the striped query profile used by `local_score_striped` (Farrar's layout).
+
+    The query is split into `lanes` interleaved stripes of `segments = ceil(len(query) / lanes)` residues:
+    lane l holds query positions l*segments ... (l+1)*segments - 1, and vector s holds the s-th position
+    of every lane. For every letter of the matrix alphabet the profile stores the scores of that letter
+    against the query in this layout, so aligning one target residue reads one contiguous block.
+
+    Args:
+    - query (str): The query sequence.
+    - lanes (int): Number of lanes processed together by each vector operation, default is 64. Every
+      NumPy call has a fixed cost, so wider lanes than hardware SIMD registers (8-16) pay off.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - numpy.ndarray: Array of shape (alphabet size, segments, lanes). Padding positions past the end of
+      the query get a very negative score so they never raise the maximum.
+    """
+    return QueryProfile(query, matrix).striped(lanes)
+
+def _shift_lanes(vector, fill):
+    """
+    Moves every value of a striped vector to the next lane (lane l -> l + 1), putting `fill` in lane 0.
+    """
+    shifted = np.empty_like(vector)
+    shifted[0] = fill
+    shifted[1:] = vector[:-1]
+    return shifted
+
+def local_score_striped(profile, s2, g=-8, matrix=None):
+    """
+    Computes the local alignment (Smith-Waterman) score with Farrar's striped algorithm.
+
+    The scoring matrix is filled one target residue (column) at a time. Inside a column, the query positions
+    are visited as `segments` vectors of `lanes` values, so the diagonal and horizontal moves of all lanes
+    are computed together. The vertical (gap in s2) move crosses lanes, so it is first ignored between
+    lanes and then fixed by the "lazy F" loop, which stops as soon as it can no longer change any cell.
+
+    Args:
+    - profile (numpy.ndarray or QueryProfile): The striped profile of the first sequence, built once by
+      `striped_profile` (or cached by a QueryProfile) and reused for every target.
+    - s2 (str): The second sequence (target).
+    - g (int): The gap penalty, default is -8.
+    - matrix: The matrix the striped array was built with, used to encode s2 (ignored for a QueryProfile).
+
+    Returns:
+    - int: The highest alignment score, the same as `local_score`.
+    """
+    if isinstance(profile, QueryProfile):
+        codes2 = profile.encode(s2)
+        profile = profile.striped()
+    else:
+        codes2 = encode(s2, matrix)
+    _, segments, lanes = profile.shape
+    minus_inf = _minus_infinity(np.int32)
+    H_store = np.zeros((segments, lanes), dtype=np.int32)
+    H_load = np.zeros_like(H_store)
+    max_score = 0
+
+    for code in codes2:
+        scores = profile[code]
+        F = np.full(lanes, minus_inf, dtype=np.int32)
+        H = _shift_lanes(H_store[segments - 1], 0)
+        H_load, H_store = H_store, H_load
+
+        for s in range(segments):
+            H += scores[s]                              # Substitution
+            np.maximum(H, H_load[s] + g, out=H)         # Gap in s1 (previous column)
+            np.maximum(H, F, out=H)                     # Gap in s2 (same lane)
+            np.maximum(H, 0, out=H)                     # Reset to 0 if score is negative
+            H_store[s] = H
+            F = H + g
+            H = H_load[s].copy()
+
+        # Lazy F: carry the vertical gaps across lanes until they stop improving any cell
+        F = _shift_lanes(F, minus_inf)
+        s = 0
+        while (F > H_store[s]).any():
+            np.maximum(H_store[s], F, out=H_store[s])
+            F += g
+            s += 1
+            if s == segments:
+                s = 0
+                F = _shift_lanes(F, minus_inf)
+
+        max_score = max(max_score, int(H_store.max()))
+
+    return max_score
+
+def _local_affine_rows(s1, s2, gap_open, gap_extend, matrix=None):
+    """
+    Yields the rows (M[i], X[i], Y[i]) of the three Gotoh matrices for local alignment, one row at a time.
+
+    With H = max(0, M, X, Y) and a gap of length L scoring gap_open + L * gap_extend:
+        M[i][j] = H[i-1][j-1] + subst(s1[i-1], s2[j-1])
+        X[i][j] = max(H[i-1][j] + gap_open + gap_extend, X[i-1][j] + gap_extend)
+        Y[i][j] = max(H[i][j-1] + gap_open + gap_extend, Y[i][j-1] + gap_extend)
+    M and X are computed for the whole row from the previous one; Y chains along the row and is
+    computed as a running maximum of V = max(0, M, X) (see `global_alignment._global_affine_rows`).
+    """
+    m, n = len(s1), len(s2)
+    dtype = np.result_type(np.int64, gap_open, gap_extend)
+    minus_inf = _minus_infinity(dtype)
+    opening = gap_open + gap_extend
+    step = gap_extend + max(gap_open, 0)
+    positions = np.arange(n)
+
+    M = np.full(n + 1, minus_inf, dtype=dtype)
+    X = np.full(n + 1, minus_inf, dtype=dtype)
+    Y = np.full(n + 1, minus_inf, dtype=dtype)
+    yield M, X, Y
+
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    for i in range(1, m + 1):
+        H = np.maximum(np.maximum(M, X), np.maximum(Y, 0))
+        M, X_previous, Y = np.empty_like(M), X, np.empty_like(Y)
+        X = np.empty_like(X_previous)
+        M[0] = X[0] = Y[0] = minus_inf
+        M[1:] = H[:-1] + table[codes1[i - 1], codes2]
+        X[1:] = np.maximum(H[1:] + opening, X_previous[1:] + gap_extend)
+        V = np.maximum(np.maximum(M[:-1], X[:-1]), 0)
+        Y[1:] = np.maximum.accumulate(V - positions * step) + opening + positions * step
+        yield M, X, Y
+
+def local_affine_matrices(s1, s2, gap_open=-11, gap_extend=-1, matrix=None):
+    """
+    Computes the three scoring matrices of local alignment with affine gap penalties (Gotoh),
+    where a gap of length L scores gap_open + L * gap_extend.
+
+    Args:
+    - s1 (str or QueryProfile): The first sequence to align, or its precomputed profile.
+    - s2 (str): The second sequence to align.
+    - gap_open (int): The penalty for opening a gap, default is -11.
+    - gap_extend (int): The penalty for each position of a gap, default is -1.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The (M, X, Y) matrices for alignments ending in a match,
+      a gap in s2 and a gap in s1. The local score of a cell is max(0, M, X, Y).
+    """
+    rows = list(_local_affine_rows(s1, s2, gap_open, gap_extend, matrix))
+    return tuple(np.array([row[k] for row in rows]) for k in range(3))
+
+def local_affine_score(s1, s2, gap_open=-11, gap_extend=-1, matrix=None):
+    """
+    Computes the maximum local alignment score with affine gap penalties, keeping only one row of each matrix in memory.
+
+    Args:
+    - s1 (str or QueryProfile): The first sequence to align, or its precomputed profile.
+    - s2 (str): The second sequence to align.
+    - gap_open (int): The penalty for opening a gap, default is -11.
+    - gap_extend (int): The penalty for each position of a gap, default is -1.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - int: The highest alignment score.
+    """
+    max_score = 0
+    for M, X, Y in _local_affine_rows(s1, s2, gap_open, gap_extend, matrix):
+        max_score = max(max_score, M.max(), X.max(), Y.max())
+    return int(max_score)
+
+def traceback_affine(matrices, s1, s2, gap_open=-11, gap_extend=-1, matrix=None):
+    """
+    Extracts the optimal local alignment from the matrices computed by `local_affine_matrices`,
+    starting from the highest scoring cell.
+
+    Args:
+    - matrices (tuple): The (M, X, Y) matrices.
+    - s1 (str or QueryProfile): The first sequence, or its precomputed profile.
+    - s2 (str): The second sequence.
+    - gap_open (int): The penalty for opening a gap, default is -11.
+    - gap_extend (int): The penalty for each position of a gap, default is -1.
+    - matrix: Substitution matrix, its name (e.g. "BLOSUM45", "PAM250") or None for BLOSUM62.
+
+    Returns:
+    - tuple[str, str]: The aligned subsequences of `s1` and `s2` that correspond to the optimal local alignment.
+    """
+    M, X, Y = matrices
+    opening = gap_open + gap_extend
+    step = gap_extend + max(gap_open, 0)
+    table, codes1, codes2 = score_table(s1, s2, matrix)
+    H = np.maximum(np.maximum(M, X), np.maximum(Y, 0))
+    i, j = np.unravel_index(int(np.argmax(H)), H.shape)
+    aligned_s1, aligned_s2 = [], []
+
+    # States: 0 = match (M), 1 = gap in s2 (X), 2 = gap in s1 (Y)
+    state = int(np.argmax([M[i, j], X[i, j], Y[i, j]]))
+    while H[i, j] > 0:
+        if state == 0:
+            score = M[i, j] - table[codes1[i - 1], codes2[j - 1]]
+            aligned_s1.append(s1[i - 1])
+            aligned_s2.append(s2[j - 1])
+            i -= 1
+            j -= 1
+            candidates = (M[i, j], X[i, j], Y[i, j])
+        elif state == 1:
+            score = X[i, j]
+            aligned_s1.append(s1[i - 1])
+            aligned_s2.append("-")
+            i -= 1
+            candidates = (M[i, j] + opening, X[i, j] + step, Y[i, j] + opening)
+        else:
+            score = Y[i, j]
+            aligned_s1.append("-")
+            aligned_s2.append(s2[j - 1])
+            j -= 1
+            candidates = (M[i, j] + opening, X[i, j] + opening, Y[i, j] + step)
+        if score not in candidates:  # The alignment starts here
+            break
+        state = candidates.index(score)
+
+    return "".join(reversed(aligned_s1)), "".join(reversed(aligned_s2))
+
 def print_matrix_with_sequences(matrix, s1, s2):
     """
     Prints the scoring matrix with the two sequences aligned to the top and left of the matrix for easier visualization.
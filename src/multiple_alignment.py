@@ -1,11 +1,13 @@
 from src.global_alignment import global_matrix, align_sequences
 
-def star_alignment(sequences):
+def star_alignment(sequences, matrix=None):
     """
     Implements the Star Multiple Sequence Alignment algorithm.
     
     Args:
         sequences: List of sequences to align
+        matrix: Substitution matrix of the pairwise alignments, its name (e.g. "BLOSUM45", "PAM250")
+            or None for BLOSUM62
         
     Returns:
         list: List of aligned sequences
@@ -26,8 +28,8 @@ def star_alignment(sequences):
     # Get pairwise alignments with center
     for seq in sequences:
         if seq != center:
-            matrix = global_matrix(center, seq)
-            aligned_center, aligned_seq = align_sequences(matrix, center, seq)
+            scores = global_matrix(center, seq, matrix=matrix)
+            aligned_center, aligned_seq = align_sequences(scores, center, seq, matrix=matrix)
             alignment_map[seq] = aligned_seq
             
             # Update max length and pad if necessary
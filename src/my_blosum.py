@@ -1,44 +1,172 @@
-class Blosum62:
-    def __init__(self):
-        tabela = """
-   A  R  N  D  C  Q  E  G  H  I  L  K  M  F  P  S  T  W  Y  V  B  Z  X  -
-A  4 -1 -2 -2  0 -1 -1  0 -2 -1 -1 -1 -1 -2 -1  1  0 -3 -2  0 -2 -1  0 -4
-R -1  5  0 -2 -3  1  0 -2  0 -3 -2  2 -1 -3 -2 -1 -1 -3 -2 -3 -1  0 -1 -4
-N -2  0  6  1 -3  0  0  0  1 -3 -3  0 -2 -3 -2  1  0 -4 -2 -3  3  0 -1 -4
-D -2 -2  1  6 -3  0  2 -1 -1 -3 -4 -1 -3 -3 -1  0 -1 -4 -3 -3  4  1 -1 -4
-C  0 -3 -3 -3  9 -3 -4 -3 -3 -1 -1 -3 -1 -2 -3 -1 -1 -2 -2 -1 -3 -3 -2 -4
-Q -1  1  0  0 -3  5  2 -2  0 -3 -2  1  0 -3 -1  0 -1 -2 -1 -2  0  3 -1 -4
-E -1  0  0  2 -4  2  5 -2  0 -3 -3  1 -2 -3 -1  0 -1 -3 -2 -2  1  4 -1 -4
-G  0 -2  0 -1 -3 -2 -2  6 -2 -4 -4 -2 -3 -3 -2  0 -2 -2 -3 -3 -1 -2 -1 -4
-H -2  0  1 -1 -3  0  0 -2  8 -3 -3 -1 -2 -1 -2 -1 -2 -2  2 -3  0  0 -1 -4
-I -1 -3 -3 -3 -1 -3 -3 -4 -3  4  2 -3  1  0 -3 -2 -1 -3 -1  3 -3 -3 -1 -4
-L -1 -2 -3 -4 -1 -2 -3 -4 -3  2  4 -2  2  0 -3 -2 -1 -2 -1  1 -4 -3 -1 -4
-K -1  2  0 -1 -3  1  1 -2 -1 -3 -2  5 -1 -3 -1  0 -1 -3 -2 -2  0  1 -1 -4
-M -1 -1 -2 -3 -1  0 -2 -3 -2  1  2 -1  5  0 -2 -1 -1 -1 -1  1 -3 -1 -1 -4
-F -2 -3 -3 -3 -2 -3 -3 -3 -1  0  0 -3  0  6 -4 -2 -2  1  3 -1 -3 -3 -1 -4
-P -1 -2 -2 -1 -3 -1 -1 -2 -2 -3 -3 -1 -2 -4  7 -1 -1 -4 -3 -2 -2 -1 -2 -4
-S  1 -1  1  0 -1  0  0  0 -1 -2 -2  0 -1 -2 -1  4  1 -3 -2 -2  0  0  0 -4
-T  0 -1  0 -1 -1 -1 -1 -2 -2 -1 -1 -1 -1 -2 -1  1  5 -2 -2  0 -1 -1  0 -4
-W -3 -3 -4 -4 -2 -2 -3 -2 -2 -3 -2 -3 -1  1 -4 -3 -2 11  2 -3 -4 -3 -2 -4
-Y -2 -2 -2 -3 -2 -1 -2 -3  2 -1 -1 -2 -1  3 -3 -2 -2  2  7 -1 -3 -2 -1 -4
-V  0 -3 -3 -3 -1 -2 -2 -3 -3  3  1 -2  1 -1 -2 -2  0 -3 -1  4 -3 -2 -1 -4
-B -2 -1  3  4 -3  0  1 -1  0 -3 -4  0 -3 -3 -2  0 -1 -4 -3 -3  4  1 -1 -4
-Z -1  0  0  1 -3  3  4 -2  0 -3 -3  1 -1 -3 -1  0 -1 -3 -2 -2  1  4 -1 -4
-X  0 -1 -1 -1 -2 -1 -1 -1 -1 -1 -1 -1 -1 -1 -2  0  0 -2 -1 -1 -1 -1 -1 -4
-- -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4  1
-"""
-
-        tabela = [T.split() for T in tabela.splitlines() if T]
-
-        headers, *resto = tabela
-
-        from collections import defaultdict
+import hashlib
+import os
+from collections import defaultdict
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+# Folder of the binary copies of parsed matrices, in the user cache directory rather than in the repository.
+CACHE_DIR = os.environ.get("AASB_MATRIX_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "aasb", "matrices")
+UNKNOWN = 255  # Value of the translation table for characters outside the alphabet.
+GAP = "-"  # Gap character of the aligned sequences, scored like the "*" column of NCBI matrices.
+
+_registry = {}  # Loaded matrices, keyed by the path of their file, shared by the whole process.
+
+
+class SubstitutionMatrix:
+    """
+    Substitution matrix over an alphabet of residues.
+
+    - alphabet (str): The letters of the matrix, in row/column order.
+    - matrix (numpy.ndarray): Dense (len(alphabet) x len(alphabet)) table of scores.
+    - index (numpy.ndarray): 256-entry translation table from byte value to alphabet position (UNKNOWN otherwise).
+    - tab (dict): Dict-of-dicts view of the scores, used by `subst`.
+    """
+
+    def __init__(self, alphabet, matrix, name=None):
+        self.name = name
+        self.alphabet = alphabet
+        self.matrix = matrix
+        self.index = np.full(256, UNKNOWN, dtype=np.uint8)
+        for i, aa in enumerate(alphabet):
+            self.index[ord(aa)] = i
         tab = defaultdict(dict)
-        for linha in resto:
-            aa, *lst = linha
-            for header, score in zip(headers, lst):
-                tab[aa][header] = int(score)
+        for x, row in zip(alphabet, matrix.tolist()):
+            tab[x] = dict(zip(alphabet, row))
         self.tab = tab
 
+    def __repr__(self):
+        return f"SubstitutionMatrix({self.name!r})"
+
     def subst(self, x, y):
-        return self.tab[x][y]
\ No newline at end of file
+        return self.tab[x][y]
+
+    def encode(self, sequence):
+        """
+        Encodes a sequence as an array of row/column indices of `matrix`, with one lookup in the
+        byte translation table `index` per residue.
+
+        Raises KeyError for residues that are not in the alphabet, like `subst`.
+        """
+        try:
+            codes = self.index[np.frombuffer(sequence.encode("latin-1"), dtype=np.uint8)]
+        except UnicodeEncodeError:
+            codes = None
+        if codes is None or (codes == UNKNOWN).any():
+            raise KeyError(next(aa for aa in sequence if aa not in self.tab))
+        return codes
+
+
+class Blosum62(SubstitutionMatrix):
+    def __init__(self):
+        # Share the tables of the registry copy, loaded from data/blosum62.txt
+        self.__dict__.update(load_matrix("BLOSUM62").__dict__)
+
+
+def get_matrix(matrix=None):
+    """
+    Resolves the `matrix=` argument of the alignment functions.
+
+    :param matrix: None for BLOSUM62, the name or path of a matrix file, or a SubstitutionMatrix.
+    :return: The SubstitutionMatrix to use.
+    """
+    if matrix is None:
+        matrix = "BLOSUM62"
+    if isinstance(matrix, str):
+        return load_matrix(matrix)
+    return matrix
+
+
+def available_matrices():
+    """
+    Lists the names of the matrices shipped in the data folder.
+
+    :return: Sorted list of matrix names (e.g. "BLOSUM62"), usable with `load_matrix`.
+    """
+    return sorted(name[:-4].upper() for name in os.listdir(DATA_DIR) if name.endswith(".txt"))
+
+
+def load_matrix(name="BLOSUM62"):
+    """
+    Loads a substitution matrix by name (a file `data/<name>.txt`, case insensitive) or from the path of
+    an NCBI-format matrix file. A name of a shipped matrix always means that matrix; `name` is read as a
+    path only when it contains a path separator or no `data/<name>.txt` exists, so a file called
+    "BLOSUM62" in the working directory cannot replace the shipped BLOSUM62.
+
+    Each matrix is parsed only once per process. The parsed matrix is also saved in binary form
+    (NumPy .npz) in CACHE_DIR, keyed by the SHA-256 of the file, so later processes skip the text parsing.
+
+    :param name: Matrix name, such as "BLOSUM62", "BLOSUM45", "BLOSUM80" or "PAM250", or a file path.
+    :return: The SubstitutionMatrix.
+    :raises FileNotFoundError: If there is no such matrix.
+    """
+    path = os.path.join(DATA_DIR, name.lower() + ".txt")
+    if os.sep in name or "/" in name or not os.path.isfile(path):
+        path = name
+    path = os.path.abspath(path)
+    if path not in _registry:
+        with open(path, "rb") as handle:
+            content = handle.read()
+        matrix_name = os.path.splitext(os.path.basename(path))[0].upper()
+        alphabet, matrix = _load_cached(matrix_name, content)
+        _registry[path] = SubstitutionMatrix(alphabet, matrix, matrix_name)
+    return _registry[path]
+
+
+def _load_cached(name, content):
+    """
+    Returns (alphabet, matrix) from the binary cache if this exact file was already parsed,
+    otherwise parses the text and tries to store the result in the cache.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    cache_path = os.path.join(CACHE_DIR, f"{name.lower()}-{digest}.npz")
+    try:
+        with np.load(cache_path) as cached:
+            return "".join(map(chr, cached["alphabet"])), cached["matrix"]
+    except (OSError, KeyError, ValueError):
+        pass
+
+    alphabet, matrix = parse_ncbi_matrix(content.decode("ascii"))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temporary = f"{cache_path}.{os.getpid()}.npz"
+        np.savez(temporary, alphabet=np.array([ord(aa) for aa in alphabet], dtype=np.uint8), matrix=matrix)
+        os.replace(temporary, cache_path)
+    except OSError:
+        pass  # The cache is only an optimization
+    return alphabet, matrix
+
+
+def parse_ncbi_matrix(text):
+    """
+    Parses a substitution matrix in NCBI format: "#" comment lines, a header line with the alphabet,
+    then one line per letter starting with that letter. If the matrix has a "*" letter but no gap
+    letter, GAP is added with the same scores as "*".
+
+    :param text: Content of the matrix file.
+    :return: Tuple (alphabet, matrix) with the alphabet as a string and the scores as a numpy int64 array.
+    :raises ValueError: If the table is malformed.
+    """
+    lines = [line.split() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        raise ValueError("Empty substitution matrix")
+    headers, *rows = lines
+
+    scores = {}
+    for row in rows:
+        aa, *values = row
+        if len(values) != len(headers):
+            raise ValueError(f"Row {aa!r} has {len(values)} scores, expected {len(headers)}")
+        scores[aa] = [int(value) for value in values]
+    if sorted(scores) != sorted(headers):
+        raise ValueError("Rows and columns of the substitution matrix have different letters")
+
+    alphabet = "".join(headers)
+    matrix = np.array([scores[aa] for aa in alphabet], dtype=np.int64)
+    if "*" in alphabet and GAP not in alphabet:
+        star = alphabet.index("*")
+        matrix = np.vstack([np.hstack([matrix, matrix[:, star:star + 1]]),
+                            np.append(matrix[star], matrix[star, star])])
+        alphabet += GAP
+    return alphabet, matrix
@@ -0,0 +1,243 @@
+# Packed (2 bits per base) DNA sequences
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+BASES = "ACGT"  # Bases in code order: A=0, C=1, G=2, T=3, so the complement of a code is 3 - code (code ^ 3).
+AMBIGUOUS_BASES = "NRYSWKMBDHV"  # IUPAC ambiguity codes, stored in the mask and read back as 'N'.
+AMBIGUOUS_CODE = 4  # Value of the translation table for ambiguous bases.
+INVALID_CODE = 255  # Value of the translation table for characters that are not bases.
+BASES_PER_BYTE = 4
+MAX_K = 31  # Longest k-mer whose code fits in an int64.
+
+_ENCODE = np.full(256, INVALID_CODE, dtype=np.uint8)  # Byte value -> base code.
+for _code, _base in enumerate(BASES):
+    _ENCODE[ord(_base)] = _ENCODE[ord(_base.lower())] = _code
+_ENCODE[ord("U")] = _ENCODE[ord("u")] = BASES.index("T")
+for _base in AMBIGUOUS_BASES:
+    _ENCODE[ord(_base)] = _ENCODE[ord(_base.lower())] = AMBIGUOUS_CODE
+
+# IUPAC codes as 4-bit masks of the bases they stand for (bit i for the base of code i), 0 for other characters.
+IUPAC_BASES = {"A": "A", "C": "C", "G": "G", "T": "T", "U": "T", "R": "AG", "Y": "CT", "S": "CG", "W": "AT",
+               "K": "GT", "M": "AC", "B": "CGT", "D": "AGT", "H": "ACT", "V": "ACG", "N": "ACGT"}
+_IUPAC = np.zeros(256, dtype=np.uint8)  # Byte value -> IUPAC mask.
+for _base, _meaning in IUPAC_BASES.items():
+    _IUPAC[ord(_base)] = _IUPAC[ord(_base.lower())] = sum(1 << BASES.index(base) for base in _meaning)
+
+_LETTERS = np.frombuffer((BASES + "N").encode("ascii"), dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)  # Bit offset of each of the 4 bases of a byte, first base highest.
+# Reverse complement of the 4 bases of a byte: complement every 2-bit code (~byte) and reverse their order.
+_REVERSE_COMPLEMENT_BYTE = np.array(
+    [sum(((~byte >> shift) & 3) << (6 - shift) for shift in (6, 4, 2, 0)) for byte in range(256)], dtype=np.uint8)
+
+
+def pack_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Packs an array of base codes (0-3) four per byte, the first base in the two highest bits.
+
+    :param codes: Array of base codes.
+    :return: A uint8 array of ceil(len(codes) / 4) bytes; the unused bits of the last byte are zero.
+    """
+    codes = np.asarray(codes, dtype=np.uint8)
+    padding = -len(codes) % BASES_PER_BYTE
+    if padding:
+        codes = np.concatenate([codes, np.zeros(padding, dtype=np.uint8)])
+    groups = codes.reshape(-1, BASES_PER_BYTE)
+    return (groups[:, 0] << 6) | (groups[:, 1] << 4) | (groups[:, 2] << 2) | groups[:, 3]
+
+
+def encode_bases(sequence: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts a DNA string to base codes with one lookup per byte.
+
+    :param sequence: The DNA sequence (upper or lower case, 'U' read as 'T', IUPAC ambiguity codes allowed).
+    :return: A tuple (codes, ambiguous): a uint8 array of base codes (0 at ambiguous positions) and a boolean
+        array marking the ambiguous bases.
+    :raises ValueError: If the sequence has characters that are not bases.
+    """
+    try:
+        raw = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        raw = None
+    codes = None if raw is None else _ENCODE[raw]
+    if codes is None or (codes == INVALID_CODE).any():
+        invalid = next(base for base in sequence if base.upper() not in BASES + "U" + AMBIGUOUS_BASES)
+        raise ValueError(f"Invalid DNA base: {invalid!r}")
+    ambiguous = codes == AMBIGUOUS_CODE
+    codes[ambiguous] = 0
+    return codes, ambiguous
+
+
+def iupac_masks(sequence: str) -> np.ndarray:
+    """
+    Converts a DNA string to IUPAC masks: 4-bit sets of the bases each position may be (1 for A, 2 for C,
+    4 for G, 8 for T, 15 for N, ...). The complement of a mask is its bit reversal.
+
+    :param sequence: The DNA sequence.
+    :return: A uint8 array with one mask per base (0 for characters that are not IUPAC codes).
+    """
+    return _IUPAC[np.frombuffer(sequence.encode("ascii", "replace"), dtype=np.uint8)]
+
+
+class PackedDNA:
+    """
+    DNA sequence stored with 2 bits per base in a NumPy uint8 array, a quarter of the memory of a `str`.
+
+    Ambiguous bases (N and the other IUPAC codes) are kept in a separate bit mask, which is only allocated
+    when the sequence has any; their 2-bit code is 0 and they read back as 'N'. Lowercase letters are accepted
+    and 'U' is read as 'T', so the string form is upper case DNA.
+
+    Slicing returns a new PackedDNA, `reverse_complement` works on whole bytes with bit operations, and
+    `kmer_codes` / `codon_codes` give integer codes (base 4, first base most significant) that can index
+    lookup tables directly, e.g. a 64-entry codon table.
+
+    :param sequence: The DNA sequence.
+    :raises ValueError: If the sequence has characters that are not bases.
+    """
+
+    def __init__(self, sequence: str = ""):
+        self._set(*encode_bases(sequence))
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, ambiguous: Optional[np.ndarray] = None) -> "PackedDNA":
+        """
+        Builds a packed sequence from base codes.
+
+        :param codes: Array of base codes (0-3, in the order of BASES).
+        :param ambiguous: Optional boolean array marking the ambiguous positions.
+        :return: The PackedDNA.
+        """
+        sequence = cls.__new__(cls)
+        sequence._set(np.asarray(codes, dtype=np.uint8) & 3, ambiguous)
+        return sequence
+
+    def _set(self, codes: np.ndarray, ambiguous: Optional[np.ndarray]) -> None:
+        self.length = len(codes)
+        self.packed = pack_codes(codes)
+        self.mask = np.packbits(ambiguous) if ambiguous is not None and ambiguous.any() else None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the bases and the ambiguity mask, in bytes.
+        """
+        return self.packed.nbytes + (0 if self.mask is None else self.mask.nbytes)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        letters = _LETTERS[self.codes()]
+        letters[self.ambiguous()] = ord("N")
+        return letters.tobytes().decode("ascii")
+
+    def __repr__(self) -> str:
+        text = str(self) if self.length <= 20 else f"{str(self[:17])}..."
+        return f"PackedDNA({text!r}, length={self.length})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackedDNA):
+            return NotImplemented
+        return (self.length == other.length and np.array_equal(self.packed, other.packed)
+                and np.array_equal(self.ambiguous(), other.ambiguous()))
+
+    __hash__ = None
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, "PackedDNA"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step == 1:
+                return PackedDNA.from_codes(self.codes(start, stop), self.ambiguous(start, stop))
+            return PackedDNA.from_codes(self.codes()[index], self.ambiguous()[index])
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("PackedDNA index out of range")
+        return "N" if self.ambiguous(index, index + 1)[0] else BASES[self.codes(index, index + 1)[0]]
+
+    def codes(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Unpacks the codes of the bases in [start, stop), reading only the bytes that hold them.
+
+        :param start: First position.
+        :param stop: End position (exclusive), by default the end of the sequence.
+        :return: A uint8 array of base codes (0 for ambiguous bases).
+        """
+        stop = self.length if stop is None else min(stop, self.length)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+        block = self.packed[start // BASES_PER_BYTE:(stop + BASES_PER_BYTE - 1) // BASES_PER_BYTE]
+        codes = ((block[:, None] >> _SHIFTS) & 3).ravel()
+        offset = start % BASES_PER_BYTE
+        return codes[offset:offset + stop - start]
+
+    def ambiguous(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Boolean array marking the ambiguous bases in [start, stop), unpacking only the mask bytes that hold them.
+        """
+        stop = self.length if stop is None else min(stop, self.length)
+        if self.mask is None or start >= stop:
+            return np.zeros(max(stop - start, 0), dtype=bool)
+        block = self.mask[start // 8:(stop + 7) // 8]
+        offset = start % 8
+        return np.unpackbits(block)[offset:offset + stop - start].astype(bool)
+
+    def reverse_complement(self) -> "PackedDNA":
+        """
+        Computes the reverse complement without unpacking: each byte is complemented and its four bases
+        reversed with one table lookup, the bytes are reversed, and the bit stream is shifted left to drop
+        the padding of the last byte.
+
+        :return: The reverse complement as a new PackedDNA.
+        """
+        packed = _REVERSE_COMPLEMENT_BYTE[self.packed][::-1]
+        padding_bits = 2 * (-self.length % BASES_PER_BYTE)
+        if padding_bits:
+            following = np.append(packed[1:], np.uint8(0))
+            packed = (packed << padding_bits) | (following >> (8 - padding_bits))
+        result = PackedDNA.__new__(PackedDNA)
+        result.length = self.length
+        result.packed = np.ascontiguousarray(packed, dtype=np.uint8)
+        result.mask = None if self.mask is None else np.packbits(self.ambiguous()[::-1])
+        return result
+
+    def kmer_codes(self, k: int, step: int = 1, start: int = 0) -> np.ndarray:
+        """
+        Integer codes of the k-mers starting at positions start, start + step, ... (the complete ones only).
+
+        The code of a k-mer is its bases read as a base-4 number, the first base most significant, so
+        codes of 3-mers are 16 * first + 4 * second + third. K-mers with an ambiguous base have code -1.
+
+        :param k: Length of the k-mers (1 to MAX_K).
+        :param step: Distance between the starts of consecutive k-mers.
+        :param start: Position of the first k-mer.
+        :return: An int64 array with one code per k-mer.
+        :raises ValueError: If k or step are out of range.
+        """
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+        if step < 1:
+            raise ValueError("step must be positive")
+        count = max((self.length - start - k) // step + 1, 0) if start < self.length else 0
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+        stop = start + (count - 1) * step + k
+        codes = self.codes(start, stop).astype(np.int64)
+        result = np.zeros(count, dtype=np.int64)
+        last = (count - 1) * step + 1
+        for j in range(k):
+            result = (result << 2) | codes[j:j + last:step]
+        if self.mask is not None:
+            ambiguous = np.concatenate([[0], np.cumsum(self.ambiguous(start, stop))])
+            starts = np.arange(count) * step
+            result[ambiguous[starts + k] > ambiguous[starts]] = -1
+        return result
+
+    def codon_codes(self, frame: int = 0) -> np.ndarray:
+        """
+        Codes (0-63) of the complete codons of a reading frame, -1 for codons with an ambiguous base.
+
+        :param frame: Offset of the first codon (0, 1 or 2).
+        :return: An int64 array with one code per codon.
+        """
+        return self.kmer_codes(3, step=3, start=frame)
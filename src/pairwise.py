@@ -0,0 +1,141 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.global_alignment import global_score
+from src.local_alignment import local_score
+from src.query_profile import QueryProfile
+
+MODES = ("global", "local")  # Alignment modes supported by all_vs_all.
+TILE_SIZE = 16  # Number of rows/columns of the score matrix computed by each task.
+
+_worker_sequences = None  # Sequences of the pool worker, read once from shared memory.
+
+
+def all_vs_all(sequences, mode="global", workers=None, g=-8, tile=TILE_SIZE, matrix=None):
+    """
+    Computes the alignment score of every pair of sequences.
+
+    The score matrix is symmetric, so only the tiles on or above the diagonal are computed. The tiles are
+    spread over a pool of worker processes; the sequences are written once to shared memory, which every
+    worker reads when it starts, instead of being pickled with each task. Each row of a tile reuses the
+    QueryProfile of its sequence for all the columns.
+
+    Args:
+        sequences: List of sequences to compare
+        mode: "global" (global_score) or "local" (local_score)
+        workers: Number of worker processes (by default os.cpu_count()); 1 computes in this process
+        g: Gap penalty
+        tile: Number of rows/columns of the score matrix computed by each task
+        matrix: Substitution matrix name (e.g. "BLOSUM45") or None for BLOSUM62
+
+    Returns:
+        numpy.ndarray: (len(sequences) x len(sequences)) matrix where scores[i][j] is the score of
+        sequences[i] against sequences[j]
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+
+    n = len(sequences)
+    scores = np.zeros((n, n), dtype=np.int64)
+    tiles = [(row, column, tile) for row in range(0, n, tile) for column in range(row, n, tile)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(tiles) <= 1:
+        for task in tiles:
+            _store_tile(scores, *_score_tile(sequences, mode, g, matrix, *task))
+    else:
+        data, offsets = _pack(sequences)
+        memory = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes + offsets.nbytes))
+        try:
+            memory.buf[:offsets.nbytes] = offsets.tobytes()
+            memory.buf[offsets.nbytes:offsets.nbytes + data.nbytes] = data.tobytes()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                     initargs=(memory.name, n)) as pool:
+                futures = [pool.submit(_score_shared_tile, mode, g, matrix, *task) for task in tiles]
+                for future in futures:
+                    _store_tile(scores, *future.result())
+        finally:
+            memory.close()
+            memory.unlink()
+
+    return scores
+
+
+def _pack(sequences):
+    """
+    Packs the sequences into one byte array and the array of their (n + 1) start offsets.
+    """
+    encoded = [sequence.encode("ascii") for sequence in sequences]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(sequence) for sequence in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _attach(name, n):
+    """
+    Pool initializer: reads the packed sequences from the shared memory block once per worker.
+    """
+    global _worker_sequences
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        offsets = np.frombuffer(memory.buf, dtype=np.int64, count=n + 1).copy()
+        data = bytes(memory.buf[offsets.nbytes:offsets.nbytes + offsets[-1]])
+    finally:
+        memory.close()
+    _worker_sequences = [data[start:end].decode("ascii") for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _score_shared_tile(mode, g, matrix, row, column, tile):
+    """
+    Scores one tile in a pool worker, using the sequences read by `_attach`.
+    """
+    return _score_tile(_worker_sequences, mode, g, matrix, row, column, tile)
+
+
+def _score_tile(sequences, mode, g, matrix, row, column, tile):
+    """
+    Scores the pairs (i, j) with i <= j of the tile starting at (row, column).
+
+    Returns:
+        tuple: (row, column, block) where block[a][b] is the score of pair (row + a, column + b)
+    """
+    score = global_score if mode == "global" else local_score
+    rows = range(row, min(row + tile, len(sequences)))
+    columns = range(column, min(column + tile, len(sequences)))
+    block = np.zeros((len(rows), len(columns)), dtype=np.int64)
+    for a, i in enumerate(rows):
+        profile = QueryProfile(sequences[i], matrix)
+        for b, j in enumerate(columns):
+            if i <= j:
+                block[a, b] = score(profile, sequences[j], g)
+    return row, column, block
+
+
+def _store_tile(scores, row, column, block):
+    """
+    Copies a computed tile into the score matrix and its mirror image below the diagonal.
+    """
+    i, j = np.indices(block.shape)
+    i, j = i + row, j + column
+    upper = i <= j
+    scores[i[upper], j[upper]] = block[upper]
+    scores[j[upper], i[upper]] = block[upper]
+
+
+if __name__ == "__main__":
+    # Example sequences
+    sequences = [
+        "MEEPQSDPSY",
+        "MEEPQSDPSV",
+        "MEEPQSDLSV",
+        "HEAGAWGHEE",
+    ]
+
+    print("Global scores:")
+    print(all_vs_all(sequences, mode="global", workers=2))
+    print("\nLocal scores:")
+    print(all_vs_all(sequences, mode="local", workers=2))
@@ -0,0 +1,81 @@
+import numpy as np
+from src.my_blosum import get_matrix
+
+STRIPED_PADDING = np.iinfo(np.int32).min // 4  # Score of the padding positions of a striped profile.
+
+
+class QueryProfile:
+    """
+    Precomputed substitution scores of one query sequence against every letter of a substitution matrix.
+
+    Row i of `scores` holds the scores of query[i] against each letter of the alphabet, in one contiguous
+    array, so aligning the query against many targets only needs one array index per cell instead of the
+    two dictionary lookups of `Blosum62.subst`.
+
+    A QueryProfile can be passed in place of the first sequence to the alignment functions of
+    `src.global_alignment` and `src.local_alignment`. Indexing it with an integer gives the query residue,
+    and slicing it gives the profile of the sliced query.
+
+    Arguments:
+    - query (str): The query sequence.
+    - matrix (SubstitutionMatrix or str, optional): Substitution matrix or its name, as accepted by
+      `my_blosum.get_matrix` (by default is BLOSUM62).
+    """
+
+    def __init__(self, query, matrix=None):
+        matrix = get_matrix(matrix)
+        self.query = query
+        self.matrix = matrix
+        self.alphabet = matrix.alphabet
+        self.scores = np.ascontiguousarray(matrix.matrix[matrix.encode(query)]).reshape(len(query), len(self.alphabet))
+        self._striped = {}
+
+    def __len__(self):
+        return len(self.query)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self.query[key]
+        profile = object.__new__(QueryProfile)
+        profile.query = self.query[key]
+        profile.matrix = self.matrix
+        profile.alphabet = self.alphabet
+        profile.scores = self.scores[key]
+        profile._striped = {}
+        return profile
+
+    def __repr__(self):
+        return f"QueryProfile({self.query!r})"
+
+    def encode(self, sequence):
+        """
+        Encodes a sequence as an array of indices into the alphabet of the profile.
+
+        Arguments:
+        - sequence (str): Sequence to encode.
+
+        Returns:
+        - codes (numpy.ndarray): One integer index per residue.
+
+        Raises:
+        - KeyError: If a residue is not part of the alphabet.
+        """
+        return self.matrix.encode(sequence)
+
+    def striped(self, lanes=64):
+        """
+        Returns the profile in Farrar's striped layout (see `local_alignment.striped_profile`),
+        built on the first call for each number of lanes and then reused.
+
+        Arguments:
+        - lanes (int, optional): Number of lanes (by default is 64).
+
+        Returns:
+        - profile (numpy.ndarray): Array of shape (alphabet size, segments, lanes).
+        """
+        if lanes not in self._striped:
+            segments = max(1, -(-len(self) // lanes))
+            padded = np.full((len(self.alphabet), segments * lanes), STRIPED_PADDING, dtype=np.int32)
+            padded[:, :len(self)] = self.scores.T
+            self._striped[lanes] = padded.reshape(-1, lanes, segments).transpose(0, 2, 1).copy()
+        return self._striped[lanes]
@@ -0,0 +1,525 @@
+import os
+import tempfile
+import unittest
+import itertools
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from src.Blast import BlastDatabase, query_map, hits, best_hit, extend_hit, word_codes, neighborhood_words, NEIGHBORHOOD_ALPHABET
+from src.Blast import xdrop_extend, gapped_extend, gapped_bound, find_hsps, batch_search, tabular_row, format_tabular, HSP, TABULAR_FIELDS
+from src.Blast import parallel_search, BlastSearcher, main, iter_hsps, extend_hits
+from src.karlin_altschul import karlin_altschul, ungapped_parameters, bit_score, evalue, min_score
+from src.local_alignment import local_affine_score
+from src.my_blosum import Blosum62
+from src.fasta import read_fasta, parse_fasta
+
+import numpy as np
+
+SUBJECTS = [("first", "AATATGTTATATAATAATATTT"), ("second", "GATAATATG"), ("short", "AT"), ("empty", "")]
+
+class TestBlastDatabase(unittest.TestCase):
+    def test_hits_match_sequence_scan(self):
+        """
+        Tests that the index finds, for every database sequence, the same hits as scanning that sequence with `hits`.
+        """
+        database = BlastDatabase(SUBJECTS, 3)
+        query_dict = query_map("AATAT", 3)
+        expected = sorted((q, i, d) for i, (_, sequence) in enumerate(SUBJECTS) for q, d in hits(query_dict, sequence))
+        self.assertEqual(sorted(hits(query_dict, database)), expected)
+
+    def test_words_do_not_cross_sequences(self):
+        """
+        Tests that words spanning the end of one sequence and the start of the next one are not indexed.
+        """
+        database = BlastDatabase(["AAC", "CGG"], 3)
+        self.assertEqual(len(database.lookup("ACC")[0]), 0)
+        self.assertEqual(len(database.lookup("CCG")[0]), 0)
+        self.assertEqual(database.lookup("CGG")[0].tolist(), [1])
+        self.assertEqual(database.sequence(1), "CGG")
+        self.assertEqual(database.names, ["0", "1"])
+
+    def test_best_hit(self):
+        """
+        Tests that best_hit against a database returns the sequence index followed by the best_hit of that sequence.
+        """
+        database = BlastDatabase(SUBJECTS, 3)
+        self.assertEqual(best_hit("AATATAT", database, 3), (0,) + best_hit("AATATAT", SUBJECTS[0][1], 3))
+        self.assertEqual(best_hit("GCC", database, 3), ())
+
+    def test_invalid_word_length(self):
+        """
+        Tests that the word length must fit the integer codes and match the length of the looked up words.
+        """
+        with self.assertRaises(ValueError):
+            BlastDatabase(SUBJECTS, 0)
+        with self.assertRaises(ValueError):
+            BlastDatabase(SUBJECTS, 9)
+        with self.assertRaises(ValueError):
+            BlastDatabase(SUBJECTS, 3).lookup("AA")
+
+    def test_word_codes(self):
+        """
+        Tests that word codes are the big-endian bytes of each word.
+        """
+        codes = word_codes(np.frombuffer(b"ABC", dtype=np.uint8), 2)
+        self.assertEqual(codes.tolist(), [ord("A") * 256 + ord("B"), ord("B") * 256 + ord("C")])
+        self.assertEqual(len(word_codes(np.frombuffer(b"A", dtype=np.uint8), 2)), 0)
+
+    def test_from_fasta(self):
+        """
+        Tests building the database from a FASTA file, keeping the headers as sequence names.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "db.fasta")
+            with open(path, "w") as handle:
+                handle.write(">first\nAATATGTTATA\nTAATAATATTT\n\n>second\nGATAATATG\n")
+            self.assertEqual(read_fasta(path), SUBJECTS[:2])
+            database = BlastDatabase.from_fasta(path, 3)
+        self.assertEqual(database.names, ["first", "second"])
+        self.assertEqual(database.sequence(0), SUBJECTS[0][1])
+
+    def test_save_and_open(self):
+        """
+        Tests that an index written with save and opened with open (memory-mapped) gives the same names, sequences and hits.
+        """
+        database = BlastDatabase(SUBJECTS, 3)
+        query_dict = query_map("AATATAT", 3)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "db.idx")
+            database.save(path)
+            opened = BlastDatabase.open(path)
+            self.assertIsInstance(opened.positions, np.memmap)
+            self.assertEqual(opened.w, 3)
+            self.assertEqual(opened.names, database.names)
+            self.assertEqual([opened.sequence(i) for i in range(len(opened))], [sequence for _, sequence in SUBJECTS])
+            self.assertEqual(hits(query_dict, opened), hits(query_dict, database))
+            self.assertEqual(best_hit("AATATAT", opened, 3), best_hit("AATATAT", database, 3))
+            del opened
+
+    def test_open_invalid_file(self):
+        """
+        Tests that opening a file that is not an index raises a ValueError, and that an empty database round-trips.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "db.idx")
+            with open(path, "wb") as handle:
+                handle.write(b">first\nACGT\n")
+            with self.assertRaises(ValueError):
+                BlastDatabase.open(path)
+            BlastDatabase([], 2).save(path)
+            self.assertEqual(len(BlastDatabase.open(path)), 0)
+
+    def test_fasta_without_header(self):
+        """
+        Tests that sequence data before the first header is rejected.
+        """
+        with self.assertRaises(ValueError):
+            list(parse_fasta(["ACGT", ">name", "ACGT"]))
+
+class TestTwoHit(unittest.TestCase):
+    def test_repetitive_sequence(self):
+        """
+        Tests that on a repetitive sequence two-hit mode finds the same best hit with far fewer extensions,
+        and that the counters account for every hit.
+        """
+        query, db_sequence = "ACGT" * 30 + "TTGACCA", "GG" + "ACGT" * 200
+        one_hit, two_hit = {}, {}
+        self.assertEqual(best_hit(query, db_sequence, 4, A=40, stats=two_hit), best_hit(query, db_sequence, 4, stats=one_hit))
+        self.assertEqual(one_hit["extensions"], one_hit["hits"])
+        self.assertLess(two_hit["extensions"] * 50, two_hit["hits"])
+        self.assertEqual(sum(two_hit[key] for key in ("extensions", "covered", "overlapping", "unpaired")), two_hit["hits"])
+
+    def test_single_hit_not_extended(self):
+        """
+        Tests that an isolated hit, or two hits too far apart on a diagonal, trigger no extension in two-hit mode.
+        """
+        stats = {}
+        self.assertEqual(best_hit("AATATAT", "GGGAATGGG", 3, A=40, stats=stats), ())
+        self.assertEqual(stats["unpaired"], 1)
+        self.assertEqual(best_hit("AACGGGGGTTC", "AACCCCCCTTC", 3, A=5), ())
+        self.assertEqual(best_hit("AACGGGGGTTC", "AACCCCCCTTC", 3, A=8), (8, 8, 3, 3))
+
+    def test_database(self):
+        """
+        Tests two-hit mode against a BlastDatabase, where diagonals of different sequences are kept apart.
+        """
+        database = BlastDatabase([("one", "AATGGGGG"), ("two", "CAATCCTATC")], 3)
+        stats = {}
+        self.assertEqual(best_hit("AATCCTAT", database, 3, A=40, stats=stats), (1,) + best_hit("AATCCTAT", "CAATCCTATC", 3, A=40))
+        self.assertEqual(stats["hits"], 8)
+        self.assertEqual(stats["unpaired"], 3)
+
+    def test_streams_hits(self):
+        """
+        Tests that two-hit mode extends the hits as they come, in query order, instead of collecting them first.
+        """
+        query, db_sequence = "ACGT" * 30, "ACGT" * 200
+        consumed = []
+        def hit_list():
+            for query_index in range(len(query) - 3):
+                for db_index in range(query_index % 4, len(db_sequence) - 3, 4):
+                    consumed.append(query_index)
+                    yield 0, query_index, db_index
+        extensions = extend_hits(query, hit_list(), lambda sequence_id: db_sequence, 4, A=40)
+        self.assertEqual(next(extensions)[1][:3], extend_hit(query, db_sequence, (4, 4), 4)[:3])
+        self.assertLess(len(consumed), 1000)
+
+QUERY = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGP"
+
+class TestExtension(unittest.TestCase):
+    def test_xdrop_extend(self):
+        """
+        Tests that the ungapped extension covers the whole shared region and stops at the flanking mismatches,
+        with the BLOSUM62 score of the extended region.
+        """
+        blosum = Blosum62()
+        db_sequence = "GGGGG" + QUERY[:30] + "GGGGG"
+        stq, sts, size, score = xdrop_extend(QUERY, db_sequence, (10, 15), 3)
+        self.assertEqual((stq, sts, size), (0, 5, 30))
+        self.assertEqual(score, sum(blosum.subst(x, x) for x in QUERY[:30]))
+
+    def test_xdrop_stops_after_drop(self):
+        """
+        Tests that a small X stops the extension at a run of mismatches that a large X crosses.
+        """
+        query = "W" * 15
+        db_sequence = "WWWWWWWWPPPWWWW"
+        self.assertEqual(xdrop_extend(query, db_sequence, (0, 0), 3, X=5)[:3], (0, 0, 8))
+        self.assertEqual(xdrop_extend(query, db_sequence, (0, 0), 3, X=20)[:3], (0, 0, 15))
+
+    def test_xdrop_across_blocks(self):
+        """
+        Tests extensions longer than one scoring block, in both directions and with a drop in a later block:
+        the result is the best prefix of the diagonal before the drop, as with a single scan.
+        """
+        blosum = Blosum62()
+        shared = (QUERY * 10)[:300]
+        db_sequence = "P" * 200 + shared + "P" * 200
+        stq, sts, size, score = xdrop_extend(shared, db_sequence, (150, 350), 3)
+        self.assertEqual((stq, sts, size), (0, 200, 300))
+        self.assertEqual(score, sum(blosum.subst(x, x) for x in shared))
+        broken = shared[:250] + "W" * 20 + shared[270:]
+        self.assertEqual(xdrop_extend(shared, broken, (10, 10), 3)[:3], (0, 0, 250))
+        self.assertEqual(xdrop_extend(shared, broken, (10, 10), 3, X=10 ** 6)[:3], (0, 0, 300))
+
+    def test_best_hit_scored(self):
+        """
+        Tests that best_hit with X ranks the hits by substitution score.
+        """
+        db_sequence = "CCCCCCCC" + QUERY[20:45]
+        self.assertEqual(best_hit(QUERY, db_sequence, 3, X=20), (20, 8, 25, xdrop_extend(QUERY, db_sequence, (20, 8), 3)[3]))
+
+    def test_gapped_extend(self):
+        """
+        Tests that the gapped extension bridges an insertion in the database sequence and matches the local affine score.
+        """
+        db_sequence = QUERY[:27] + "AAA" + QUERY[27:]
+        hsp = xdrop_extend(QUERY, db_sequence, (0, 0), 3)
+        score, query_start, db_start, aligned_query, aligned_db = gapped_extend(QUERY, db_sequence, hsp, band=64)
+        self.assertEqual(score, local_affine_score(QUERY, db_sequence))
+        self.assertEqual((query_start, db_start), (0, 0))
+        self.assertEqual(aligned_query.replace("-", ""), QUERY)
+        self.assertEqual(aligned_db, db_sequence)
+
+    def test_find_hsps(self):
+        """
+        Tests the HSP search over a database: only the sequence sharing a region with the query is reported,
+        the gapped HSP joins both halves, and the cutoff removes everything when it is too high.
+        """
+        database = BlastDatabase([("unrelated", "GGGGGGGGGGGGGGGGGG"), ("related", "GG" + QUERY[:27] + "AAA" + QUERY[27:])], 3)
+        stats = {}
+        hsps = find_hsps(QUERY, database, 3, T=11, A=40, band=64, stats=stats)
+        best = hsps[0]
+        self.assertEqual(best.sequence_id, 1)
+        self.assertEqual((best.query_start, best.query_end, best.db_start, best.db_end), (0, len(QUERY), 2, len(QUERY) + 5))
+        self.assertEqual(best.aligned_query.replace("-", ""), QUERY)
+        self.assertGreaterEqual(stats["gapped"], len(hsps))
+        ungapped = find_hsps(QUERY, database, 3, T=11, gapped=False, cutoff=0)
+        self.assertTrue(all(hsp.aligned_query == QUERY[hsp.query_start:hsp.query_end] for hsp in ungapped))
+        self.assertEqual(find_hsps(QUERY, database, 3, cutoff=10 ** 6), [])
+
+    def test_duplicate_hsps(self):
+        """
+        Tests that a gapped HSP reached from both halves is yielded twice by iter_hsps but kept once by
+        find_hsps, with and without max_hsps.
+        """
+        database = BlastDatabase([("unrelated", "GGGGGGGGGGGGGGGGGG"), ("related", "GG" + QUERY[:27] + "AAA" + QUERY[27:])], 3)
+        found = list(iter_hsps(QUERY, database, 3, T=11, A=40, band=64))
+        self.assertGreater(len(found), len(set(found)))
+        hsps = find_hsps(QUERY, database, 3, T=11, A=40, band=64)
+        self.assertEqual(sorted(hsps), sorted(set(found)))
+        for k in range(len(hsps) + 2):
+            self.assertEqual(find_hsps(QUERY, database, 3, T=11, A=40, band=64, max_hsps=k), hsps[:k])
+
+class TestBatchSearch(unittest.TestCase):
+    def setUp(self):
+        self.database = BlastDatabase([("s1", "GG" + QUERY[:27] + "AAA" + QUERY[27:]), ("s2", "GGGG" + QUERY[10:50] + "WW")], 3)
+
+    def test_rows(self):
+        """
+        Tests the tabular rows of a batch: one row per HSP, best first, with 1-based inclusive coordinates.
+        """
+        rows = list(batch_search([("q1", QUERY), ("q2", QUERY[5:40])], self.database, 3, T=11, A=40, band=64))
+        self.assertTrue(all(len(row) == len(TABULAR_FIELDS) for row in rows))
+        self.assertEqual([row[:2] for row in rows], [("q1", "s1"), ("q1", "s2"), ("q2", "s1"), ("q2", "s2")])
+        self.assertEqual(rows[1][2:10], (100.0, 40, 0, 0, 11, 50, 5, 44))
+        self.assertEqual(rows[0][5], 1)
+        self.assertEqual(format_tabular(rows[1]).split("\t")[:4], ["q1", "s2", "100.00", "40"])
+
+    def test_top_k(self):
+        """
+        Tests that max_hsps keeps the best HSPs of find_hsps for each query.
+        """
+        expected = find_hsps(QUERY, self.database, 3, T=11, cutoff=0, gapped=False)
+        rows = list(batch_search([QUERY], self.database, 3, max_hsps=2, T=11, cutoff=0, gapped=False))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual([row[-1] for row in rows], [hsp.bitscore for hsp in expected[:2]])
+        self.assertEqual(rows[0][0], "0")
+
+    def test_streams_queries(self):
+        """
+        Tests that the queries are read lazily: the first row is produced after reading only the first query.
+        """
+        read = []
+        def queries():
+            for name in ("q1", "q2", "q3"):
+                read.append(name)
+                yield name, QUERY
+        rows = batch_search(queries(), self.database, 3, T=11)
+        self.assertEqual(next(rows)[0], "q1")
+        self.assertEqual(read, ["q1"])
+
+    def test_tabular_row_gaps(self):
+        """
+        Tests the identity, mismatch and gap opening counts of a gapped HSP.
+        """
+        hsp = HSP(0, 4, 11, 0, 8, 20, "AC--GTTA", "ACGGGTCA")
+        self.assertEqual(tabular_row("q", "s", hsp), ("q", "s", 62.5, 8, 1, 1, 5, 11, 1, 8, None, None))
+        hsp = HSP(0, 0, 4, 0, 4, 20, "A-C-GT", "AG-CGT")
+        self.assertEqual(tabular_row("q", "s", hsp)[4:6], (0, 3))
+
+class TestParallelSearch(unittest.TestCase):
+    def setUp(self):
+        subjects = [("s1", "GG" + QUERY[:27] + "AAA" + QUERY[27:]), ("s2", "GGGG" + QUERY[10:50] + "WW"),
+                    ("s3", "CCCC"), ("s4", QUERY[30:]), ("s5", "HHHH" + QUERY[::-1])]
+        self.database = BlastDatabase(subjects, 3)
+        self.queries = [("q1", QUERY), ("q2", QUERY[5:40]), ("q3", "CCCCCCCC"), ("q4", QUERY[25:])]
+
+    def test_shards(self):
+        """
+        Tests that the shard ranges cover all the sequences and that a shard only reports its own sequences.
+        """
+        ranges = self.database.shard_ranges(3)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(self.database))
+        self.assertTrue(all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:])))
+        self.assertEqual(len(self.database.shard_ranges(100)), len(self.database))
+        shard = self.database.shard(1, 3)
+        self.assertEqual(sorted(set(shard.lookup("QET")[0].tolist())), [1])
+        self.assertEqual(sorted(set(self.database.lookup("QET")[0].tolist())), [0, 1])
+
+    def test_same_rows_as_serial(self):
+        """
+        Tests that a pool of workers over several shards gives exactly the rows and counters of batch_search.
+        """
+        serial_stats, parallel_stats = {}, {}
+        expected = list(batch_search(self.queries, self.database, 3, max_hsps=3, T=11, A=40, stats=serial_stats))
+        rows = list(parallel_search(self.queries, self.database, 3, max_hsps=3, workers=2, shards=4,
+                                    T=11, A=40, stats=parallel_stats))
+        self.assertEqual(rows, expected)
+        self.assertEqual(parallel_stats, serial_stats)
+
+    def test_opened_database(self):
+        """
+        Tests the parallel search on a memory-mapped database, whose file is opened by the workers.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "db.idx")
+            self.database.save(path)
+            opened = BlastDatabase.open(path)
+            rows = list(parallel_search(self.queries, opened, 3, workers=2, T=11))
+            del opened
+        self.assertEqual(rows, list(batch_search(self.queries, self.database, 3, T=11)))
+
+class TestStatistics(unittest.TestCase):
+    def test_ungapped_parameters(self):
+        """
+        Tests lambda, K and H of BLOSUM62 with the Robinson frequencies against the values published with NCBI BLAST.
+        """
+        lambda_, K, H = ungapped_parameters("BLOSUM62")
+        self.assertAlmostEqual(lambda_, 0.3176, places=4)
+        self.assertAlmostEqual(K, 0.134, places=3)
+        self.assertAlmostEqual(H, 0.4012, places=4)
+        self.assertIs(karlin_altschul(gapped=False), karlin_altschul(gapped=False))
+
+    def test_gapped_parameters(self):
+        """
+        Tests the table of gapped parameters and the error for unknown gap penalties.
+        """
+        self.assertEqual(karlin_altschul(), (0.267, 0.041, 0.14))
+        with self.assertRaises(ValueError):
+            karlin_altschul(gap_open=-3, gap_extend=-3)
+        with self.assertRaises(ValueError):
+            karlin_altschul("PAM250")
+
+    def test_scores(self):
+        """
+        Tests the bit score and E-value formulas, and that min_score is the smallest score within the E-value.
+        """
+        parameters = karlin_altschul()
+        self.assertAlmostEqual(bit_score(100, parameters), (0.267 * 100 - np.log(0.041)) / np.log(2))
+        self.assertAlmostEqual(evalue(100, 300, 10 ** 6, parameters), 0.041 * 300 * 10 ** 6 * np.exp(-26.7))
+        threshold = min_score(1e-3, 300, 10 ** 6, parameters)
+        self.assertLessEqual(evalue(threshold, 300, 10 ** 6, parameters), 1e-3)
+        self.assertGreater(evalue(threshold - 1, 300, 10 ** 6, parameters), 1e-3)
+
+    def test_evalue_threshold(self):
+        """
+        Tests that the E-value threshold keeps exactly the HSPs of an unfiltered search that are within it,
+        and counts the pruned gapped HSPs.
+        """
+        database = BlastDatabase([("s1", "GG" + QUERY[:27] + "AAA" + QUERY[27:]), ("s2", "GGGG" + QUERY[10:50] + "WW"),
+                                  ("s3", "PPPPSDLWKLPPPP")], 3)
+        everything = find_hsps(QUERY, database, 3, T=11, cutoff=20)
+        self.assertTrue(all(hsp.evalue is not None for hsp in everything))
+        for threshold in (1e-30, 1e-20, 10.0):
+            stats = {}
+            kept = find_hsps(QUERY, database, 3, T=11, cutoff=20, evalue=threshold, stats=stats)
+            self.assertEqual(kept, [hsp for hsp in everything if hsp.evalue <= threshold])
+            self.assertEqual(stats.get("pruned", 0), len(everything) - len(kept))
+        ungapped = find_hsps(QUERY, database, 3, T=11, cutoff=0, gapped=False, evalue=1e-10)
+        self.assertTrue(ungapped and all(hsp.evalue <= 1e-10 for hsp in ungapped))
+        with self.assertRaises(ValueError):
+            find_hsps(QUERY, database, 3, matrix="PAM250", evalue=1.0)
+        self.assertIsNone(find_hsps(QUERY, database, 3, matrix="PAM250", cutoff=0)[0].evalue)
+
+    def test_gapped_bound(self):
+        """
+        Tests that the bound is never below the gapped extension score, and that HSPs whose bound misses the
+        E-value threshold are pruned without running the gapped extension.
+        """
+        rng = np.random.default_rng(18)
+        for _ in range(50):
+            query = "".join(rng.choice(list(NEIGHBORHOOD_ALPHABET), rng.integers(5, 40)))
+            db_sequence = "".join(rng.choice(list(NEIGHBORHOOD_ALPHABET), rng.integers(5, 40)))
+            stq, sts = int(rng.integers(len(query))), int(rng.integers(len(db_sequence)))
+            hsp = (stq, sts, min(len(query) - stq, len(db_sequence) - sts), 0)
+            for band, matrix in ((0, None), (8, None), (8, "PAM250")):
+                self.assertLessEqual(gapped_extend(query, db_sequence, hsp, band, matrix=matrix)[0],
+                                     gapped_bound(query, db_sequence, hsp, band, matrix))
+        database = BlastDatabase([("s1", "GG" + QUERY[:27] + "AAA" + QUERY[27:]), ("s2", "GGGG" + QUERY[10:50] + "WW")], 3)
+        stats = {}
+        self.assertEqual(find_hsps(QUERY, database, 3, T=11, cutoff=20, evalue=1e-30, stats=stats), [])
+        self.assertGreater(stats["pruned"], 0)
+        self.assertEqual(stats.get("gapped", 0), 0)
+
+class TestBlastSearcher(unittest.TestCase):
+    def setUp(self):
+        self.subjects = [("s1", "GG" + QUERY[:27] + "AAA" + QUERY[27:]), ("s2", "GGGG" + QUERY[10:50] + "WW")]
+
+    def test_import_has_no_side_effects(self):
+        """
+        Tests that importing the module prints nothing (the example only runs from the command line).
+        """
+        result = subprocess.run([sys.executable, "-c", "import src.Blast"], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, "")
+
+    def test_search(self):
+        """
+        Tests that a searcher gives the results of find_hsps and batch_search with its settings,
+        and that two searchers with different settings are independent.
+        """
+        strict = BlastSearcher(self.subjects, 3, T=11, evalue=1e-20)
+        loose = BlastSearcher(self.subjects, 3, T=11, cutoff=0, gapped=False, max_hsps=None)
+        self.assertEqual(strict.search(QUERY), find_hsps(QUERY, strict.database, 3, T=11, evalue=1e-20, max_hsps=10))
+        self.assertEqual(loose.search(QUERY), find_hsps(QUERY, loose.database, 3, T=11, cutoff=0, gapped=False))
+        self.assertLess(len(strict.search(QUERY)), len(loose.search(QUERY)))
+        self.assertEqual(list(strict.search_many([QUERY])), list(batch_search([QUERY], strict.database, 3, T=11, evalue=1e-20)))
+        self.assertEqual(list(strict.search_many([QUERY], workers=2)), list(strict.search_many([QUERY])))
+        self.assertEqual(strict.best_hit(QUERY), best_hit(QUERY, strict.database, 3, X=20))
+
+    def test_database_files(self):
+        """
+        Tests a searcher built from a FASTA file and from an index file, and the check of the word length.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            fasta, index = os.path.join(folder, "db.fasta"), os.path.join(folder, "db.idx")
+            with open(fasta, "w") as handle:
+                handle.write("".join(f">{name}\n{sequence}\n" for name, sequence in self.subjects))
+            from_fasta = BlastSearcher(fasta, 4)
+            self.assertEqual((from_fasta.w, from_fasta.database.names), (4, ["s1", "s2"]))
+            from_fasta.database.save(index)
+            from_index = BlastSearcher(index)
+            self.assertEqual(from_index.w, 4)
+            self.assertEqual(from_index.search(QUERY), from_fasta.search(QUERY))
+            with self.assertRaises(ValueError):
+                BlastSearcher(index, 3)
+            del from_index
+
+    def test_command_line(self):
+        """
+        Tests the command line: indexing a FASTA file, then searching queries against the index.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            fasta, index, queries = (os.path.join(folder, name) for name in ("db.fasta", "db.idx", "queries.fasta"))
+            with open(fasta, "w") as handle:
+                handle.write("".join(f">{name}\n{sequence}\n" for name, sequence in self.subjects))
+            with open(queries, "w") as handle:
+                handle.write(f">q1\n{QUERY}\n")
+            main([fasta, "--save", index])
+            output = StringIO()
+            with redirect_stdout(output):
+                main([queries, index, "-T", "11"])
+        lines = output.getvalue().splitlines()
+        self.assertEqual([line.split("\t")[:2] for line in lines[:2]], [["q1", "s1"], ["q1", "s2"]])
+
+class TestNeighborhood(unittest.TestCase):
+    def test_matches_exhaustive_enumeration(self):
+        """
+        Tests that the pruned enumeration finds exactly the words scoring at least T among all 20^3 words.
+        """
+        blosum = Blosum62()
+        for word, T in [("PQG", 11), ("WWW", 11), ("LIV", 11), ("AAA", 13), ("HGW", 20)]:
+            expected = sorted("".join(candidate) for candidate in itertools.product(NEIGHBORHOOD_ALPHABET, repeat=3)
+                              if sum(blosum.subst(x, y) for x, y in zip(word, candidate)) >= T)
+            self.assertEqual(neighborhood_words(word, T), expected)
+
+    def test_other_matrix(self):
+        """
+        Tests that the neighborhood depends on the substitution matrix.
+        """
+        self.assertIn("WWW", neighborhood_words("WWW", 40, matrix="BLOSUM45"))
+        self.assertEqual(neighborhood_words("WWW", 40), [])
+
+    def test_query_map_with_threshold(self):
+        """
+        Tests that, with T, each neighborhood word maps to the positions of the query words it came from,
+        and that hits against a database then find similar but not identical words.
+        """
+        query = "MEEPQSDPSWG"
+        query_dict = query_map(query, 3, T=11)
+        self.assertEqual(query_dict["SWG"], [8])
+        for word, indices in query_dict.items():
+            for i in indices:
+                self.assertIn(word, neighborhood_words(query[i:i + 3], 11))
+        database = BlastDatabase([("similar", "AAAATWGAAA")], 3)
+        self.assertEqual(hits(query_dict, database), [(7, 0, 3), (8, 0, 4)])
+        self.assertEqual(hits(query_map(query, 3), database), [])
+
+class TestExtendHit(unittest.TestCase):
+    def test_subject_shorter_than_query(self):
+        """
+        Tests that the forward extension stops at the end of a database sequence shorter than the query.
+        """
+        self.assertEqual(extend_hit("ABCDEF", "ABCD", (0, 0), 2), (0, 0, 4, 4))
+
+    def test_backward_compares_query(self):
+        """
+        Tests that the backward extension compares the query with the database sequence, not the database with itself.
+        """
+        self.assertEqual(extend_hit("XBCD", "YBCD", (1, 1), 2), (1, 1, 3, 3))
+        self.assertEqual(extend_hit("AXBC", "YYBC", (2, 2), 2), (2, 2, 2, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,19 @@
+import io
+import os
+import random
+import tempfile
 import unittest
+from src.fasta import parse_fasta_chunks
+from src.table_amino import GENETIC_CODES, codon_table, table
 from src.get_proteins import (
+    ORF,
+    translate_codon,
+    get_all_proteins_batch,
+    stream_proteins,
+    codon_lookup,
+    orf_bounds,
+    orf_coordinates,
+    translate_six_frames,
     get_complementary_character,
     compute_reverse_complement,
     extract_codons,
@@ -56,6 +70,126 @@ class TestDNAProcessing(unittest.TestCase):
         expected = ["MR_"]
         self.assertEqual(get_all_proteins(dna), expected)
 
+    def test_translate_six_frames(self):
+        """The vectorized translation gives the frames of get_six_orfs + translate_codons_to_protein."""
+        rng = random.Random(21)
+        for length in range(0, 30):
+            dna = "".join(rng.choice("ACGT") for _ in range(length))
+            expected = [translate_codons_to_protein(orf) for orf in get_six_orfs(dna)]
+            self.assertEqual(translate_six_frames(dna), expected)
+
+    def test_translate_six_frames_ambiguous(self):
+        """Lowercase bases are translated and codons with an ambiguous base become X."""
+        self.assertEqual(translate_six_frames("atgNcctaa")[0], "MX_")
+        self.assertEqual(translate_six_frames("ATG", {"ATG": "M"}), ["M", "", "", "X", "", ""])
+        self.assertEqual(len(codon_lookup()), 65)
+
+    def test_orf_bounds(self):
+        """Proteins start at the first M after a stop, inner Ms start nothing and unterminated ones are dropped."""
+        starts, ends = orf_bounds("AMRMK_L_MF_MA")
+        self.assertEqual(list(zip(starts.tolist(), ends.tolist())), [(1, 6), (8, 11)])
+        self.assertEqual(extract_proteins("AMRMK_L_MF_MA"), ["MRMK_", "MF_"])
+        self.assertEqual(len(orf_bounds("")[0]), 0)
+
+    def test_orf_coordinates(self):
+        """Coordinates are positions in the DNA, on the forward strand for the reverse complement frames too."""
+        self.assertEqual(orf_coordinates("ATGCGATAAATGCGA"), [(0, 0, 9)])
+        dna = "TTATCGCATC"  # Reverse complement: GATGCGATAA, protein MR_ in its frame 1
+        self.assertEqual(orf_coordinates(dna), [(4, 0, 9)])
+        self.assertEqual(compute_reverse_complement(dna[0:9]), "ATGCGATAA")
+
+    def test_parse_fasta_chunks(self):
+        """Records are cut into chunks of at most chunk_size bases, with their offsets."""
+        text = ">a first\nACGTA\nCG\n>empty\n>b\nTTTT\n"
+        self.assertEqual(list(parse_fasta_chunks(io.StringIO(text), 3)),
+                         [("a first", 0, "ACG"), ("a first", 3, "TAC"), ("a first", 6, "G"),
+                          ("b", 0, "TTT"), ("b", 3, "T")])
+        self.assertEqual(list(parse_fasta_chunks(text.splitlines(True), 100)),
+                         [("a first", 0, "ACGTACG"), ("b", 0, "TTTT")])
+
+    def test_parse_fasta_chunks_without_newlines(self):
+        """Items of a line iterable are whole lines even without their newline, as with parse_fasta."""
+        text = ">s\nATGTGGTGATAA\n>t\nCCATGAAA\nTAA"
+        self.assertEqual(list(parse_fasta_chunks(text.splitlines(), 5)),
+                         [("s", 0, "ATGTG"), ("s", 5, "GTGAT"), ("s", 10, "AA"), ("t", 0, "CCATG"), ("t", 5, "AAATA"),
+                          ("t", 10, "A")])
+        expected = [ORF("s", "+", 0, 9, "MW_"), ORF("t", "+", 2, 11, "MK_")]
+        self.assertEqual(list(stream_proteins(text.splitlines(), 5)), expected)
+        self.assertEqual(list(stream_proteins(io.StringIO(text), 5)), expected)
+        self.assertEqual(list(stream_proteins([">s", "ATGTGGTGATAA"], 5)), expected[:1])
+
+    def test_stream_proteins(self):
+        """Streamed proteins are those of orf_coordinates, whatever the chunk size."""
+        rng = random.Random(23)
+        records = [(f"contig{i}", "".join(rng.choice("ACGT") for _ in range(300))) for i in range(3)]
+        text = "".join(f">{name}\n{dna[:150]}\n{dna[150:]}\n" for name, dna in records)
+        expected = set()
+        for name, dna in records:
+            for frame, start, end in orf_coordinates(dna):
+                region = dna[start:end] if frame < 3 else compute_reverse_complement(dna[start:end])
+                protein = translate_codons_to_protein(extract_codons(region))
+                expected.add(ORF(name, "+" if frame < 3 else "-", start, end, protein))
+        self.assertTrue(expected)
+        for chunk_size in (1, 4, 31, 1000):
+            self.assertEqual(set(stream_proteins(io.StringIO(text), chunk_size)), expected)
+
+    def test_stream_proteins_across_chunks(self):
+        """A protein split over several chunks is joined, on both strands."""
+        lines = [">seq\n", "CCATGAAACCCGGGTAACC\n"]
+        self.assertEqual(list(stream_proteins(lines, chunk_size=4)), [ORF("seq", "+", 2, 17, "MKPG_")])
+        lines = [">seq\n", compute_reverse_complement("CCATGAAACCCGGGTAACC") + "\n"]
+        self.assertEqual(list(stream_proteins(lines, chunk_size=4)), [ORF("seq", "-", 2, 17, "MKPG_")])
+
+    def test_get_all_proteins_batch(self):
+        """Each record gets the proteins of get_all_proteins, however the records are split into pieces."""
+        rng = random.Random(24)
+        records = [(f"contig{i}", "".join(rng.choice("ACGT") for _ in range(rng.randrange(0, 400))))
+                   for i in range(6)]
+        expected = [(name, get_all_proteins(dna)) for name, dna in records]
+        for batch_size in (3, 10, 64, 10000):
+            self.assertEqual(list(get_all_proteins_batch(records, workers=1, batch_size=batch_size)), expected)
+
+    def test_get_all_proteins_batch_pool(self):
+        """A process pool reading a FASTA path gives the same result as a single process."""
+        records = [("a", "ATGCGATAAATGCGA"), ("b", "TTATCGCATC" * 20), ("c", "")]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "contigs.fasta")
+            with open(path, "w") as handle:
+                handle.writelines(f">{name}\n{dna}\n" for name, dna in records)
+            result = list(get_all_proteins_batch(path, workers=2, batch_size=30))
+        self.assertEqual(result, [("a", ["MR_"]), ("b", get_all_proteins(records[1][1])), ("c", [])])
+
+    def test_codon_table(self):
+        """NCBI genetic codes are codon dicts like table; the standard code is table itself."""
+        self.assertEqual(codon_table(1), table)
+        self.assertEqual(codon_table(2)["TGA"], "W")
+        self.assertEqual(codon_table(2)["AGA"], "_")
+        self.assertEqual(codon_table(11), table)
+        self.assertTrue(all(len(codon_table(table_id)) == 64 for table_id in GENETIC_CODES))
+        with self.assertRaises(ValueError):
+            codon_table(7)
+
+    def test_get_all_proteins_genetic_code(self):
+        """The genetic code is selected by NCBI id in every translation path."""
+        dna = "ATGTGGTGATAA"
+        self.assertEqual(get_all_proteins(dna), ["MW_"])
+        self.assertEqual(get_all_proteins(dna, table_id=2), ["MWW_"])
+        self.assertEqual([orf.protein for orf in stream_proteins([">s\n", dna + "\n"], 5, table_id=2)], ["MWW_"])
+        self.assertEqual(list(get_all_proteins_batch([("s", dna)], workers=1, batch_size=6, table_id=2)),
+                         [("s", ["MWW_"])])
+        with self.assertRaises(ValueError):
+            translate_six_frames(dna, table_id=99)
+
+    def test_ambiguous_codons(self):
+        """Lowercase and ambiguous codons translate when all the codons they stand for agree, else to X."""
+        self.assertEqual(translate_codon("GCN"), "A")
+        self.assertEqual(translate_codon("ttr"), "L")
+        self.assertEqual(translate_codon("NNN"), "X")
+        self.assertEqual(translate_codons_to_protein(["atg", "GCN", "TAR"]), "MA_")
+        self.assertEqual(translate_six_frames("ATGGCNTAR")[0], "MA_")
+        self.assertEqual(translate_six_frames("YTANGCCAT")[3], "MA_")  # Reverse complement: ATGGCNTAR
+        self.assertEqual(translate_six_frames("ATGAGRTAA", table_id=2)[0], "M__")
+
 if __name__ == "__main__":
     unittest.main()
 
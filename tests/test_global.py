@@ -3,7 +3,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.my_blosum import Blosum62
-from src.global_alignment import global_score, subst, global_matrix, align_sequences, print_matrix_with_sequences
+from src.global_alignment import global_score, subst, global_matrix, align_sequences, print_matrix_with_sequences, ENGINES, global_last_row, hirschberg, global_affine_score, global_affine_matrices, align_sequences_affine, global_banded
 from pprint import pprint
 from io import StringIO
 
@@ -202,6 +202,157 @@ class TestGlobalAlignment(unittest.TestCase):
         # Assert the captured output matches the expected output
         self.assertEqual(captured_output.getvalue(), expected_output)
 
+    def test_engines_same_matrix(self):
+        """
+        Tests that the NumPy engines ("rows" and "wavefront") build exactly the same scoring matrix as the Python engine.
+        The matrices should be equal cell by cell, including the gap-only first row and column and empty sequences.
+        """
+        pairs = [("HGWAG", "PHSWG"), ("ALIGNMENT", "ALIGN"), ("", "ALIGN"), ("A", ""), ("MEEPQSDPSY", "MEEPQSDLSV")]
+        for s1, s2 in pairs:
+            expected = global_matrix(s1, s2)
+            for engine in ENGINES:
+                self.assertEqual(global_matrix(s1, s2, engine=engine), expected)
+                self.assertEqual(global_matrix(s1, s2, g=-3, engine=engine), global_matrix(s1, s2, g=-3))
+
+    def test_engines_same_alignment(self):
+        """
+        Tests that the traceback on a matrix built by each engine gives the same alignment and score.
+        """
+        s1 = "MEEPQSDPSVEPPLSQETFSDLWKLL"
+        s2 = "MEETQSDLSVEPPLSETFSDLWKLL"
+        expected = align_sequences(global_matrix(s1, s2), s1, s2)
+        for engine in ENGINES:
+            matrix = global_matrix(s1, s2, engine=engine)
+            self.assertEqual(align_sequences(matrix, s1, s2), expected)
+            self.assertEqual(global_score(s1, s2, engine=engine), global_score(s1, s2))
+
+    def test_unknown_engine(self):
+        """
+        Tests that an unknown engine name raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            global_matrix("A", "A", engine="gpu")
+
+    def test_last_row_matches_matrix(self):
+        """
+        Tests that the linear-memory last row is equal to the last row of the full scoring matrix.
+        The score-only path of global_score should therefore give the same score as reading the matrix.
+        """
+        pairs = [("HGWAG", "PHSWG"), ("ALIGN", "ALIGNMENT"), ("ALIGN", ""), ("", "ALIGN"), ("", "")]
+        for s1, s2 in pairs:
+            matrix = global_matrix(s1, s2)
+            self.assertEqual(list(global_last_row(s1, s2)), matrix[len(s1)])
+            self.assertEqual(global_score(s1, s2), matrix[len(s1)][len(s2)])
+            self.assertEqual(global_score(s1, s2, g=-2), global_matrix(s1, s2, g=-2)[len(s1)][len(s2)])
+
+    def test_hirschberg_alignment(self):
+        """
+        Tests that the linear-space Hirschberg alignment is a valid optimal global alignment.
+        Removing the gaps should give back the input sequences, and the alignment score should equal global_score.
+        """
+        def alignment_score(aligned_s1, aligned_s2, g=-8):
+            return sum(g if "-" in (x, y) else subst(x, y) for x, y in zip(aligned_s1, aligned_s2))
+
+        s1 = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGP" * 3
+        s2 = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSAMDDLMLSPDDIEQWFTEDPGP" * 3
+        aligned_s1, aligned_s2 = hirschberg(s1, s2)
+        self.assertEqual(len(aligned_s1), len(aligned_s2))
+        self.assertEqual(aligned_s1.replace("-", ""), s1)
+        self.assertEqual(aligned_s2.replace("-", ""), s2)
+        self.assertEqual(alignment_score(aligned_s1, aligned_s2), global_score(s1, s2))
+
+    def test_hirschberg_small_sequences(self):
+        """
+        Tests that Hirschberg gives the same tuple as align_sequences on small inputs and empty sequences.
+        """
+        for s1, s2 in [("ACTG", "ACG"), ("", "ACG"), ("ACTG", ""), ("HGWAG", "PHSWG")]:
+            self.assertEqual(hirschberg(s1, s2), align_sequences(global_matrix(s1, s2), s1, s2))
+
+    def test_affine_matches_linear(self):
+        """
+        Tests that affine gaps with no opening penalty (gap_open=0, gap_extend=g) give the linear gap score and alignment.
+        """
+        for s1, s2 in [("ACTG", "ACG"), ("HGWAG", "PHSWG"), ("ALIGN", ""), ("", "")]:
+            self.assertEqual(global_affine_score(s1, s2, 0, -8), global_score(s1, s2))
+            matrices = global_affine_matrices(s1, s2, 0, -8)
+            self.assertEqual(align_sequences_affine(matrices, s1, s2, 0, -8), align_sequences(global_matrix(s1, s2), s1, s2))
+
+    def test_affine_gap_penalty(self):
+        """
+        Tests global alignment with affine gaps, where a gap of length L scores gap_open + L * gap_extend.
+        The three missing residues should be aligned as a single gap.
+        """
+        s1 = "MEEPQSDPSV"
+        s2 = "MEEPSV"
+        score = global_affine_score(s1, s2, -11, -1)
+        self.assertEqual(score, sum(subst(x, x) for x in "MEEPSV") - 11 - 4)
+        aligned_s1, aligned_s2 = align_sequences_affine(global_affine_matrices(s1, s2, -11, -1), s1, s2, -11, -1)
+        self.assertEqual(aligned_s1, s1)
+        self.assertEqual(aligned_s2.count("-"), 4)
+        self.assertEqual(aligned_s2.strip("-").count("-"), 4)
+
+    def test_banded_near_identical(self):
+        """
+        Tests banded alignment of near-identical sequences (one substitution, one insertion, one deletion).
+        The score and alignment should match the full dynamic programming result.
+        """
+        s1 = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGP"
+        s2 = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGP".replace("QETF", "QEYTF").replace("AMDD", "AMD")
+        score, aligned_s1, aligned_s2 = global_banded(s1, s2)
+        self.assertEqual(score, global_score(s1, s2))
+        self.assertEqual((aligned_s1, aligned_s2), align_sequences(global_matrix(s1, s2), s1, s2))
+
+    def test_banded_widening(self):
+        """
+        Tests that a band too narrow for the optimal path is widened automatically.
+        With band=1 the 6-residue deletion does not fit, but the result should still be the full DP one.
+        """
+        s1 = "HEAGAWGHEEPQSDPSVEPPLSQETF"
+        s2 = "HEAGAWPQSDPSVEPPLSQETF"
+        score, aligned_s1, aligned_s2 = global_banded(s1, s2, band=1)
+        self.assertEqual(score, global_score(s1, s2))
+        self.assertEqual((aligned_s1, aligned_s2), align_sequences(global_matrix(s1, s2), s1, s2))
+
+    def test_banded_long_indels(self):
+        """
+        Tests banded alignment of random sequences with an 11-residue deletion and an 11-residue insertion, longer
+        than the initial band. A best in-band path that never touches the band edges must not stop the widening.
+        """
+        import random
+        rng = random.Random(7)
+        for _ in range(50):
+            s1 = "".join(rng.choice("ARNDCQEGHILKMFPSTWYV") for _ in range(60))
+            deletion, insertion = rng.randrange(5, 40), rng.randrange(5, 40)
+            s2 = s1[:deletion] + s1[deletion + 11:]
+            s2 = s2[:insertion] + "".join(rng.choice("ARNDCQEGHILKMFPSTWYV") for _ in range(11)) + s2[insertion:]
+            score, aligned_s1, aligned_s2 = global_banded(s1, s2)
+            self.assertEqual(score, global_score(s1, s2))
+            self.assertEqual((aligned_s1.replace("-", ""), aligned_s2.replace("-", "")), (s1, s2))
+
+    def test_banded_long_near_identical(self):
+        """
+        Tests banded alignment of a long protein against a variant with about 5% substitutions, deletions and
+        insertions, whose optimal path wanders further from the diagonal than the initial band.
+        """
+        import random
+        rng = random.Random(95)
+        s1 = "".join(rng.choice("ARNDCQEGHILKMFPSTWYV") for _ in range(800))
+        s2 = ""
+        for x in s1:
+            draw = rng.random()
+            s2 += "" if draw < 0.017 else "W" if draw < 0.034 else x + "G" if draw < 0.05 else x
+        score, aligned_s1, aligned_s2 = global_banded(s1, s2)
+        self.assertEqual(score, global_score(s1, s2))
+        self.assertEqual((aligned_s1, aligned_s2), align_sequences(global_matrix(s1, s2), s1, s2))
+
+    def test_banded_empty(self):
+        """
+        Tests banded alignment with empty sequences, which should only contain gaps.
+        """
+        self.assertEqual(global_banded("", "ACG"), (3 * -8, "---", "ACG"))
+        self.assertEqual(global_banded("ACG", ""), (3 * -8, "ACG", "---"))
+        self.assertEqual(global_banded("", ""), (0, "", ""))
+
         
 if __name__ == "__main__":
     unittest.main()
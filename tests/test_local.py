@@ -1,6 +1,6 @@
 import unittest
 from src.my_blosum import Blosum62
-from src.local_alignment import local_score, subst, local_matrix, traceback, print_matrix_with_sequences
+from src.local_alignment import local_score, subst, local_matrix, traceback, print_matrix_with_sequences, local_affine_score, local_affine_matrices, traceback_affine, striped_profile, local_score_striped
 from pprint import pprint
 import unittest
 from io import StringIO
@@ -196,5 +196,51 @@ class TestLocalAlignment(unittest.TestCase):
         # Assert the captured output matches the expected output
         self.assertEqual(captured_output.getvalue(), expected_output)
 
+    def test_affine_matches_linear(self):
+        """
+        Tests that affine gaps with no opening penalty (gap_open=0, gap_extend=g) behave like the linear gap penalty g.
+        Scores and alignments should match local_score and traceback.
+        """
+        for s1, s2 in [("HGWAG", "PHSWG"), ("ACGTACGT", "ACGT"), ("ALIGNMENT", "MENTAL"), ("", "ACT")]:
+            self.assertEqual(local_affine_score(s1, s2, 0, -8), local_score(s1, s2))
+            matrices = local_affine_matrices(s1, s2, 0, -8)
+            self.assertEqual(traceback_affine(matrices, s1, s2, 0, -8), traceback(local_matrix(s1, s2), s1, s2))
+
+    def test_affine_long_gap(self):
+        """
+        Tests that a single long gap is cheaper with affine penalties than with a linear penalty.
+        With gap_open=-11 and gap_extend=-1 the 4-residue gap costs 15, so the alignment keeps both flanks.
+        """
+        s1 = "WWWWHHHHCCCCWWWW"
+        s2 = "WWWWWWWW"
+        score = local_affine_score(s1, s2, -11, -1)
+        self.assertEqual(score, 8 * subst("W", "W") - 11 - 8)
+        aligned_s1, aligned_s2 = traceback_affine(local_affine_matrices(s1, s2, -11, -1), s1, s2, -11, -1)
+        self.assertEqual(aligned_s1, s1)
+        self.assertEqual(aligned_s2, "WWWW--------WWWW")
+
+    def test_striped_matches_local_score(self):
+        """
+        Tests that the striped (Farrar) kernel gives the same score as local_score for any number of lanes.
+        The same profile is reused for several targets, including an empty one.
+        """
+        query = "MEEPQSDPSVEPPLSQETFSDLWKLLPENNVLSPLPSQAMDDLMLSPDDIEQWFTEDPGP"
+        targets = ["MEEPQSDPSVEPPLSQETFSDLWKLL", "PLPSQAMDDLWWLSPDDIEQ", "HGWAG", "", query]
+        for lanes in (1, 4, 16, 64):
+            profile = striped_profile(query, lanes)
+            for target in targets:
+                self.assertEqual(local_score_striped(profile, target), local_score(query, target))
+                self.assertEqual(local_score_striped(profile, target, g=-2), local_score(query, target, g=-2))
+
+    def test_striped_profile_layout(self):
+        """
+        Tests the striped layout: with 2 lanes, "HGWAG" is split into lanes "HGW" and "AG" (plus padding).
+        """
+        profile = striped_profile("HGWAG", lanes=2)
+        self.assertEqual(profile.shape[1:], (3, 2))
+        w = blosum.subst("W", "W")
+        self.assertEqual(profile[:, 2, 0].max(), w)
+        self.assertLess(profile[:, 2, 1].max(), 0)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from src.global_alignment import align_sequences, global_matrix
 from src.multiple_alignment import star_alignment
 
 class TestStarAlignment(unittest.TestCase):
@@ -68,5 +69,13 @@ class TestStarAlignment(unittest.TestCase):
         # All sequences should have same length
         self.assertTrue(all(len(seq) == len(result[0]) for seq in result))
 
+    def test_substitution_matrix(self):
+        """Test that the substitution matrix is passed to the pairwise alignments"""
+        seqs = ["HEAGAWGHEE", "PAWHEAE"]
+        expected = align_sequences(global_matrix(seqs[0], seqs[1], matrix="PAM250"), seqs[0], seqs[1], matrix="PAM250")
+        self.assertEqual(star_alignment(seqs, matrix="PAM250"), list(expected))
+        with self.assertRaises(FileNotFoundError):
+            star_alignment(seqs, matrix="NO_SUCH_MATRIX")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from src import my_blosum
+from src.my_blosum import Blosum62, available_matrices, get_matrix, load_matrix, parse_ncbi_matrix
+from src.global_alignment import global_score
+from src.local_alignment import local_score, local_score_striped, striped_profile
+
+class TestBlosum62(unittest.TestCase):
+    def test_matrix_matches_subst(self):
+        """
+        Tests that the dense matrix holds the same scores as the dict-based subst for every pair of letters.
+        """
+        blosum = Blosum62()
+        self.assertEqual(blosum.matrix.shape, (25, 25))
+        for i, x in enumerate(blosum.alphabet):
+            for j, y in enumerate(blosum.alphabet):
+                self.assertEqual(blosum.matrix[i, j], blosum.subst(x, y))
+
+    def test_encode(self):
+        """
+        Tests that encode gives the position of each residue in the alphabet, so matrix[codes] gives the scores.
+        """
+        blosum = Blosum62()
+        codes = blosum.encode("HGW-")
+        self.assertEqual([blosum.alphabet[code] for code in codes], list("HGW-"))
+        self.assertEqual(blosum.matrix[codes[2], codes[2]], blosum.subst("W", "W"))
+        self.assertEqual(len(blosum.encode("")), 0)
+
+    def test_encode_unknown_residue(self):
+        """
+        Tests that residues outside the alphabet raise a KeyError, like subst.
+        """
+        blosum = Blosum62()
+        for sequence in ("HGJ", "hgw", "HGé"):
+            with self.assertRaises(KeyError):
+                blosum.encode(sequence)
+
+    def test_parsed_once(self):
+        """
+        Tests that instances share the parsed table instead of parsing the text again.
+        """
+        self.assertIs(Blosum62().matrix, Blosum62().matrix)
+
+class TestMatrixRegistry(unittest.TestCase):
+    def test_available_matrices(self):
+        """
+        Tests that the matrices shipped in the data folder are listed and can be loaded by name, in any case.
+        """
+        names = available_matrices()
+        for name in ("BLOSUM45", "BLOSUM62", "BLOSUM80", "PAM250"):
+            self.assertIn(name, names)
+        self.assertIs(load_matrix("blosum45"), load_matrix("BLOSUM45"))
+        self.assertIs(get_matrix(None), load_matrix("BLOSUM62"))
+        with self.assertRaises(FileNotFoundError):
+            load_matrix("BLOSUM1000")
+
+    def test_name_before_path(self):
+        """
+        Tests that a file named like a shipped matrix in the working directory does not replace it,
+        while paths with a separator and names that are not shipped are still read as files.
+        """
+        text = "   A  R\nA  1 -1\nR -1  1\n"
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as folder, mock.patch.object(my_blosum, "CACHE_DIR", folder):
+            for file_name in ("BLOSUM62", "custom.txt"):
+                with open(os.path.join(folder, file_name), "w") as handle:
+                    handle.write(text)
+            os.chdir(folder)
+            try:
+                self.assertEqual(load_matrix("BLOSUM62").subst("W", "W"), 11)
+                self.assertEqual(load_matrix(os.path.join(".", "BLOSUM62")).alphabet, "AR")
+                self.assertEqual(load_matrix("custom.txt").subst("A", "R"), -1)
+            finally:
+                os.chdir(cwd)
+
+    def test_known_scores(self):
+        """
+        Tests a few published scores of each matrix, and that the gap letter is scored like "*".
+        """
+        self.assertEqual(load_matrix("BLOSUM45").subst("W", "W"), 15)
+        self.assertEqual(load_matrix("BLOSUM80").subst("W", "W"), 16)
+        self.assertEqual(load_matrix("PAM250").subst("W", "W"), 17)
+        pam = load_matrix("PAM250")
+        self.assertEqual(pam.subst("A", "-"), pam.subst("A", "*"))
+
+    def test_alignment_matrix_argument(self):
+        """
+        Tests that the alignment functions score with the matrix given by name.
+        """
+        s1, s2 = "HEAGAWGHEE", "PAWHEAE"
+        self.assertEqual(global_score(s1, s2, matrix="BLOSUM62"), global_score(s1, s2))
+        self.assertNotEqual(local_score(s1, s2, matrix="BLOSUM45"), local_score(s1, s2))
+        self.assertEqual(global_score("W", "W", matrix="PAM250"), 17)
+        profile = striped_profile(s1, 4, matrix="BLOSUM45")
+        self.assertEqual(local_score_striped(profile, s2, matrix="BLOSUM45"), local_score(s1, s2, matrix="BLOSUM45"))
+
+    def test_binary_cache(self):
+        """
+        Tests that a parsed matrix is written to the cache folder and read back with the same scores.
+        """
+        with tempfile.TemporaryDirectory() as cache, mock.patch.object(my_blosum, "CACHE_DIR", cache):
+            path = os.path.join(my_blosum.DATA_DIR, "blosum80.txt")
+            with open(path, "rb") as handle:
+                content = handle.read()
+            alphabet, matrix = my_blosum._load_cached("BLOSUM80", content)
+            self.assertEqual(len(os.listdir(cache)), 1)
+            cached_alphabet, cached_matrix = my_blosum._load_cached("BLOSUM80", content)
+            self.assertEqual(cached_alphabet, alphabet)
+            self.assertEqual(cached_matrix.tolist(), matrix.tolist())
+
+    def test_parse_malformed(self):
+        """
+        Tests that malformed matrix text raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            parse_ncbi_matrix("")
+        with self.assertRaises(ValueError):
+            parse_ncbi_matrix("   A  R\nA  4 -1\nR -1\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import random
+import unittest
+
+import numpy as np
+
+from src.get_proteins import compute_reverse_complement
+from src.packed_dna import PackedDNA, pack_codes
+
+
+class TestPackedDNA(unittest.TestCase):
+
+    def test_round_trip(self):
+        """The string form of a packed sequence is the original sequence, for every length modulo 4."""
+        rng = random.Random(20)
+        for length in range(0, 13):
+            sequence = "".join(rng.choice("ACGT") for _ in range(length))
+            packed = PackedDNA(sequence)
+            self.assertEqual(len(packed), length)
+            self.assertEqual(str(packed), sequence)
+
+    def test_memory(self):
+        """Unambiguous sequences use 2 bits per base and no mask."""
+        packed = PackedDNA("ACGT" * 1000)
+        self.assertEqual(packed.nbytes, 1000)
+        self.assertIsNone(packed.mask)
+        self.assertEqual(list(pack_codes(np.array([0, 1, 2, 3, 3]))), [0b00011011, 0b11000000])
+
+    def test_ambiguous_and_lowercase(self):
+        """Lowercase is upper-cased, U reads as T and IUPAC ambiguity codes read back as N."""
+        packed = PackedDNA("acgNRtu")
+        self.assertEqual(str(packed), "ACGNNTT")
+        self.assertEqual(list(packed.ambiguous()), [False, False, False, True, True, False, False])
+        with self.assertRaises(ValueError):
+            PackedDNA("ACGX")
+
+    def test_slicing(self):
+        """Slices are packed sequences equal to the packed slice of the string; integers give a base."""
+        sequence = "ACGTNNGTACCAGT"
+        packed = PackedDNA(sequence)
+        for start in range(len(sequence)):
+            for stop in range(start, len(sequence) + 1):
+                self.assertEqual(packed[start:stop], PackedDNA(sequence[start:stop]))
+        self.assertEqual(str(packed[::-3]), sequence[::-3])
+        self.assertEqual(packed[4], "N")
+        self.assertEqual(packed[-1], "T")
+        with self.assertRaises(IndexError):
+            packed[len(sequence)]
+
+    def test_ambiguous_ranges(self):
+        """Ambiguity flags of any range match the string, across the bytes of the mask."""
+        sequence = "ACGTN" * 7 + "NNACG"
+        packed = PackedDNA(sequence)
+        for start in range(len(sequence)):
+            for stop in range(start, len(sequence) + 1):
+                self.assertEqual(packed.ambiguous(start, stop).tolist(), [base == "N" for base in sequence[start:stop]])
+
+    def test_reverse_complement(self):
+        """The reverse complement matches compute_reverse_complement, and keeps ambiguous bases in place."""
+        rng = random.Random(21)
+        for length in range(0, 17):
+            sequence = "".join(rng.choice("ACGT") for _ in range(length))
+            self.assertEqual(str(PackedDNA(sequence).reverse_complement()), compute_reverse_complement(sequence))
+        self.assertEqual(str(PackedDNA("AACNG").reverse_complement()), "CNGTT")
+
+    def test_kmer_codes(self):
+        """K-mer codes are base-4 numbers, first base most significant; ambiguous k-mers are -1."""
+        packed = PackedDNA("ACGTNA")
+        self.assertEqual(list(packed.kmer_codes(2)), [0b0001, 0b0110, 0b1011, -1, -1])
+        self.assertEqual(list(packed.kmer_codes(3, step=2)), [0b000110, -1])
+        self.assertEqual(list(packed.kmer_codes(7)), [])
+        with self.assertRaises(ValueError):
+            packed.kmer_codes(0)
+
+    def test_codon_codes(self):
+        """Codon codes of each frame cover the complete codons only."""
+        packed = PackedDNA("ATGGCCTAA")
+        self.assertEqual(list(packed.codon_codes(0)), [0b001110, 0b100101, 0b110000])
+        self.assertEqual(list(packed.codon_codes(1)), [0b111010, 0b010111])
+        self.assertEqual(list(packed.codon_codes(2)), [0b101001, 0b011100])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from src.pairwise import all_vs_all
+from src.global_alignment import global_score
+from src.local_alignment import local_score
+
+SEQUENCES = ["MEEPQSDPSY", "MEEPQSDPSV", "MEEPQSDLSV", "HEAGAWGHEE", "PAWHEAE", "", "HGWAG"]
+
+class TestAllVsAll(unittest.TestCase):
+    def test_global_scores(self):
+        """
+        Tests that every cell of the global score matrix is the global_score of the pair, computed in this process.
+        """
+        scores = all_vs_all(SEQUENCES, mode="global", workers=1, tile=3)
+        expected = [[global_score(a, b) for b in SEQUENCES] for a in SEQUENCES]
+        self.assertEqual(scores.tolist(), expected)
+
+    def test_local_scores_with_workers(self):
+        """
+        Tests the local score matrix computed by a pool of workers reading the sequences from shared memory.
+        The result should be symmetric and equal to local_score for every pair.
+        """
+        scores = all_vs_all(SEQUENCES, mode="local", workers=2, tile=2)
+        expected = [[local_score(a, b) for b in SEQUENCES] for a in SEQUENCES]
+        self.assertEqual(scores.tolist(), expected)
+        self.assertTrue((scores == scores.T).all())
+
+    def test_empty_and_invalid_mode(self):
+        """
+        Tests an empty list of sequences and an unknown mode.
+        """
+        self.assertEqual(all_vs_all([], workers=1).shape, (0, 0))
+        with self.assertRaises(ValueError):
+            all_vs_all(SEQUENCES, mode="semi-global")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from src.my_blosum import Blosum62
+from src.query_profile import QueryProfile
+from src.global_alignment import global_score, global_matrix, align_sequences, hirschberg, ENGINES
+from src.local_alignment import local_score, local_matrix, traceback, local_affine_score
+
+blosum = Blosum62()
+
+class TestQueryProfile(unittest.TestCase):
+    def test_scores(self):
+        """
+        Tests that each row of the profile holds the scores of one query residue against every letter of the alphabet.
+        """
+        profile = QueryProfile("HGW")
+        self.assertEqual(profile.scores.shape, (3, len(profile.alphabet)))
+        for i, x in enumerate("HGW"):
+            for y in profile.alphabet:
+                self.assertEqual(profile.scores[i, profile.alphabet.index(y)], blosum.subst(x, y))
+
+    def test_indexing_and_slicing(self):
+        """
+        Tests that indexing gives query residues and slicing gives the profile of the sliced query.
+        """
+        profile = QueryProfile("HGWAG")
+        self.assertEqual(len(profile), 5)
+        self.assertEqual(profile[1], "G")
+        reversed_profile = profile[::-1]
+        self.assertEqual(reversed_profile.query, "GAWGH")
+        self.assertEqual(reversed_profile.scores.tolist(), QueryProfile("GAWGH").scores.tolist())
+
+    def test_unknown_residue(self):
+        """
+        Tests that residues outside the alphabet raise a KeyError, like Blosum62.subst.
+        """
+        with self.assertRaises(KeyError):
+            QueryProfile("HGJ")
+        with self.assertRaises(KeyError):
+            QueryProfile("HG").encode("J")
+
+    def test_global_alignment_with_profile(self):
+        """
+        Tests that the global alignment functions give the same results with a profile as with the query string.
+        """
+        query = "MEEPQSDPSVEPPLSQETFSDLWKLL"
+        profile = QueryProfile(query)
+        for target in ["MEETQSDPSVEPPLSQETFSDLWKLL", "PHSWG", ""]:
+            self.assertEqual(global_score(profile, target), global_score(query, target))
+            for engine in ENGINES:
+                self.assertEqual(global_matrix(profile, target, engine=engine), global_matrix(query, target))
+            matrix = global_matrix(query, target)
+            self.assertEqual(align_sequences(matrix, profile, target), align_sequences(matrix, query, target))
+            self.assertEqual(hirschberg(profile, target), hirschberg(query, target))
+
+    def test_local_alignment_with_profile(self):
+        """
+        Tests that the local alignment functions give the same results with a profile as with the query string,
+        reusing one profile for several targets.
+        """
+        query = "MEEPQSDPSVEPPLSQETFSDLWKLL"
+        profile = QueryProfile(query)
+        for target in ["SQETFSDLW", "PHSWG", "", query]:
+            self.assertEqual(local_score(profile, target), local_score(query, target))
+            self.assertEqual(local_matrix(profile, target), local_matrix(query, target))
+            matrix = local_matrix(query, target)
+            self.assertEqual(traceback(matrix, profile, target), traceback(matrix, query, target))
+            self.assertEqual(local_affine_score(profile, target), local_affine_score(query, target))
+
+if __name__ == "__main__":
+    unittest.main()